@@ -7,15 +7,27 @@ Maintains session state across multiple requests for persistent workflows.
 """
 
 import asyncio
+import base64
+import fnmatch
+import functools
+import json
 import logging
 import os
+import re
+import shutil
+import subprocess
+import tempfile
 import time
+import uuid
+from collections import deque
+from contextlib import contextmanager
 from dataclasses import dataclass, field
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Tuple, Union
+from urllib.parse import urlparse
 
 from bedrock_agentcore.tools.browser_client import BrowserClient
 from mcp.server import Server
-from mcp.types import Tool, TextContent
+from mcp.types import ImageContent, Tool, TextContent
 from playwright.async_api import Browser as PlaywrightBrowser
 from playwright.async_api import BrowserContext, Page, async_playwright
 
@@ -30,6 +42,485 @@ app = Server("agentcore-browser")
 sessions: Dict[str, "BrowserSession"] = {}
 playwright_instance = None
 
+# Loaded storage profiles keyed by name, with the file mtime they were read at
+storage_profiles: Dict[str, Tuple[float, Dict[str, Any]]] = {}
+
+# Latency histograms by kind ('tool', 'session', 'phase') and name
+metrics: Dict[str, Dict[str, "LatencyHistogram"]] = {"tool": {}, "session": {}, "phase": {}}
+
+# Default byte budget for a single extract_content chunk
+DEFAULT_EXTRACT_MAX_BYTES = int(os.getenv("BROWSER_EXTRACT_MAX_BYTES", "20000"))
+
+# Compact markdown rendering of the readable parts of a page
+MARKDOWN_EXTRACT_JS = """
+(root) => {
+    const skip = new Set(["SCRIPT", "STYLE", "NOSCRIPT", "TEMPLATE", "SVG", "IFRAME"]);
+    const lines = [];
+    const clean = (text) => (text || "").replace(/\\s+/g, " ").trim();
+    const walk = (node) => {
+        if (node.nodeType === Node.TEXT_NODE) {
+            lines.push(clean(node.textContent));
+            return;
+        }
+        if (node.nodeType !== Node.ELEMENT_NODE) return;
+        const tag = node.tagName.toUpperCase();
+        if (skip.has(tag)) return;
+        const style = window.getComputedStyle(node);
+        if (style.display === "none" || style.visibility === "hidden") return;
+        if (/^H[1-6]$/.test(tag)) {
+            lines.push("#".repeat(Number(tag[1])) + " " + clean(node.innerText));
+        } else if (tag === "LI") {
+            lines.push("- " + clean(node.innerText));
+        } else if (tag === "A" && node.href) {
+            lines.push("[" + clean(node.innerText) + "](" + node.href + ")");
+        } else if (tag === "P" || tag === "BLOCKQUOTE" || tag === "PRE" || tag === "TD" || tag === "TH") {
+            lines.push(clean(node.innerText));
+        } else {
+            for (const child of node.childNodes) walk(child);
+        }
+    };
+    walk(root || document.body);
+    return lines.filter((line) => line && line !== "-").join("\\n");
+}
+"""
+
+# Table rows (header cells first) for every table matched by a selector
+TABLE_EXTRACT_JS = """
+(tables) => tables.map((table) => Array.from(table.rows).map(
+    (row) => Array.from(row.cells).map((cell) => cell.innerText.trim())
+))
+"""
+
+# Maximum cached extractions kept per tab
+CONTENT_CACHE_MAX_ENTRIES = 32
+
+# Reports DOM mutations back to the server so cached extractions can be dropped
+DOM_CHANGE_OBSERVER_JS = """
+(() => {
+    if (window.__mcpDomObserver || !window.__mcpDomChanged) return;
+    // Stamping snapshot refs is not a content change
+    window.__mcpDomObserver = new MutationObserver(records => {
+        if (records.some(r => r.attributeName !== "data-mcp-ref")) window.__mcpDomChanged();
+    });
+    window.__mcpDomObserver.observe(document, {
+        subtree: true, childList: true, attributes: true, characterData: true
+    });
+})();
+"""
+
+ContentKey = Tuple[str, Optional[str], Optional[str]]
+
+# Attribute used to tag elements with the stable refs reported by snapshot
+SNAPSHOT_REF_ATTR = "data-mcp-ref"
+SNAPSHOT_REF_PATTERN = re.compile(r"e\d+")
+DEFAULT_SNAPSHOT_MAX_NODES = 500
+
+# Walks the DOM and returns visible interactive elements and structural landmarks
+# as a pruned tree. Refs are stamped on elements so they stay stable across
+# snapshots until the page navigates.
+SNAPSHOT_JS = """
+([refAttr, rootSelector, maxNodes]) => {
+    const INTERACTIVE = 'a[href], button, input:not([type="hidden"]), select, textarea, summary, ' +
+        '[role="button"], [role="link"], [role="checkbox"], [role="radio"], [role="tab"], ' +
+        '[role="menuitem"], [role="option"], [role="switch"], [role="combobox"], [role="textbox"], ' +
+        '[contenteditable=""], [contenteditable="true"], [onclick]';
+    const STRUCTURAL = 'h1, h2, h3, h4, h5, h6, nav, main, form, dialog, table, ' +
+        '[role="dialog"], [role="alert"], [role="navigation"], [role="main"], [role="search"]';
+    const TAG_ROLES = {
+        A: 'link', BUTTON: 'button', SELECT: 'combobox', TEXTAREA: 'textbox', SUMMARY: 'button',
+        NAV: 'navigation', MAIN: 'main', FORM: 'form', DIALOG: 'dialog', TABLE: 'table'
+    };
+    const INPUT_ROLES = {
+        checkbox: 'checkbox', radio: 'radio', button: 'button', submit: 'button', reset: 'button',
+        image: 'button', range: 'slider', search: 'searchbox'
+    };
+    const CONTAINERS = ['FORM', 'TABLE', 'NAV', 'MAIN', 'DIALOG'];
+    const clip = (value, limit) => {
+        value = (value || '').replace(/\\s+/g, ' ').trim();
+        return value.length > limit ? value.slice(0, limit - 1) + '…' : value;
+    };
+    const visible = el => {
+        if (!el.getClientRects().length) return false;
+        const style = getComputedStyle(el);
+        return style.visibility !== 'hidden' && style.display !== 'none';
+    };
+    const roleOf = el => {
+        if (el.getAttribute('role')) return el.getAttribute('role');
+        if (/^H[1-6]$/.test(el.tagName)) return 'heading';
+        if (el.tagName === 'INPUT') return INPUT_ROLES[(el.type || 'text').toLowerCase()] || 'textbox';
+        if (el.isContentEditable) return 'textbox';
+        return TAG_ROLES[el.tagName] || 'generic';
+    };
+    const nameOf = el => {
+        const labelledBy = el.getAttribute('aria-labelledby');
+        if (labelledBy) {
+            const text = labelledBy.split(/\\s+/).map(id => document.getElementById(id)?.innerText || '').join(' ');
+            if (text.trim()) return clip(text, 80);
+        }
+        const direct = el.getAttribute('aria-label') || el.getAttribute('alt') || el.getAttribute('title');
+        if (direct) return clip(direct, 80);
+        if (el.labels && el.labels.length) return clip(el.labels[0].innerText, 80);
+        if (el.getAttribute('placeholder')) return clip(el.getAttribute('placeholder'), 80);
+        if (el.tagName === 'INPUT' && ['button', 'submit', 'reset'].includes(el.type)) return clip(el.value, 80);
+        if (el.tagName === 'INPUT' || el.tagName === 'SELECT' || CONTAINERS.includes(el.tagName)) return '';
+        return clip(el.innerText, 80);
+    };
+    const propsOf = el => {
+        const props = {};
+        if (/^H[1-6]$/.test(el.tagName)) props.level = Number(el.tagName[1]);
+        if (el.tagName === 'A') props.href = clip(el.getAttribute('href'), 120);
+        if (['INPUT', 'TEXTAREA', 'SELECT'].includes(el.tagName) && el.type !== 'password') {
+            if (el.type === 'checkbox' || el.type === 'radio') props.checked = el.checked;
+            else if (el.value) props.value = clip(el.value, 80);
+        }
+        if (el.disabled || el.getAttribute('aria-disabled') === 'true') props.disabled = true;
+        if (el.getAttribute('aria-expanded')) props.expanded = el.getAttribute('aria-expanded') === 'true';
+        if (el.getAttribute('aria-checked')) props.checked = el.getAttribute('aria-checked') === 'true';
+        return props;
+    };
+    
+    window.__mcpRefSeq = window.__mcpRefSeq || 0;
+    const root = rootSelector ? document.querySelector(rootSelector) : document.body;
+    if (!root) throw new Error(`No element matches ${rootSelector}`);
+    
+    const nodes = [];
+    let truncated = false;
+    const walk = (el, depth) => {
+        for (const child of el.children) {
+            if (nodes.length >= maxNodes) {
+                truncated = true;
+                return;
+            }
+            const structural = child.matches(STRUCTURAL);
+            if ((structural || child.matches(INTERACTIVE)) && visible(child)) {
+                let ref = child.getAttribute(refAttr);
+                if (!ref) {
+                    ref = 'e' + (++window.__mcpRefSeq);
+                    child.setAttribute(refAttr, ref);
+                }
+                nodes.push({ref, role: roleOf(child), name: nameOf(child), depth, props: propsOf(child)});
+                // A link's or button's content is already its name, only descend into containers
+                if (structural) walk(child, depth + 1);
+            } else {
+                walk(child, depth);
+            }
+        }
+    };
+    walk(root, 0);
+    return {url: location.href, title: document.title, nodes, truncated};
+}
+"""
+
+# Number of most recent samples kept per latency histogram
+METRICS_WINDOW = int(os.getenv("BROWSER_METRICS_WINDOW", "2048"))
+
+# Local store for session checkpoints used to resume sessions after a server restart
+SESSION_STATE_DIR = os.path.expanduser(os.getenv("BROWSER_STATE_DIR", "~/.agentcore-browser/sessions"))
+# Checkpoints hold cookies and tokens, so writing them to disk is opt-in
+PERSIST_SESSIONS = os.getenv("BROWSER_PERSIST_SESSIONS", "false").lower() == "true"
+RESTORE_ENDED_SESSIONS = os.getenv("BROWSER_RESTORE_ENDED_SESSIONS", "true").lower() == "true"
+CHECKPOINT_INTERVAL = int(os.getenv("BROWSER_CHECKPOINT_INTERVAL", "30"))
+# Seconds a checkpoint after a tab change waits for further changes to coalesce
+CHECKPOINT_DEBOUNCE = 1.0
+
+# Named storage-state profiles (cookies, localStorage) saved with save_storage_state
+STORAGE_PROFILES_DIR = os.path.expanduser(os.getenv("BROWSER_PROFILES_DIR", "~/.agentcore-browser/profiles"))
+
+# Replays saved localStorage for the current origin once per tab. The marker lives in
+# sessionStorage, which storage_state() doesn't save and a site clearing localStorage
+# (e.g. on logout) doesn't touch, so cleared tokens aren't injected again.
+STORAGE_RESTORE_JS = """
+(origins) => {
+    try {
+        const entry = origins.find((o) => o.origin === window.location.origin);
+        if (!entry || sessionStorage.getItem("__mcpStorageRestored")) return;
+        for (const item of entry.localStorage) {
+            // Profiles saved by earlier versions carry the old localStorage marker
+            if (item.name !== "__mcpStorageRestored") localStorage.setItem(item.name, item.value);
+        }
+        sessionStorage.setItem("__mcpStorageRestored", "1");
+    } catch (e) {}
+}
+"""
+
+# Screenshot encodings supported by CDP Page.captureScreenshot
+SCREENSHOT_FORMATS = {"png": "png", "jpeg": "jpeg", "jpg": "jpeg", "webp": "webp"}
+DEFAULT_SCREENSHOT_QUALITY = 80
+
+# Default time budget for a navigate call, shared by all of its wait phases
+DEFAULT_NAVIGATION_TIMEOUT_MS = 30000
+
+# parallel_fetch opens one temporary tab per in-flight URL
+DEFAULT_FETCH_CONCURRENCY = 4
+MAX_FETCH_CONCURRENCY = int(os.getenv("BROWSER_MAX_FETCH_CONCURRENCY", "16"))
+
+# Tab budget per session: least recently used inactive tabs are closed past the
+# cap, and inactive tabs whose JS heap outgrows the budget are reloaded fresh
+MAX_TABS_PER_SESSION = int(os.getenv("BROWSER_MAX_TABS", "10"))
+TAB_HEAP_BUDGET_MB = float(os.getenv("BROWSER_TAB_HEAP_BUDGET_MB", "512"))
+MEMORY_PROBE_INTERVAL = int(os.getenv("BROWSER_MEMORY_PROBE_INTERVAL", "60"))
+
+# "agentcore" uses remote AgentCore browsers; "local" launches headless Chromium on
+# this machine, which needs no AWS account (for CI and load testing)
+BROWSER_BACKEND = os.getenv("BROWSER_BACKEND", "agentcore")
+LOCAL_CHROMIUM_PATH = os.getenv("BROWSER_LOCAL_CHROMIUM")
+LOCAL_CHROMIUM_START_TIMEOUT = 30
+
+# Resolves once the DOM has seen no mutations for quietMs (true) or the budget runs out (false)
+DOM_QUIET_JS = """
+([quietMs, timeoutMs]) => new Promise((resolve) => {
+    let quietTimer;
+    const finish = (quiet) => {
+        observer.disconnect();
+        clearTimeout(quietTimer);
+        clearTimeout(budgetTimer);
+        resolve(quiet);
+    };
+    const observer = new MutationObserver(() => {
+        clearTimeout(quietTimer);
+        quietTimer = setTimeout(() => finish(true), quietMs);
+    });
+    observer.observe(document, {subtree: true, childList: true, attributes: true, characterData: true});
+    quietTimer = setTimeout(() => finish(true), quietMs);
+    const budgetTimer = setTimeout(() => finish(false), timeoutMs);
+})
+"""
+
+# Third-party analytics and ad hosts blocked by the 'analytics' and 'lean' profiles
+ANALYTICS_DOMAINS = {
+    "google-analytics.com", "googletagmanager.com", "doubleclick.net", "googlesyndication.com",
+    "googleadservices.com", "adservice.google.com", "connect.facebook.net", "hotjar.com",
+    "segment.io", "segment.com", "mixpanel.com", "amplitude.com", "nr-data.net", "fullstory.com",
+    "clarity.ms", "scorecardresearch.com", "quantserve.com", "taboola.com", "outbrain.com"
+}
+
+# Resource blocking profiles for create_browser_session
+RESOURCE_BLOCKING_PROFILES = {
+    "none": {"resource_types": set(), "analytics": False},
+    "media": {"resource_types": {"image", "media", "font"}, "analytics": False},
+    "analytics": {"resource_types": set(), "analytics": True},
+    "lean": {"resource_types": {"image", "media", "font"}, "analytics": True},
+}
+
+# Rough average transfer sizes used to estimate bytes saved by blocked requests
+ESTIMATED_RESOURCE_BYTES = {
+    "image": 40_000, "media": 500_000, "font": 30_000, "script": 25_000,
+    "stylesheet": 15_000, "xhr": 2_000, "fetch": 2_000
+}
+DEFAULT_ESTIMATED_RESOURCE_BYTES = 5_000
+
+
+@dataclass
+class LatencyHistogram:
+    """Latency samples over a sliding window, with lifetime count and sum"""
+    samples: deque = field(default_factory=lambda: deque(maxlen=METRICS_WINDOW))
+    count: int = 0
+    total: float = 0.0
+    errors: int = 0
+    
+    def record(self, seconds: float, error: bool = False):
+        """Add a sample"""
+        self.samples.append(seconds)
+        self.count += 1
+        self.total += seconds
+        if error:
+            self.errors += 1
+    
+    def percentiles(self) -> Dict[str, float]:
+        """p50/p95/p99 of the current window in seconds (nearest rank)"""
+        ordered = sorted(self.samples)
+        if not ordered:
+            return {"p50": 0.0, "p95": 0.0, "p99": 0.0}
+        
+        def pick(q: float) -> float:
+            return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+        
+        return {"p50": pick(0.50), "p95": pick(0.95), "p99": pick(0.99)}
+    
+    def summary(self) -> Dict[str, Any]:
+        """Summary in milliseconds for get_metrics"""
+        summary: Dict[str, Any] = {name: round(value * 1000, 1) for name, value in self.percentiles().items()}
+        summary["mean"] = round(self.total / self.count * 1000, 1) if self.count else 0.0
+        summary["count"] = self.count
+        summary["errors"] = self.errors
+        return summary
+
+
+def record_latency(kind: str, name: str, seconds: float, error: bool = False):
+    """Record a latency sample"""
+    histogram = metrics[kind].get(name)
+    if histogram is None:
+        histogram = metrics[kind][name] = LatencyHistogram()
+    histogram.record(seconds, error)
+
+
+@contextmanager
+def timed(phase: str):
+    """Time a block (including awaits inside it) as a named phase"""
+    start = time.perf_counter()
+    error = False
+    try:
+        yield
+    except BaseException:
+        error = True
+        raise
+    finally:
+        record_latency("phase", phase, time.perf_counter() - start, error)
+
+
+def format_prometheus_metrics() -> str:
+    """Render all histograms in the Prometheus text exposition format"""
+    lines = []
+    labels = {"tool": "tool", "session": "session_id", "phase": "phase"}
+    for kind, label in labels.items():
+        metric = f"agentcore_browser_{kind}_duration_seconds"
+        errors_metric = f"agentcore_browser_{kind}_errors_total"
+        series = [(name.replace("\\", "\\\\").replace('"', '\\"'), histogram)
+                  for name, histogram in sorted(metrics[kind].items())]
+        lines.append(f"# TYPE {metric} summary")
+        for escaped, histogram in series:
+            for quantile, value in zip(("0.5", "0.95", "0.99"), histogram.percentiles().values()):
+                lines.append(f'{metric}{{{label}="{escaped}",quantile="{quantile}"}} {value:.6f}')
+            lines.append(f'{metric}_sum{{{label}="{escaped}"}} {histogram.total:.6f}')
+            lines.append(f'{metric}_count{{{label}="{escaped}"}} {histogram.count}')
+        lines.append(f"# TYPE {errors_metric} counter")
+        for escaped, histogram in series:
+            lines.append(f'{errors_metric}{{{label}="{escaped}"}} {histogram.errors}')
+    return "\n".join(lines) + "\n"
+
+
+async def serve_prometheus_metrics(port: int):
+    """Serve format_prometheus_metrics over plain HTTP on localhost"""
+    async def handle_connection(reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            # Drain the request head; every path returns the metrics
+            while (await reader.readline()) not in (b"\r\n", b"\n", b""):
+                pass
+            body = format_prometheus_metrics().encode("utf-8")
+            writer.write(
+                b"HTTP/1.1 200 OK\r\nContent-Type: text/plain; version=0.0.4\r\n"
+                + f"Content-Length: {len(body)}\r\nConnection: close\r\n\r\n".encode("ascii")
+                + body
+            )
+            await writer.drain()
+        finally:
+            writer.close()
+    
+    server = await asyncio.start_server(handle_connection, "127.0.0.1", port)
+    logger.info(f"Serving Prometheus metrics on http://127.0.0.1:{port}/metrics")
+    return server
+
+
+@functools.lru_cache(maxsize=None)
+def playwright_chromium_path() -> str:
+    """Path of the Chromium build the installed Playwright drives, as Playwright resolves it"""
+    # Called from worker threads, where the sync API may start its own driver
+    from playwright.sync_api import sync_playwright
+    with sync_playwright() as playwright:
+        return playwright.chromium.executable_path
+
+
+def find_local_chromium() -> str:
+    """Locate a Chromium binary: BROWSER_LOCAL_CHROMIUM, then PATH, then Playwright's own Chromium"""
+    if LOCAL_CHROMIUM_PATH:
+        return LOCAL_CHROMIUM_PATH
+    for name in ("chromium", "chromium-browser", "google-chrome", "chrome"):
+        path = shutil.which(name)
+        if path:
+            return path
+    path = playwright_chromium_path()
+    if not os.path.exists(path):
+        raise RuntimeError("No Chromium found, set BROWSER_LOCAL_CHROMIUM or run 'playwright install chromium'")
+    return path
+
+
+class LocalBrowserClient:
+    """Drop-in replacement for BrowserClient backed by a headless Chromium on this machine.
+    
+    Exposes the same start/stop/generate_ws_headers interface, so sessions can be
+    created, driven and closed without AWS credentials.
+    """
+    
+    def __init__(self, region: str):
+        self.region = region
+        self.identifier: Optional[str] = None
+        self.session_id: Optional[str] = None
+        self.process: Optional[subprocess.Popen] = None
+        self.user_data_dir: Optional[str] = None
+        self.ws_url: Optional[str] = None
+    
+    def start(self, identifier: Optional[str] = None, session_timeout_seconds: Optional[int] = None) -> str:
+        """Launch Chromium with remote debugging on a free port and return a session id"""
+        self.identifier = identifier
+        self.user_data_dir = tempfile.mkdtemp(prefix="agentcore-browser-local-")
+        args = [
+            find_local_chromium(),
+            "--headless=new",
+            "--remote-debugging-port=0",
+            f"--user-data-dir={self.user_data_dir}",
+            "--no-first-run",
+            "--no-default-browser-check",
+            "about:blank",
+        ]
+        # Chromium refuses to sandbox as root, which is common in CI containers
+        if hasattr(os, "geteuid") and os.geteuid() == 0:
+            args.insert(1, "--no-sandbox")
+        self.process = subprocess.Popen(args, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        
+        # Chromium writes the chosen port and browser target path once it is listening
+        port_file = os.path.join(self.user_data_dir, "DevToolsActivePort")
+        deadline = time.monotonic() + LOCAL_CHROMIUM_START_TIMEOUT
+        while time.monotonic() < deadline:
+            if self.process.poll() is not None:
+                self.stop()
+                raise RuntimeError("Local Chromium exited during startup")
+            try:
+                with open(port_file) as f:
+                    lines = f.read().split()
+                if len(lines) >= 2:
+                    self.ws_url = f"ws://127.0.0.1:{lines[0]}{lines[1]}"
+                    break
+            except FileNotFoundError:
+                pass
+            time.sleep(0.05)
+        else:
+            self.stop()
+            raise RuntimeError("Timed out waiting for local Chromium to start")
+        
+        self.session_id = f"local-{uuid.uuid4().hex[:12]}"
+        return self.session_id
+    
+    def is_running(self) -> bool:
+        """Whether the Chromium process is still alive"""
+        return self.process is not None and self.process.poll() is None
+    
+    def stop(self):
+        """Terminate Chromium and remove its profile"""
+        if self.process is not None:
+            self.process.terminate()
+            try:
+                self.process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+                self.process.wait()
+            self.process = None
+        if self.user_data_dir:
+            shutil.rmtree(self.user_data_dir, ignore_errors=True)
+            self.user_data_dir = None
+    
+    def generate_ws_headers(self) -> Tuple[str, Dict[str, str]]:
+        """CDP WebSocket URL and headers (none needed locally)"""
+        if not self.ws_url:
+            raise RuntimeError("Local browser not started")
+        return self.ws_url, {}
+
+
+def create_browser_client(region: str) -> Union[BrowserClient, LocalBrowserClient]:
+    """Browser client for the configured BROWSER_BACKEND"""
+    if BROWSER_BACKEND == "local":
+        return LocalBrowserClient(region=region)
+    return BrowserClient(region=region)
+
 
 @dataclass
 class BrowserSession:
@@ -37,7 +528,7 @@ class BrowserSession:
     session_id: str
     description: str
     region: str
-    browser_client: BrowserClient
+    browser_client: Union[BrowserClient, LocalBrowserClient]
     browser: Optional[PlaywrightBrowser] = None
     context: Optional[BrowserContext] = None
     page: Optional[Page] = None
@@ -47,10 +538,41 @@ class BrowserSession:
     last_used: float = field(default_factory=time.time)
     timeout: int = 3600
     recording_enabled: bool = False
+    content_cache: Dict[str, Dict[ContentKey, str]] = field(default_factory=dict)
+    content_generation: Dict[str, int] = field(default_factory=dict)
+    watched_tabs: set = field(default_factory=set)
+    cache_hits: int = 0
+    cache_misses: int = 0
+    resource_profile: str = "none"
+    block_domains: List[str] = field(default_factory=list)
+    requests_blocked: int = 0
+    bytes_saved_estimate: int = 0
+    aws_session_id: Optional[str] = None
+    browser_identifier: str = "aws.browser.v1"
+    last_checkpoint: float = 0.0
+    checkpoint_task: Optional[asyncio.Task] = None
+    checkpoint_due: Optional[float] = None
+    snapshots: Dict[str, Dict[str, Any]] = field(default_factory=dict)
+    tab_last_used: Dict[str, float] = field(default_factory=dict)
+    tab_heap_mb: Dict[str, float] = field(default_factory=dict)
+    popup_count: int = 0
+    tab_count: int = 1
+    temporary_tabs: int = 0
+    # Held by tool calls and background tab recycling so they never work on the same tab at once
+    lock: asyncio.Lock = field(default_factory=asyncio.Lock)
+    tabs_evicted: int = 0
+    tabs_recycled: int = 0
     
     def update_last_used(self):
         """Update last used timestamp"""
         self.last_used = time.time()
+        self.tab_last_used[self.active_tab_id] = self.last_used
+    
+    def invalidate_content(self, tab_id: Optional[str] = None):
+        """Drop cached page content for a tab (default: active tab)"""
+        tab_id = tab_id or self.active_tab_id
+        self.content_cache.pop(tab_id, None)
+        self.content_generation[tab_id] = self.content_generation.get(tab_id, 0) + 1
     
     def is_expired(self) -> bool:
         """Check if session has expired"""
@@ -65,6 +587,509 @@ async def init_playwright():
     return playwright_instance
 
 
+async def register_tab(session: BrowserSession, tab_id: str, page: Page):
+    """Add a page to a session and wire up content cache invalidation and popup tracking"""
+    session.tabs[tab_id] = page
+    session.tab_last_used[tab_id] = time.time()
+    
+    def on_frame_navigated(frame):
+        if frame == page.main_frame:
+            session.invalidate_content(tab_id)
+    
+    def on_close(_):
+        session.invalidate_content(tab_id)
+        # Pages can close themselves (window.close()), drop them unless already replaced
+        if session.tabs.get(tab_id) is page:
+            forget_tab(session, tab_id)
+    
+    page.on("framenavigated", on_frame_navigated)
+    page.on("close", on_close)
+    page.on("popup", lambda popup: asyncio.create_task(track_popup(session, popup)))
+    
+    # Cache only tabs whose DOM mutations we are told about
+    try:
+        await page.expose_function("__mcpDomChanged", lambda: session.invalidate_content(tab_id))
+        await page.add_init_script(DOM_CHANGE_OBSERVER_JS)
+        await page.evaluate(DOM_CHANGE_OBSERVER_JS)
+        session.watched_tabs.add(tab_id)
+    except Exception as e:
+        logger.warning(f"DOM change tracking unavailable for tab {tab_id}, content caching disabled: {e}")
+
+
+def forget_tab(session: BrowserSession, tab_id: str):
+    """Remove all per-tab state of a closed tab"""
+    session.tabs.pop(tab_id, None)
+    session.invalidate_content(tab_id)
+    session.watched_tabs.discard(tab_id)
+    session.snapshots.pop(tab_id, None)
+    session.tab_last_used.pop(tab_id, None)
+    session.tab_heap_mb.pop(tab_id, None)
+    
+    # Switch to another tab if current was closed
+    if session.active_tab_id == tab_id and session.tabs:
+        session.active_tab_id = max(session.tabs, key=lambda t: session.tab_last_used.get(t, 0))
+
+
+async def close_tab(session: BrowserSession, tab_id: str):
+    """Close a tab and forget it"""
+    page = session.tabs[tab_id]
+    forget_tab(session, tab_id)
+    await page.close()
+
+
+def next_tab_id(session: BrowserSession) -> str:
+    """Default id for a new tab, never reusing the number of an earlier one"""
+    while True:
+        session.tab_count += 1
+        tab_id = f"tab_{session.tab_count}"
+        if tab_id not in session.tabs:
+            return tab_id
+
+
+async def enforce_tab_limit(session: BrowserSession):
+    """Close least recently used inactive tabs until the session, including temporary
+    parallel_fetch tabs, is within MAX_TABS_PER_SESSION"""
+    while len(session.tabs) + session.temporary_tabs > MAX_TABS_PER_SESSION:
+        candidates = [tab_id for tab_id in session.tabs if tab_id != session.active_tab_id]
+        if not candidates:
+            return
+        victim = min(candidates, key=lambda t: session.tab_last_used.get(t, 0))
+        logger.info(f"Evicting least recently used tab {victim} from session {session.session_id}")
+        try:
+            await close_tab(session, victim)
+        except Exception as e:
+            logger.warning(f"Error closing evicted tab {victim}: {e}")
+        session.tabs_evicted += 1
+
+
+async def track_popup(session: BrowserSession, page: Page):
+    """Register a page opened by one of the session's tabs (window.open, target=_blank)"""
+    if page in session.tabs.values() or session.session_id not in sessions:
+        return
+    session.popup_count += 1
+    tab_id = f"popup_{session.popup_count}"
+    try:
+        await register_tab(session, tab_id, page)
+        logger.info(f"Tracking popup {tab_id} in session {session.session_id}: {page.url}")
+        await enforce_tab_limit(session)
+    except Exception as e:
+        logger.warning(f"Could not track popup in session {session.session_id}: {e}")
+
+
+async def probe_tab_heap(page: Page) -> float:
+    """Used JS heap of a page in MB, read over CDP"""
+    cdp = await page.context.new_cdp_session(page)
+    try:
+        usage = await cdp.send("Runtime.getHeapUsage")
+    finally:
+        await cdp.detach()
+    return usage["usedSize"] / (1024 * 1024)
+
+
+async def recycle_tab(session: BrowserSession, tab_id: str):
+    """Replace a tab with a fresh page at the same URL, releasing its renderer memory"""
+    old_page = session.tabs[tab_id]
+    url = old_page.url
+    new_page = await session.context.new_page()
+    await register_tab(session, tab_id, new_page)
+    session.snapshots.pop(tab_id, None)
+    await old_page.close()
+    if url and url != "about:blank":
+        await new_page.goto(url, wait_until="domcontentloaded")
+    session.tabs_recycled += 1
+
+
+async def probe_session_memory(session: BrowserSession):
+    """Record JS heap usage of each tab and recycle inactive tabs over TAB_HEAP_BUDGET_MB"""
+    for tab_id, page in list(session.tabs.items()):
+        try:
+            with timed("memory_probe"):
+                heap_mb = await probe_tab_heap(page)
+        except Exception as e:
+            logger.debug(f"Heap probe failed for tab {tab_id}: {e}")
+            continue
+        session.tab_heap_mb[tab_id] = round(heap_mb, 1)
+        
+        # Reloading the active tab would lose state the agent is working with, and a
+        # running tool call may be using any tab, so retry on a later probe
+        if heap_mb <= TAB_HEAP_BUDGET_MB or session.lock.locked():
+            continue
+        async with session.lock:
+            if session.tabs.get(tab_id) is not page or tab_id == session.active_tab_id:
+                continue
+            logger.info(f"Recycling tab {tab_id} in session {session.session_id}: {heap_mb:.0f} MB JS heap")
+            try:
+                await recycle_tab(session, tab_id)
+            except Exception as e:
+                logger.warning(f"Error recycling tab {tab_id}: {e}")
+
+
+async def memory_probe_loop():
+    """Periodically probe tab memory across all sessions"""
+    while True:
+        await asyncio.sleep(MEMORY_PROBE_INTERVAL)
+        for session in list(sessions.values()):
+            await probe_session_memory(session)
+
+
+def is_blocked_domain(url: str, domains: set) -> bool:
+    """Check whether a URL's host is one of, or a subdomain of, the given domains"""
+    host = (urlparse(url).hostname or "").lower()
+    return any(host == domain or host.endswith("." + domain) for domain in domains)
+
+
+async def apply_resource_blocking(session: BrowserSession, profile: str, extra_domains: List[str]):
+    """Route the session's context through a resource blocking profile"""
+    resource_types = RESOURCE_BLOCKING_PROFILES[profile]["resource_types"]
+    blocked_domains = {domain.lower() for domain in extra_domains}
+    if RESOURCE_BLOCKING_PROFILES[profile]["analytics"]:
+        blocked_domains |= ANALYTICS_DOMAINS
+    
+    session.resource_profile = profile
+    session.block_domains = list(extra_domains)
+    if not resource_types and not blocked_domains:
+        return
+    
+    async def handle_route(route):
+        request = route.request
+        if request.resource_type in resource_types or is_blocked_domain(request.url, blocked_domains):
+            session.requests_blocked += 1
+            session.bytes_saved_estimate += ESTIMATED_RESOURCE_BYTES.get(
+                request.resource_type, DEFAULT_ESTIMATED_RESOURCE_BYTES
+            )
+            await route.abort("blockedbyclient")
+        else:
+            await route.continue_()
+    
+    await session.context.route("**/*", handle_route)
+
+
+def write_file_atomic(path: str, data: bytes, mode: Optional[int] = None):
+    """Write a file through a uniquely named temp file so concurrent writers never interleave"""
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    temp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+    with open(temp_path, "wb") as f:
+        f.write(data)
+    if mode is not None:
+        os.chmod(temp_path, mode)
+    os.replace(temp_path, path)
+
+
+async def connect_browser(session: BrowserSession):
+    """Connect Playwright to the session's remote browser over CDP"""
+    playwright = await init_playwright()
+    
+    # Get CDP connection details
+    cdp_url, cdp_headers = session.browser_client.generate_ws_headers()
+    
+    # Connect to browser via CDP
+    with timed("cdp_connect"):
+        browser = await playwright.chromium.connect_over_cdp(
+            endpoint_url=cdp_url,
+            headers=cdp_headers
+        )
+    
+    # Use the default context
+    if not browser.contexts:
+        raise RuntimeError("No browser contexts available")
+    
+    session.browser = browser
+    session.context = browser.contexts[0]
+
+
+async def apply_storage_state(context: BrowserContext, state: Dict[str, Any]):
+    """Load cookies and localStorage from a Playwright storage state into an existing context"""
+    if state.get("cookies"):
+        await context.add_cookies(state["cookies"])
+    if state.get("origins"):
+        await context.add_init_script(f"({STORAGE_RESTORE_JS})({json.dumps(state['origins'])})")
+
+
+def safe_filename(name: str) -> str:
+    """Make an identifier safe to use as a file name"""
+    return re.sub(r"[^A-Za-z0-9_.-]", "_", name)
+
+
+def checkpoint_path(session_id: str) -> str:
+    """Path of the checkpoint file for a session"""
+    return os.path.join(SESSION_STATE_DIR, safe_filename(session_id) + ".json")
+
+
+def storage_profile_path(profile: str) -> str:
+    """Path of a named storage-state profile"""
+    return os.path.join(STORAGE_PROFILES_DIR, safe_filename(profile) + ".json")
+
+
+def load_storage_profile(profile: str) -> Dict[str, Any]:
+    """Load a storage-state profile, reusing the in-memory copy while the file is unchanged"""
+    path = storage_profile_path(profile)
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"Storage profile '{profile}' not found")
+    
+    mtime = os.path.getmtime(path)
+    cached = storage_profiles.get(profile)
+    if cached and cached[0] == mtime:
+        return cached[1]
+    
+    with open(path, "r", encoding="utf-8") as f:
+        state = json.load(f)
+    storage_profiles[profile] = (mtime, state)
+    return state
+
+
+async def checkpoint_session(session: BrowserSession):
+    """Save session metadata and storage state so a restarted server can resume it"""
+    if not PERSIST_SESSIONS or session.session_id not in sessions:
+        return
+    session.last_checkpoint = time.time()
+    
+    try:
+        storage_state = await session.context.storage_state() if session.context else None
+    except Exception as e:
+        logger.warning(f"Could not capture storage state for session {session.session_id}: {e}")
+        storage_state = None
+    
+    checkpoint = {
+        "session_id": session.session_id,
+        "description": session.description,
+        "region": session.region,
+        "aws_session_id": session.aws_session_id,
+        "browser_identifier": session.browser_identifier,
+        "timeout": session.timeout,
+        "recording_enabled": session.recording_enabled,
+        "resource_profile": session.resource_profile,
+        "block_domains": session.block_domains,
+        "created_at": session.created_at,
+        "last_used": session.last_used,
+        "active_tab_id": session.active_tab_id,
+        "tabs": {tab_id: page.url for tab_id, page in session.tabs.items()},
+        "storage_state": storage_state
+    }
+    
+    try:
+        # Cookies are credentials, keep the file private
+        await asyncio.to_thread(
+            write_file_atomic, checkpoint_path(session.session_id), json.dumps(checkpoint).encode("utf-8"), 0o600
+        )
+    except Exception as e:
+        logger.warning(f"Could not checkpoint session {session.session_id}: {e}")
+
+
+def schedule_checkpoint(session: BrowserSession, urgent: bool = False):
+    """Checkpoint a session in the background, at most once per CHECKPOINT_INTERVAL.
+    
+    Requests made while a checkpoint is waiting to run are coalesced into it. Urgent
+    requests (tab changes) only wait CHECKPOINT_DEBOUNCE seconds.
+    """
+    if not PERSIST_SESSIONS:
+        return
+    
+    now = time.time()
+    if urgent:
+        due = now + CHECKPOINT_DEBOUNCE
+    else:
+        due = max(now + CHECKPOINT_DEBOUNCE, session.last_checkpoint + CHECKPOINT_INTERVAL)
+    if session.checkpoint_due is not None:
+        if session.checkpoint_due <= due:
+            return
+        session.checkpoint_task.cancel()
+    
+    async def run():
+        await asyncio.sleep(due - time.time())
+        # Changes from here on need another checkpoint
+        session.checkpoint_due = None
+        await checkpoint_session(session)
+    
+    session.checkpoint_due = due
+    session.checkpoint_task = asyncio.create_task(run())
+
+
+async def cancel_checkpoint(session: BrowserSession):
+    """Drop a waiting background checkpoint and let one that is already writing finish"""
+    task = session.checkpoint_task
+    if task is None or task.done():
+        return
+    if session.checkpoint_due is not None:
+        task.cancel()
+        session.checkpoint_due = None
+    await asyncio.gather(task, return_exceptions=True)
+
+
+def remove_checkpoint(session_id: str):
+    """Delete a session's checkpoint file"""
+    try:
+        os.remove(checkpoint_path(session_id))
+    except FileNotFoundError:
+        pass
+    except Exception as e:
+        logger.warning(f"Could not remove checkpoint for session {session_id}: {e}")
+
+
+def is_remote_session_live(browser_client: Union[BrowserClient, LocalBrowserClient]) -> bool:
+    """Ask the AgentCore control plane whether a remote browser session is still running"""
+    if isinstance(browser_client, LocalBrowserClient):
+        # A local browser does not outlive the server process that launched it
+        return browser_client.is_running()
+    try:
+        # Older bedrock-agentcore releases expose the data plane client as `client`
+        client = getattr(browser_client, "data_plane_client", None) or browser_client.client
+        response = client.get_browser_session(
+            browserIdentifier=browser_client.identifier,
+            sessionId=browser_client.session_id
+        )
+        return response.get("status") == "READY"
+    except Exception as e:
+        logger.info(f"Remote session {browser_client.session_id} unavailable: {e}")
+        return False
+
+
+async def resume_session(checkpoint: Dict[str, Any]) -> str:
+    """Reattach to a checkpointed remote session, or restore its storage state into a new one.
+    
+    Returns 'reattached' or 'restored'.
+    """
+    browser_client = create_browser_client(checkpoint["region"])
+    browser_client.identifier = checkpoint["browser_identifier"]
+    browser_client.session_id = checkpoint["aws_session_id"]
+    
+    session = BrowserSession(
+        session_id=checkpoint["session_id"],
+        description=checkpoint["description"],
+        region=checkpoint["region"],
+        browser_client=browser_client,
+        timeout=checkpoint["timeout"],
+        recording_enabled=checkpoint["recording_enabled"],
+        created_at=checkpoint["created_at"],
+        aws_session_id=checkpoint["aws_session_id"],
+        browser_identifier=checkpoint["browser_identifier"]
+    )
+    
+    mode = "restored"
+    if await asyncio.to_thread(is_remote_session_live, browser_client):
+        try:
+            await connect_browser(session)
+            mode = "reattached"
+        except Exception as e:
+            logger.warning(f"Could not reattach to remote session {session.aws_session_id}, stopping it: {e}")
+            # Its id is about to be replaced, nothing would stop it later
+            try:
+                await asyncio.to_thread(browser_client.stop)
+            except Exception as stop_error:
+                logger.warning(f"Could not stop remote session {session.aws_session_id}: {stop_error}")
+    
+    if mode == "restored" and not RESTORE_ENDED_SESSIONS:
+        raise RuntimeError("remote session has ended")
+    
+    # From here on the remote session is running, stop it if the restore fails
+    try:
+        await restore_session(session, checkpoint, mode)
+    except BaseException:
+        if session.browser:
+            try:
+                await session.browser.close()
+            except Exception as e:
+                logger.warning(f"Error closing browser of session {session.session_id}: {e}")
+        if browser_client.session_id:
+            try:
+                with timed("control_plane_stop"):
+                    await asyncio.to_thread(browser_client.stop)
+            except Exception as e:
+                logger.warning(f"Could not stop remote session {browser_client.session_id}: {e}")
+        raise
+    
+    sessions[session.session_id] = session
+    await checkpoint_session(session)
+    return mode
+
+
+async def restore_session(session: BrowserSession, checkpoint: Dict[str, Any], mode: str):
+    """Start a new remote session if needed and rebuild the checkpointed tabs in it"""
+    browser_client = session.browser_client
+    if mode == "restored":
+        # Only a successfully started session is left for the caller to stop
+        browser_client.session_id = None
+        with timed("control_plane_start"):
+            session.aws_session_id = await asyncio.to_thread(
+                browser_client.start,
+                identifier=session.browser_identifier,
+                session_timeout_seconds=session.timeout
+            )
+        await connect_browser(session)
+        if checkpoint.get("storage_state"):
+            await apply_storage_state(session.context, checkpoint["storage_state"])
+    
+    await apply_resource_blocking(
+        session, checkpoint.get("resource_profile", "none"), checkpoint.get("block_domains", [])
+    )
+    
+    # Reuse surviving pages by URL, reopen the rest
+    unclaimed = list(session.context.pages) if mode == "reattached" else []
+    for tab_id, url in checkpoint["tabs"].items():
+        page = next((p for p in unclaimed if p.url == url), None)
+        if page:
+            unclaimed.remove(page)
+        else:
+            page = await session.context.new_page()
+            if url and url != "about:blank":
+                try:
+                    await page.goto(url, wait_until="domcontentloaded")
+                except Exception as e:
+                    logger.warning(f"Could not reopen {url} in tab {tab_id}: {e}")
+        await register_tab(session, tab_id, page)
+    
+    if not session.tabs:
+        await register_tab(session, "main", await session.context.new_page())
+    if checkpoint["active_tab_id"] in session.tabs:
+        session.active_tab_id = checkpoint["active_tab_id"]
+    else:
+        session.active_tab_id = next(iter(session.tabs))
+    session.page = session.tabs.get("main", session.tabs[session.active_tab_id])
+    
+    # A session created under the same id while this one was resuming wins
+    if session.session_id in sessions:
+        raise RuntimeError("a session with this id was created meanwhile")
+
+
+def load_checkpoints() -> List[Dict[str, Any]]:
+    """Read every readable checkpoint file in SESSION_STATE_DIR"""
+    checkpoints = []
+    for filename in sorted(os.listdir(SESSION_STATE_DIR)):
+        if not filename.endswith(".json"):
+            continue
+        try:
+            with open(os.path.join(SESSION_STATE_DIR, filename), "r", encoding="utf-8") as f:
+                checkpoints.append(json.load(f))
+        except Exception as e:
+            logger.warning(f"Skipping unreadable checkpoint {filename}: {e}")
+    return checkpoints
+
+
+async def resume_sessions():
+    """Resume every checkpointed session that has not timed out"""
+    if not PERSIST_SESSIONS or not os.path.isdir(SESSION_STATE_DIR):
+        return
+    
+    checkpoints = []
+    for checkpoint in await asyncio.to_thread(load_checkpoints):
+        if checkpoint["session_id"] in sessions:
+            continue  # Created again since the restart, its own checkpoint is current
+        if time.time() - checkpoint["last_used"] > checkpoint["timeout"]:
+            remove_checkpoint(checkpoint["session_id"])
+            continue
+        checkpoints.append(checkpoint)
+    
+    outcomes = await asyncio.gather(*(resume_session(c) for c in checkpoints), return_exceptions=True)
+    for checkpoint, outcome in zip(checkpoints, outcomes):
+        if isinstance(outcome, Exception):
+            logger.warning(f"Could not resume session {checkpoint['session_id']}: {outcome}")
+            if checkpoint["session_id"] not in sessions:
+                remove_checkpoint(checkpoint["session_id"])
+        else:
+            logger.info(f"Resumed session {checkpoint['session_id']} ({outcome})")
+
+
 async def cleanup_expired_sessions():
     """Clean up expired sessions"""
     expired = [sid for sid, session in sessions.items() if session.is_expired()]
@@ -93,294 +1118,751 @@ async def close_session_internal(session_id: str):
     # Stop browser client
     if session.browser_client:
         try:
-            session.browser_client.stop()
+            with timed("control_plane_stop"):
+                await asyncio.to_thread(session.browser_client.stop)
         except Exception as e:
             logger.error(f"Error stopping browser client: {e}")
     
-    # Remove from sessions
+    # Remove from sessions, after any checkpoint write so none lands after the removal
+    await cancel_checkpoint(session)
     del sessions[session_id]
+    metrics["session"].pop(session_id, None)
+    remove_checkpoint(session_id)
 
 
-@app.list_tools()
-async def list_tools() -> List[Tool]:
-    """List available browser automation tools"""
-    return [
-        Tool(
-            name="create_browser_session",
-            description="Create a new browser session with persistent state",
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "session_id": {
-                        "type": "string",
-                        "description": "Unique identifier for this session (e.g., 'order-processing-001')"
-                    },
-                    "description": {
-                        "type": "string",
-                        "description": "Description of what this session will be used for"
-                    },
-                    "region": {
-                        "type": "string",
-                        "description": "AWS region (default: us-east-1)",
-                        "default": "us-east-1"
-                    },
-                    "session_timeout": {
-                        "type": "integer",
-                        "description": "Session timeout in seconds (default: 3600, max: 28800)",
-                        "default": 3600
-                    },
-                    "enable_recording": {
-                        "type": "boolean",
-                        "description": "Enable session recording to S3 (default: false)",
-                        "default": False
-                    }
+def with_session(touch: bool = True):
+    """Resolve args["session_id"] and the active tab before calling a tool handler.
+    
+    The wrapped handler is called as handler(args, session, page) while holding the
+    session lock. Unknown sessions return the standard not-found error without
+    reaching the handler.
+    """
+    def decorator(handler):
+        @functools.wraps(handler)
+        async def wrapper(args: Dict[str, Any]):
+            session_id = args["session_id"]
+            session = sessions.get(session_id)
+            if session is None:
+                return [TextContent(type="text", text=f"Error: Session '{session_id}' not found")]
+            
+            async with session.lock:
+                if touch:
+                    session.update_last_used()
+                page = session.tabs.get(session.active_tab_id, session.page)
+                return await handler(args, session, page)
+        return wrapper
+    return decorator
+
+
+# Tool definitions are static, build them once rather than on every list_tools call
+TOOLS: List[Tool] = [
+    Tool(
+        name="create_browser_session",
+        description="Create a new browser session with persistent state",
+        inputSchema={
+            "type": "object",
+            "properties": {
+                "session_id": {
+                    "type": "string",
+                    "description": "Unique identifier for this session (e.g., 'order-processing-001')"
                 },
-                "required": ["session_id", "description"]
-            }
-        ),
-        Tool(
-            name="navigate",
-            description="Navigate to a URL in the browser session",
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "session_id": {
-                        "type": "string",
-                        "description": "Session ID from create_browser_session"
-                    },
-                    "url": {
-                        "type": "string",
-                        "description": "URL to navigate to"
-                    },
-                    "wait_for": {
-                        "type": "string",
-                        "description": "Wait condition: 'load', 'domcontentloaded', 'networkidle' (default: 'networkidle')",
-                        "default": "networkidle"
-                    }
+                "description": {
+                    "type": "string",
+                    "description": "Description of what this session will be used for"
                 },
-                "required": ["session_id", "url"]
-            }
-        ),
-        Tool(
-            name="interact",
-            description="Interact with page elements (click, type, press keys, scroll)",
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "session_id": {
-                        "type": "string",
-                        "description": "Session ID"
-                    },
-                    "action": {
-                        "type": "string",
-                        "enum": ["click", "type", "press_key", "scroll"],
-                        "description": "Action to perform"
-                    },
-                    "selector": {
-                        "type": "string",
-                        "description": "CSS selector for target element (not needed for scroll)"
-                    },
-                    "text": {
-                        "type": "string",
-                        "description": "Text to type (for 'type' action)"
-                    },
-                    "key": {
-                        "type": "string",
-                        "description": "Key to press (for 'press_key' action, e.g., 'Enter', 'Tab')"
-                    },
-                    "scroll_amount": {
-                        "type": "integer",
-                        "description": "Pixels to scroll (for 'scroll' action, negative for up)"
-                    }
+                "region": {
+                    "type": "string",
+                    "description": "AWS region (default: us-east-1)",
+                    "default": "us-east-1"
                 },
-                "required": ["session_id", "action"]
-            }
-        ),
-        Tool(
-            name="extract_content",
-            description="Extract content from the page (text, HTML, attributes)",
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "session_id": {
-                        "type": "string",
-                        "description": "Session ID"
-                    },
-                    "content_type": {
-                        "type": "string",
-                        "enum": ["text", "html", "attribute"],
-                        "description": "Type of content to extract"
-                    },
-                    "selector": {
-                        "type": "string",
-                        "description": "CSS selector (optional, extracts from whole page if not provided)"
-                    },
-                    "attribute": {
-                        "type": "string",
-                        "description": "Attribute name (for 'attribute' content_type)"
-                    }
+                "session_timeout": {
+                    "type": "integer",
+                    "description": "Session timeout in seconds (default: 3600, max: 28800)",
+                    "default": 3600
                 },
-                "required": ["session_id", "content_type"]
-            }
-        ),
-        Tool(
-            name="execute_script",
-            description="Execute JavaScript code in the browser context",
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "session_id": {
-                        "type": "string",
-                        "description": "Session ID"
-                    },
-                    "script": {
-                        "type": "string",
-                        "description": "JavaScript code to execute"
-                    }
+                "enable_recording": {
+                    "type": "boolean",
+                    "description": "Enable session recording to S3 (default: false)",
+                    "default": False
                 },
-                "required": ["session_id", "script"]
-            }
-        ),
-        Tool(
-            name="screenshot",
-            description="Take a screenshot of the page or element",
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "session_id": {
-                        "type": "string",
-                        "description": "Session ID"
-                    },
-                    "path": {
-                        "type": "string",
-                        "description": "File path to save screenshot (optional)"
-                    },
-                    "selector": {
-                        "type": "string",
-                        "description": "CSS selector for specific element (optional, full page if not provided)"
-                    },
-                    "full_page": {
-                        "type": "boolean",
-                        "description": "Capture full scrollable page (default: false)",
-                        "default": False
-                    }
+                "resource_profile": {
+                    "type": "string",
+                    "enum": list(RESOURCE_BLOCKING_PROFILES),
+                    "description": "Resource blocking profile: 'none', 'media' (images, media, fonts), 'analytics' (tracker domains), 'lean' (both) (default: 'none')",
+                    "default": "none"
                 },
-                "required": ["session_id"]
-            }
-        ),
-        Tool(
-            name="manage_tabs",
-            description="Manage browser tabs (new, switch, close, list)",
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "session_id": {
-                        "type": "string",
-                        "description": "Session ID"
-                    },
-                    "action": {
-                        "type": "string",
-                        "enum": ["new_tab", "switch_tab", "close_tab", "list_tabs"],
-                        "description": "Tab management action"
+                "block_domains": {
+                    "type": "array",
+                    "items": {"type": "string"},
+                    "description": "Additional domains to block, including their subdomains (optional)"
+                },
+                "storage_profile": {
+                    "type": "string",
+                    "description": "Name of a storage-state profile from save_storage_state to preload cookies and localStorage (optional)"
+                }
+            },
+            "required": ["session_id", "description"]
+        }
+    ),
+    Tool(
+        name="navigate",
+        description="Navigate to a URL in the browser session",
+        inputSchema={
+            "type": "object",
+            "properties": {
+                "session_id": {
+                    "type": "string",
+                    "description": "Session ID from create_browser_session"
+                },
+                "url": {
+                    "type": "string",
+                    "description": "URL to navigate to"
+                },
+                "wait_for": {
+                    "type": "string",
+                    "description": "Load state: 'commit', 'load', 'domcontentloaded', 'networkidle' (default: 'networkidle', or 'domcontentloaded' when another wait condition is given)"
+                },
+                "wait_for_selector": {
+                    "type": "string",
+                    "description": "CSS selector that must become visible (optional)"
+                },
+                "wait_for_url": {
+                    "type": "string",
+                    "description": "Glob pattern the final URL must match, e.g. '**/dashboard*' (optional)"
+                },
+                "wait_for_function": {
+                    "type": "string",
+                    "description": "JavaScript expression that must become truthy (optional)"
+                },
+                "dom_quiet_ms": {
+                    "type": "integer",
+                    "description": "Wait until the DOM has had no mutations for this many milliseconds (optional)"
+                },
+                "timeout_ms": {
+                    "type": "integer",
+                    "description": f"Total time budget for the navigation and all waits (default: {DEFAULT_NAVIGATION_TIMEOUT_MS})",
+                    "default": DEFAULT_NAVIGATION_TIMEOUT_MS
+                }
+            },
+            "required": ["session_id", "url"]
+        }
+    ),
+    Tool(
+        name="interact",
+        description="Interact with page elements (click, type, press keys, scroll)",
+        inputSchema={
+            "type": "object",
+            "properties": {
+                "session_id": {
+                    "type": "string",
+                    "description": "Session ID"
+                },
+                "action": {
+                    "type": "string",
+                    "enum": ["click", "type", "press_key", "scroll"],
+                    "description": "Action to perform"
+                },
+                "selector": {
+                    "type": "string",
+                    "description": "CSS selector for target element (not needed for scroll)"
+                },
+                "ref": {
+                    "type": "string",
+                    "description": "Element ref from snapshot (e.g., 'e12'), used instead of selector"
+                },
+                "text": {
+                    "type": "string",
+                    "description": "Text to type (for 'type' action)"
+                },
+                "key": {
+                    "type": "string",
+                    "description": "Key to press (for 'press_key' action, e.g., 'Enter', 'Tab')"
+                },
+                "scroll_amount": {
+                    "type": "integer",
+                    "description": "Pixels to scroll (for 'scroll' action, negative for up)"
+                },
+                "expect_navigation": {
+                    "type": "boolean",
+                    "description": "Wait until the action navigates the page and its DOM is loaded (optional)"
+                },
+                "expect_response": {
+                    "type": "string",
+                    "description": "Wait for a network response whose URL matches this glob (e.g., '**/api/cart*') or contains this text (optional)"
+                },
+                "expect_selector": {
+                    "type": "string",
+                    "description": "Wait for this CSS selector to reach expect_selector_state after the action (optional)"
+                },
+                "expect_selector_state": {
+                    "type": "string",
+                    "enum": ["attached", "detached", "visible", "hidden"],
+                    "description": "State to wait for with expect_selector (default: visible)",
+                    "default": "visible"
+                },
+                "timeout_ms": {
+                    "type": "integer",
+                    "description": f"Time budget for the action and its expectations in milliseconds (default: {DEFAULT_NAVIGATION_TIMEOUT_MS})"
+                }
+            },
+            "required": ["session_id", "action"]
+        }
+    ),
+    Tool(
+        name="extract_content",
+        description="Extract content from the page (text, HTML, markdown, table rows, attributes) in size-bounded chunks",
+        inputSchema={
+            "type": "object",
+            "properties": {
+                "session_id": {
+                    "type": "string",
+                    "description": "Session ID"
+                },
+                "content_type": {
+                    "type": "string",
+                    "enum": ["text", "html", "markdown", "table", "attribute"],
+                    "description": "Type of content to extract ('markdown' is a compact readable rendering, 'table' returns rows as JSON)"
+                },
+                "selector": {
+                    "type": "string",
+                    "description": "CSS selector (optional, extracts from whole page if not provided; defaults to 'table' for table extraction)"
+                },
+                "attribute": {
+                    "type": "string",
+                    "description": "Attribute name (for 'attribute' content_type)"
+                },
+                "cursor": {
+                    "type": "integer",
+                    "description": "Character offset to continue from (use next_cursor from a previous call, default: 0)",
+                    "minimum": 0,
+                    "default": 0
+                },
+                "max_bytes": {
+                    "type": "integer",
+                    "description": f"Maximum UTF-8 bytes returned per call (default: {DEFAULT_EXTRACT_MAX_BYTES})",
+                    "minimum": 1,
+                    "default": DEFAULT_EXTRACT_MAX_BYTES
+                }
+            },
+            "required": ["session_id", "content_type"]
+        }
+    ),
+    Tool(
+        name="execute_script",
+        description="Execute JavaScript code in the browser context",
+        inputSchema={
+            "type": "object",
+            "properties": {
+                "session_id": {
+                    "type": "string",
+                    "description": "Session ID"
+                },
+                "script": {
+                    "type": "string",
+                    "description": "JavaScript code to execute"
+                }
+            },
+            "required": ["session_id", "script"]
+        }
+    ),
+    Tool(
+        name="screenshot",
+        description="Take a screenshot of the page or element",
+        inputSchema={
+            "type": "object",
+            "properties": {
+                "session_id": {
+                    "type": "string",
+                    "description": "Session ID"
+                },
+                "path": {
+                    "type": "string",
+                    "description": "File path to save screenshot (optional)"
+                },
+                "selector": {
+                    "type": "string",
+                    "description": "CSS selector for specific element (optional, full page if not provided)"
+                },
+                "full_page": {
+                    "type": "boolean",
+                    "description": "Capture full scrollable page (default: false)",
+                    "default": False
+                },
+                "format": {
+                    "type": "string",
+                    "enum": ["png", "jpeg", "webp"],
+                    "description": "Image format (default: from path extension, otherwise 'png')"
+                },
+                "quality": {
+                    "type": "integer",
+                    "description": f"JPEG/WebP quality 0-100 (default: {DEFAULT_SCREENSHOT_QUALITY})"
+                },
+                "max_dimension": {
+                    "type": "integer",
+                    "description": "Downscale so the longest side is at most this many pixels (optional)"
+                },
+                "clip": {
+                    "type": "object",
+                    "description": "Region in page CSS pixels (optional)",
+                    "properties": {
+                        "x": {"type": "number"},
+                        "y": {"type": "number"},
+                        "width": {"type": "number"},
+                        "height": {"type": "number"}
                     },
-                    "tab_id": {
-                        "type": "string",
-                        "description": "Tab ID (for switch_tab, close_tab, or custom ID for new_tab)"
-                    }
+                    "required": ["x", "y", "width", "height"]
                 },
-                "required": ["session_id", "action"]
-            }
-        ),
-        Tool(
-            name="list_sessions",
-            description="List all active browser sessions",
-            inputSchema={
-                "type": "object",
-                "properties": {}
-            }
-        ),
-        Tool(
-            name="get_session_info",
-            description="Get detailed information about a session",
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "session_id": {
-                        "type": "string",
-                        "description": "Session ID"
-                    }
+                "inline": {
+                    "type": "boolean",
+                    "description": "Return the image inline instead of writing a file (default: false; a file is still written if path is given)",
+                    "default": False
+                }
+            },
+            "required": ["session_id"]
+        }
+    ),
+    Tool(
+        name="manage_tabs",
+        description="Manage browser tabs (new, switch, close, list)",
+        inputSchema={
+            "type": "object",
+            "properties": {
+                "session_id": {
+                    "type": "string",
+                    "description": "Session ID"
                 },
-                "required": ["session_id"]
-            }
-        ),
-        Tool(
-            name="close_session",
-            description="Close a browser session and clean up resources",
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "session_id": {
-                        "type": "string",
-                        "description": "Session ID"
-                    }
+                "action": {
+                    "type": "string",
+                    "enum": ["new_tab", "switch_tab", "close_tab", "list_tabs"],
+                    "description": "Tab management action"
+                },
+                "tab_id": {
+                    "type": "string",
+                    "description": "Tab ID (for switch_tab, close_tab, or custom ID for new_tab)"
+                }
+            },
+            "required": ["session_id", "action"]
+        }
+    ),
+    Tool(
+        name="list_sessions",
+        description="List all active browser sessions",
+        inputSchema={
+            "type": "object",
+            "properties": {}
+        }
+    ),
+    Tool(
+        name="get_session_info",
+        description="Get detailed information about a session",
+        inputSchema={
+            "type": "object",
+            "properties": {
+                "session_id": {
+                    "type": "string",
+                    "description": "Session ID"
+                }
+            },
+            "required": ["session_id"]
+        }
+    ),
+    Tool(
+        name="close_session",
+        description="Close a browser session and clean up resources",
+        inputSchema={
+            "type": "object",
+            "properties": {
+                "session_id": {
+                    "type": "string",
+                    "description": "Session ID"
+                }
+            },
+            "required": ["session_id"]
+        }
+    ),
+    Tool(
+        name="get_live_view_url",
+        description="Get the Live View URL for real-time browser monitoring",
+        inputSchema={
+            "type": "object",
+            "properties": {
+                "session_id": {
+                    "type": "string",
+                    "description": "Session ID"
+                }
+            },
+            "required": ["session_id"]
+        }
+    ),
+    Tool(
+        name="save_storage_state",
+        description="Save a session's cookies and localStorage as a named profile for create_browser_session",
+        inputSchema={
+            "type": "object",
+            "properties": {
+                "session_id": {
+                    "type": "string",
+                    "description": "Session ID"
+                },
+                "profile": {
+                    "type": "string",
+                    "description": "Profile name (e.g., 'internal-wiki-login')"
+                }
+            },
+            "required": ["session_id", "profile"]
+        }
+    ),
+    Tool(
+        name="get_metrics",
+        description="Get latency percentiles (p50/p95/p99) per tool, per session, and per internal phase",
+        inputSchema={
+            "type": "object",
+            "properties": {
+                "kind": {
+                    "type": "string",
+                    "enum": ["tool", "session", "phase"],
+                    "description": "Only return one kind of metric (optional)"
                 },
-                "required": ["session_id"]
+                "reset": {
+                    "type": "boolean",
+                    "description": "Clear all metrics after reading them (default: false)",
+                    "default": False
+                }
             }
-        ),
-        Tool(
-            name="get_live_view_url",
-            description="Get the Live View URL for real-time browser monitoring",
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "session_id": {
-                        "type": "string",
-                        "description": "Session ID"
+        }
+    ),
+    Tool(
+        name="run_actions",
+        description="Run an ordered list of browser actions in a single call",
+        inputSchema={
+            "type": "object",
+            "properties": {
+                "session_id": {
+                    "type": "string",
+                    "description": "Session ID"
+                },
+                "steps": {
+                    "type": "array",
+                    "description": "Ordered steps to run on the active tab",
+                    "items": {
+                        "type": "object",
+                        "properties": {
+                            "action": {
+                                "type": "string",
+                                "enum": ["navigate", "click", "type", "press_key", "scroll", "wait", "extract"],
+                                "description": "Action to perform"
+                            },
+                            "url": {
+                                "type": "string",
+                                "description": "URL to navigate to (for 'navigate')"
+                            },
+                            "wait_for": {
+                                "type": "string",
+                                "description": "Load state for 'navigate' (default: 'networkidle')"
+                            },
+                            "wait_for_selector": {
+                                "type": "string",
+                                "description": "Selector to wait for (for 'navigate')"
+                            },
+                            "wait_for_url": {
+                                "type": "string",
+                                "description": "URL glob to wait for (for 'navigate')"
+                            },
+                            "wait_for_function": {
+                                "type": "string",
+                                "description": "JavaScript predicate to wait for (for 'navigate')"
+                            },
+                            "dom_quiet_ms": {
+                                "type": "integer",
+                                "description": "DOM quiet period to wait for (for 'navigate')"
+                            },
+                            "timeout_ms": {
+                                "type": "integer",
+                                "description": f"Time budget for the step in milliseconds, waits included (default: {DEFAULT_NAVIGATION_TIMEOUT_MS})",
+                                "minimum": 1
+                            },
+                            "selector": {
+                                "type": "string",
+                                "description": "CSS selector (for click, type, extract, or wait)"
+                            },
+                            "ref": {
+                                "type": "string",
+                                "description": "Element ref from snapshot, used instead of selector (for click or type)"
+                            },
+                            "text": {
+                                "type": "string",
+                                "description": "Text to type (for 'type')"
+                            },
+                            "key": {
+                                "type": "string",
+                                "description": "Key to press (for 'press_key')"
+                            },
+                            "scroll_amount": {
+                                "type": "integer",
+                                "description": "Pixels to scroll (for 'scroll')"
+                            },
+                            "milliseconds": {
+                                "type": "integer",
+                                "description": "Time to wait (for 'wait' without a selector), capped at the step's timeout_ms",
+                                "minimum": 0
+                            },
+                            "content_type": {
+                                "type": "string",
+                                "enum": ["text", "html", "markdown", "table", "attribute"],
+                                "description": "Content to extract (for 'extract', default: 'text')"
+                            },
+                            "attribute": {
+                                "type": "string",
+                                "description": "Attribute name (for 'extract' with content_type 'attribute')"
+                            },
+                            "cursor": {
+                                "type": "integer",
+                                "description": "Character offset to continue from (for 'extract')",
+                                "minimum": 0
+                            },
+                            "max_bytes": {
+                                "type": "integer",
+                                "description": "Maximum UTF-8 bytes returned (for 'extract')",
+                                "minimum": 1
+                            }
+                        },
+                        "required": ["action"]
                     }
                 },
-                "required": ["session_id"]
-            }
-        )
-    ]
+                "stop_on_error": {
+                    "type": "boolean",
+                    "description": "Stop at the first failing step (default: true)",
+                    "default": True
+                }
+            },
+            "required": ["session_id", "steps"]
+        }
+    ),
+    Tool(
+        name="parallel_fetch",
+        description="Navigate to several URLs concurrently in temporary tabs and extract each page's content",
+        inputSchema={
+            "type": "object",
+            "properties": {
+                "session_id": {
+                    "type": "string",
+                    "description": "Session ID"
+                },
+                "urls": {
+                    "type": "array",
+                    "items": {"type": "string"},
+                    "description": "URLs to fetch; results are keyed by URL"
+                },
+                "content_type": {
+                    "type": "string",
+                    "enum": ["text", "html", "markdown", "table"],
+                    "description": "Content to extract from each page (default: text)",
+                    "default": "text"
+                },
+                "selector": {
+                    "type": "string",
+                    "description": "CSS selector to extract from on each page (optional)"
+                },
+                "max_concurrency": {
+                    "type": "integer",
+                    "description": f"Maximum tabs open at once (default: {DEFAULT_FETCH_CONCURRENCY}, max: {MAX_FETCH_CONCURRENCY})",
+                    "default": DEFAULT_FETCH_CONCURRENCY
+                },
+                "wait_for": {
+                    "type": "string",
+                    "enum": ["load", "domcontentloaded", "networkidle"],
+                    "description": "Wait condition for each page (default: domcontentloaded)",
+                    "default": "domcontentloaded"
+                },
+                "timeout_ms": {
+                    "type": "integer",
+                    "description": f"Time budget per URL in milliseconds (default: {DEFAULT_NAVIGATION_TIMEOUT_MS})"
+                },
+                "max_bytes": {
+                    "type": "integer",
+                    "description": f"Maximum UTF-8 bytes returned per URL (default: {DEFAULT_EXTRACT_MAX_BYTES})",
+                    "minimum": 1
+                }
+            },
+            "required": ["session_id", "urls"]
+        }
+    ),
+    Tool(
+        name="snapshot",
+        description="Compact tree of the page's interactive elements and landmarks with refs usable by interact",
+        inputSchema={
+            "type": "object",
+            "properties": {
+                "session_id": {
+                    "type": "string",
+                    "description": "Session ID"
+                },
+                "selector": {
+                    "type": "string",
+                    "description": "Only snapshot the subtree under this CSS selector (optional)"
+                },
+                "diff": {
+                    "type": "boolean",
+                    "description": "Only return changes since the previous snapshot of this tab (default: false)",
+                    "default": False
+                },
+                "max_nodes": {
+                    "type": "integer",
+                    "description": f"Maximum elements returned (default: {DEFAULT_SNAPSHOT_MAX_NODES})"
+                }
+            },
+            "required": ["session_id"]
+        }
+    )
+]
+
+
+JSON_TYPES = {
+    "string": (str,),
+    "integer": (int,),
+    "number": (int, float),
+    "boolean": (bool,),
+    "array": (list,),
+    "object": (dict,),
+}
+
+
+def compile_validator(schema: Dict[str, Any]):
+    """Compile a JSON schema subset (type, enum, minimum, required, properties, items) into a checker.
+    
+    The returned function takes a value and a path and returns a list of error strings.
+    """
+    checks = []
+    
+    expected = schema.get("type")
+    if expected:
+        types = JSON_TYPES[expected]
+        
+        def check_type(value, path):
+            # bool is an int subclass but never a valid number here
+            if isinstance(value, bool) and expected != "boolean":
+                return [f"{path} must be of type {expected}"]
+            if not isinstance(value, types):
+                return [f"{path} must be of type {expected}"]
+            return []
+        checks.append(check_type)
+    
+    if "enum" in schema:
+        allowed = schema["enum"]
+        
+        def check_enum(value, path):
+            if value not in allowed:
+                return [f"{path} must be one of {', '.join(map(str, allowed))}"]
+            return []
+        checks.append(check_enum)
+    
+    if "minimum" in schema:
+        minimum = schema["minimum"]
+        
+        def check_minimum(value, path):
+            if value < minimum:
+                return [f"{path} must be at least {minimum}"]
+            return []
+        checks.append(check_minimum)
+    
+    if schema.get("required"):
+        required = schema["required"]
+        
+        def check_required(value, path):
+            if not isinstance(value, dict):
+                return []
+            return [f"{path}.{key} is required" for key in required if key not in value]
+        checks.append(check_required)
+    
+    if schema.get("properties"):
+        properties = {key: compile_validator(sub) for key, sub in schema["properties"].items()}
+        
+        def check_properties(value, path):
+            if not isinstance(value, dict):
+                return []
+            errors = []
+            for key, validate in properties.items():
+                if key in value:
+                    errors.extend(validate(value[key], f"{path}.{key}"))
+            return errors
+        checks.append(check_properties)
+    
+    if schema.get("items"):
+        validate_item = compile_validator(schema["items"])
+        
+        def check_items(value, path):
+            if not isinstance(value, list):
+                return []
+            errors = []
+            for index, item in enumerate(value):
+                errors.extend(validate_item(item, f"{path}[{index}]"))
+            return errors
+        checks.append(check_items)
+    
+    def validate(value, path="arguments"):
+        errors = []
+        for check in checks:
+            errors.extend(check(value, path))
+            if errors:
+                # Later checks assume the earlier ones passed
+                break
+        return errors
+    
+    return validate
 
 
+TOOL_VALIDATORS = {tool.name: compile_validator(tool.inputSchema) for tool in TOOLS}
+
+
+@app.list_tools()
+async def list_tools() -> List[Tool]:
+    """List available browser automation tools"""
+    return TOOLS
+
 
 @app.call_tool()
-async def call_tool(name: str, arguments: Any) -> List[TextContent]:
+async def call_tool(name: str, arguments: Any) -> List[Union[TextContent, ImageContent]]:
     """Handle tool calls"""
     
     # Clean up expired sessions periodically
     await cleanup_expired_sessions()
     
+    start = time.perf_counter()
+    result = None
     try:
-        if name == "create_browser_session":
-            return await handle_create_session(arguments)
-        elif name == "navigate":
-            return await handle_navigate(arguments)
-        elif name == "interact":
-            return await handle_interact(arguments)
-        elif name == "extract_content":
-            return await handle_extract_content(arguments)
-        elif name == "execute_script":
-            return await handle_execute_script(arguments)
-        elif name == "screenshot":
-            return await handle_screenshot(arguments)
-        elif name == "manage_tabs":
-            return await handle_manage_tabs(arguments)
-        elif name == "list_sessions":
-            return await handle_list_sessions(arguments)
-        elif name == "get_session_info":
-            return await handle_get_session_info(arguments)
-        elif name == "close_session":
-            return await handle_close_session(arguments)
-        elif name == "get_live_view_url":
-            return await handle_get_live_view_url(arguments)
-        else:
+        handler = TOOL_HANDLERS.get(name)
+        if handler is None:
             return [TextContent(type="text", text=f"Unknown tool: {name}")]
+        
+        errors = TOOL_VALIDATORS[name](arguments if arguments is not None else {})
+        if errors:
+            result = [TextContent(type="text", text=f"Error: Invalid arguments: {'; '.join(errors)}")]
+            return result
+        
+        result = await handler(arguments or {})
+        
+        # Checkpoint the touched session in the background so it survives a server restart
+        session_id = arguments.get("session_id") if isinstance(arguments, dict) else None
+        if session_id in sessions:
+            tabs_changed = name == "manage_tabs" and arguments.get("action") != "list_tabs"
+            schedule_checkpoint(sessions[session_id], urgent=tabs_changed)
+        
+        return result
     
     except Exception as e:
         logger.error(f"Error in {name}: {e}", exc_info=True)
-        return [TextContent(type="text", text=f"Error: {str(e)}")]
+        result = [TextContent(type="text", text=f"Error: {str(e)}")]
+        return result
+    
+    finally:
+        if result is not None:
+            elapsed = time.perf_counter() - start
+            # Handlers report failures as text rather than raising
+            error = isinstance(result[0], TextContent) and result[0].text.startswith("Error")
+            record_latency("tool", name, elapsed, error)
+            session_id = arguments.get("session_id") if isinstance(arguments, dict) else None
+            if session_id in sessions:
+                record_latency("session", session_id, elapsed, error)
 
 
 async def handle_create_session(args: Dict[str, Any]) -> List[TextContent]:
@@ -390,6 +1872,9 @@ async def handle_create_session(args: Dict[str, Any]) -> List[TextContent]:
     region = args.get("region", os.getenv("AWS_REGION", "us-east-1"))
     session_timeout = args.get("session_timeout", 3600)
     enable_recording = args.get("enable_recording", False)
+    resource_profile = args.get("resource_profile", "none")
+    block_domains = args.get("block_domains", [])
+    storage_profile = args.get("storage_profile")
     
     # Check if session already exists
     if session_id in sessions:
@@ -398,56 +1883,59 @@ async def handle_create_session(args: Dict[str, Any]) -> List[TextContent]:
             text=f"Error: Session '{session_id}' already exists. Use a different session_id or close the existing session first."
         )]
     
+    if resource_profile not in RESOURCE_BLOCKING_PROFILES:
+        available = ", ".join(RESOURCE_BLOCKING_PROFILES)
+        return [TextContent(type="text", text=f"Error: Unknown resource_profile '{resource_profile}'. Available: {available}")]
+    
+    # Load the storage profile before starting a billed remote session
+    storage_state = None
+    if storage_profile:
+        try:
+            storage_state = load_storage_profile(storage_profile)
+        except Exception as e:
+            return [TextContent(type="text", text=f"Error loading storage profile: {str(e)}")]
+    
     try:
-        # Initialize Playwright
-        playwright = await init_playwright()
-        
         # Create browser client
-        browser_client = BrowserClient(region=region)
+        browser_client = create_browser_client(region)
         
-        # Start browser session
+        # Start browser session off the event loop so other sessions keep running
         identifier = os.getenv("BROWSER_IDENTIFIER", "aws.browser.v1")
-        aws_session_id = browser_client.start(
-            identifier=identifier,
-            session_timeout_seconds=session_timeout
-        )
+        with timed("control_plane_start"):
+            aws_session_id = await asyncio.to_thread(
+                browser_client.start,
+                identifier=identifier,
+                session_timeout_seconds=session_timeout
+            )
         
         logger.info(f"Started AgentCore browser session: {aws_session_id}")
         
-        # Get CDP connection details
-        cdp_url, cdp_headers = browser_client.generate_ws_headers()
-        
-        # Connect to browser via CDP
-        browser = await playwright.chromium.connect_over_cdp(
-            endpoint_url=cdp_url,
-            headers=cdp_headers
-        )
-        
-        # Get default context and create page
-        if not browser.contexts:
-            raise RuntimeError("No browser contexts available")
-        
-        context = browser.contexts[0]
-        page = await context.new_page()
-        
         # Create session object
         session = BrowserSession(
             session_id=session_id,
             description=description,
             region=region,
             browser_client=browser_client,
-            browser=browser,
-            context=context,
-            page=page,
             timeout=session_timeout,
-            recording_enabled=enable_recording
+            recording_enabled=enable_recording,
+            aws_session_id=aws_session_id,
+            browser_identifier=identifier
         )
         
+        # Connect via CDP and install routing before the first page so every request goes through it
+        await connect_browser(session)
+        await apply_resource_blocking(session, resource_profile, block_domains)
+        if storage_state:
+            await apply_storage_state(session.context, storage_state)
+        page = await session.context.new_page()
+        session.page = page
+        
         # Add main tab
-        session.tabs["main"] = page
+        await register_tab(session, "main", page)
         
         # Store session
         sessions[session_id] = session
+        await checkpoint_session(session)
         
         # Generate Live View URL
         live_view_url = f"https://console.aws.amazon.com/bedrock/home?region={region}#/agentcore/browser/sessions/{aws_session_id}"
@@ -459,6 +1947,8 @@ Description: {description}
 Region: {region}
 Timeout: {session_timeout} seconds
 Recording: {'Enabled' if enable_recording else 'Disabled'}
+Resource Blocking: {resource_profile}{f" (+{len(block_domains)} domains)" if block_domains else ""}
+Storage Profile: {storage_profile or 'None'}
 
 Live View URL: {live_view_url}
 
@@ -474,199 +1964,491 @@ The session will remain active for {session_timeout} seconds or until you close
 
 
 
-async def handle_navigate(args: Dict[str, Any]) -> List[TextContent]:
+async def navigate_page(page: Page, options: Dict[str, Any], timings: Dict[str, float]):
+    """Navigate a page and run the requested wait phases within one time budget.
+    
+    Elapsed milliseconds for each completed phase are recorded in timings.
+    """
+    conditions = ("wait_for_selector", "wait_for_url", "wait_for_function", "dom_quiet_ms")
+    has_condition = any(options.get(name) for name in conditions)
+    wait_for = options.get("wait_for") or ("domcontentloaded" if has_condition else "networkidle")
+    deadline = time.perf_counter() + options.get("timeout_ms", DEFAULT_NAVIGATION_TIMEOUT_MS) / 1000
+    
+    def remaining_ms() -> float:
+        remaining = (deadline - time.perf_counter()) * 1000
+        if remaining <= 0:
+            raise TimeoutError("Navigation time budget exhausted")
+        return remaining
+    
+    async def phase(name: str, awaitable_factory):
+        start = time.perf_counter()
+        try:
+            with timed(f"navigate_{name}"):
+                return await awaitable_factory()
+        finally:
+            timings[name] = round((time.perf_counter() - start) * 1000, 1)
+    
+    await phase("goto", lambda: page.goto(options["url"], wait_until=wait_for, timeout=remaining_ms()))
+    
+    if options.get("wait_for_url"):
+        await phase("url", lambda: page.wait_for_url(
+            options["wait_for_url"], wait_until="commit", timeout=remaining_ms()
+        ))
+    
+    if options.get("wait_for_selector"):
+        await phase("selector", lambda: page.wait_for_selector(
+            options["wait_for_selector"], state="visible", timeout=remaining_ms()
+        ))
+    
+    if options.get("wait_for_function"):
+        await phase("function", lambda: page.wait_for_function(
+            options["wait_for_function"], timeout=remaining_ms()
+        ))
+    
+    if options.get("dom_quiet_ms"):
+        quiet = await phase("dom_quiet", lambda: page.evaluate(
+            DOM_QUIET_JS, [options["dom_quiet_ms"], remaining_ms()]
+        ))
+        if not quiet:
+            raise TimeoutError(f"DOM did not stay quiet for {options['dom_quiet_ms']}ms within the time budget")
+
+
+def format_timings(timings: Dict[str, float]) -> str:
+    """Format phase timings as 'phase Nms' pairs with a total"""
+    parts = [f"{name} {elapsed:.0f}ms" for name, elapsed in timings.items()]
+    parts.append(f"total {sum(timings.values()):.0f}ms")
+    return ", ".join(parts)
+
+
+@with_session()
+async def handle_navigate(args: Dict[str, Any], session: BrowserSession, page: Page) -> List[TextContent]:
     """Navigate to a URL"""
-    session_id = args["session_id"]
     url = args["url"]
-    wait_for = args.get("wait_for", "networkidle")
-    
-    if session_id not in sessions:
-        return [TextContent(type="text", text=f"Error: Session '{session_id}' not found")]
     
-    session = sessions[session_id]
-    session.update_last_used()
+    timings: Dict[str, float] = {}
     
     try:
-        page = session.tabs.get(session.active_tab_id, session.page)
-        await page.goto(url)
-        await page.wait_for_load_state(wait_for)
+        await navigate_page(page, args, timings)
         
         return [TextContent(
             type="text",
-            text=f"✅ Navigated to {url}\nCurrent URL: {page.url}"
+            text=f"✅ Navigated to {url}\nCurrent URL: {page.url}\nTimings: {format_timings(timings)}"
         )]
     
     except Exception as e:
-        return [TextContent(type="text", text=f"Error navigating: {str(e)}")]
+        return [TextContent(type="text", text=f"Error navigating: {str(e)}\nTimings: {format_timings(timings)}")]
 
 
-async def handle_interact(args: Dict[str, Any]) -> List[TextContent]:
-    """Handle page interactions"""
-    session_id = args["session_id"]
+def element_selector(args: Dict[str, Any]) -> str:
+    """Selector for the target element, given either a snapshot ref or a CSS selector"""
+    if args.get("ref"):
+        if not SNAPSHOT_REF_PATTERN.fullmatch(args["ref"]):
+            raise ValueError(f"Unknown ref '{args['ref']}'; take a new snapshot")
+        return f'[{SNAPSHOT_REF_ATTR}="{args["ref"]}"]'
+    if args.get("selector"):
+        return args["selector"]
+    raise ValueError("selector or ref required")
+
+
+def url_matches(url: str, pattern: str) -> bool:
+    """Match a URL against a glob pattern, or by substring when the pattern has no wildcards"""
+    if any(char in pattern for char in "*?["):
+        return fnmatch.fnmatchcase(url, pattern)
+    return pattern in url
+
+
+async def perform_interaction(page: Page, args: Dict[str, Any], timeout_ms: Optional[float] = None) -> str:
+    """Run one interact action and describe what was done.
+    
+    timeout_ms bounds the action, Playwright's default timeout applies when it is None.
+    """
     action = args["action"]
+    timeout = timeout_ms / 1000 if timeout_ms is not None else None
     
-    if session_id not in sessions:
-        return [TextContent(type="text", text=f"Error: Session '{session_id}' not found")]
+    if action == "click":
+        selector = element_selector(args)
+        await page.click(selector, timeout=timeout_ms)
+        return f"Clicked element: {selector}"
     
-    session = sessions[session_id]
-    session.update_last_used()
-    page = session.tabs.get(session.active_tab_id, session.page)
+    elif action == "type":
+        selector = element_selector(args)
+        await page.fill(selector, args["text"], timeout=timeout_ms)
+        return f"Typed text into: {selector}"
+    
+    elif action == "press_key":
+        key = args["key"]
+        await asyncio.wait_for(page.keyboard.press(key), timeout)
+        return f"Pressed key: {key}"
+    
+    elif action == "scroll":
+        scroll_amount = int(args.get("scroll_amount", 500))
+        await asyncio.wait_for(page.evaluate(f"window.scrollBy(0, {scroll_amount})"), timeout)
+        return f"Scrolled {scroll_amount} pixels"
+    
+    raise ValueError(f"Unknown action '{action}'")
+
+
+@with_session()
+async def handle_interact(args: Dict[str, Any], session: BrowserSession, page: Page) -> List[TextContent]:
+    """Handle page interactions and await their expected effects"""
+    action = args["action"]
+    deadline = time.perf_counter() + args.get("timeout_ms", DEFAULT_NAVIGATION_TIMEOUT_MS) / 1000
+    start = time.perf_counter()
+    timings: Dict[str, float] = {}
+    
+    def remaining_ms() -> float:
+        return max((deadline - time.perf_counter()) * 1000, 1)
+    
+    async def observe(name: str, awaitable):
+        result = await awaitable
+        timings[name] = round((time.perf_counter() - start) * 1000, 1)
+        return result
+    
+    async def wait_for_navigation():
+        await page.wait_for_event(
+            "framenavigated", predicate=lambda frame: frame == page.main_frame, timeout=remaining_ms()
+        )
+        await page.wait_for_load_state("domcontentloaded", timeout=remaining_ms())
+    
+    # Events the action may trigger have to be listened for before acting
+    waiters = {}
+    if args.get("expect_navigation"):
+        waiters["navigation"] = asyncio.create_task(observe("navigation", wait_for_navigation()))
+    if args.get("expect_response"):
+        pattern = args["expect_response"]
+        waiters["response"] = asyncio.create_task(observe("response", page.wait_for_event(
+            "response", predicate=lambda response: url_matches(response.url, pattern), timeout=remaining_ms()
+        )))
     
     try:
-        if action == "click":
-            selector = args["selector"]
-            await page.click(selector)
-            return [TextContent(type="text", text=f"✅ Clicked element: {selector}")]
-        
-        elif action == "type":
-            selector = args["selector"]
-            text = args["text"]
-            await page.fill(selector, text)
-            return [TextContent(type="text", text=f"✅ Typed text into: {selector}")]
-        
-        elif action == "press_key":
-            key = args["key"]
-            await page.keyboard.press(key)
-            return [TextContent(type="text", text=f"✅ Pressed key: {key}")]
-        
-        elif action == "scroll":
-            scroll_amount = args.get("scroll_amount", 500)
-            await page.evaluate(f"window.scrollBy(0, {scroll_amount})")
-            return [TextContent(type="text", text=f"✅ Scrolled {scroll_amount} pixels")]
+        try:
+            message = await perform_interaction(page, args, remaining_ms())
+        except Exception as e:
+            return [TextContent(type="text", text=f"Error during {action}: {str(e)}")]
+        timings["action"] = round((time.perf_counter() - start) * 1000, 1)
         
-        else:
-            return [TextContent(type="text", text=f"Error: Unknown action '{action}'")]
+        if not waiters and not args.get("expect_selector"):
+            return [TextContent(type="text", text=f"✅ {message}")]
+        
+        observed = []
+        for name, waiter in waiters.items():
+            try:
+                result = await waiter
+            except Exception as e:
+                return [TextContent(type="text", text=f"Error: {message}, but expected {name} was not observed: {str(e)}")]
+            if name == "navigation":
+                observed.append(f"Navigated to: {page.url}")
+            else:
+                observed.append(f"Response: {result.status} {result.url}")
+        
+        if args.get("expect_selector"):
+            selector = args["expect_selector"]
+            state = args.get("expect_selector_state", "visible")
+            try:
+                await observe("selector", page.wait_for_selector(selector, state=state, timeout=remaining_ms()))
+            except Exception as e:
+                return [TextContent(type="text", text=f"Error: {message}, but '{selector}' did not become {state}: {str(e)}")]
+            observed.append(f"Selector '{selector}' is {state}")
+        
+        timing_text = ", ".join(f"{name} {elapsed:.0f}ms" for name, elapsed in timings.items())
+        return [TextContent(
+            type="text",
+            text=f"✅ {message}\n" + "\n".join(observed) + f"\nTimings (since action start): {timing_text}"
+        )]
     
-    except Exception as e:
-        return [TextContent(type="text", text=f"Error during {action}: {str(e)}")]
+    finally:
+        for waiter in waiters.values():
+            waiter.cancel()
+            # Retrieve failures of waiters we returned before awaiting, so they aren't logged as unhandled
+            waiter.add_done_callback(lambda task: task.cancelled() or task.exception())
+        session.invalidate_content()
+
+
+async def extract_page_content(
+    page: Page,
+    content_type: str,
+    selector: Optional[str] = None,
+    attribute: Optional[str] = None
+) -> str:
+    """Extract the full, unpaginated content of a page or element as a string"""
+    if content_type == "text":
+        if selector:
+            return await page.text_content(selector) or ""
+        return await page.evaluate("document.body.innerText")
+    
+    elif content_type == "html":
+        if selector:
+            return await page.inner_html(selector)
+        return await page.content()
+    
+    elif content_type == "markdown":
+        if selector:
+            return await page.eval_on_selector(selector, MARKDOWN_EXTRACT_JS)
+        return await page.evaluate(MARKDOWN_EXTRACT_JS)
+    
+    elif content_type == "table":
+        tables = await page.eval_on_selector_all(selector or "table", TABLE_EXTRACT_JS)
+        return json.dumps(tables, ensure_ascii=False)
+    
+    elif content_type == "attribute":
+        if not selector:
+            raise ValueError("selector required for attribute extraction")
+        if not attribute:
+            raise ValueError("attribute name required")
+        return await page.get_attribute(selector, attribute) or ""
+    
+    raise ValueError(f"Unknown content_type '{content_type}'")
+
+
+async def get_page_content(
+    session: BrowserSession,
+    page: Page,
+    content_type: str,
+    selector: Optional[str] = None,
+    attribute: Optional[str] = None
+) -> str:
+    """Extract page content, served from the tab's snapshot cache when the page is unchanged"""
+    tab_id = session.active_tab_id
+    if tab_id not in session.watched_tabs:
+        with timed(f"extract_{content_type}"):
+            return await extract_page_content(page, content_type, selector, attribute)
+    
+    key = (content_type, selector, attribute)
+    tab_cache = session.content_cache.get(tab_id, {})
+    if key in tab_cache:
+        session.cache_hits += 1
+        return tab_cache[key]
+    
+    session.cache_misses += 1
+    generation = session.content_generation.get(tab_id, 0)
+    with timed(f"extract_{content_type}"):
+        content = await extract_page_content(page, content_type, selector, attribute)
+    
+    # Don't cache a result that raced with a navigation or DOM mutation
+    if session.content_generation.get(tab_id, 0) == generation:
+        tab_cache = session.content_cache.setdefault(tab_id, {})
+        if len(tab_cache) >= CONTENT_CACHE_MAX_ENTRIES:
+            del tab_cache[next(iter(tab_cache))]
+        tab_cache[key] = content
+    return content
+
+
+def paginate_content(
+    content: str,
+    cursor: int = 0,
+    max_bytes: int = DEFAULT_EXTRACT_MAX_BYTES
+) -> Tuple[str, Optional[int]]:
+    """Cut one chunk of at most max_bytes UTF-8 bytes starting at character offset cursor.
+    
+    Returns the chunk and the cursor of the next chunk, or None when the content is exhausted.
+    Every chunk holds at least one character, so paging always terminates.
+    """
+    cursor = max(cursor, 0)
+    max_bytes = max(max_bytes, 0)
+    remaining = content[cursor:]
+    encoded = remaining.encode("utf-8")
+    if len(encoded) <= max_bytes:
+        return remaining, None
+    
+    chunk = encoded[:max_bytes].decode("utf-8", errors="ignore")
+    # Prefer ending on a line break so chunks stay readable
+    newline = chunk.rfind("\n")
+    if newline > len(chunk) // 2:
+        chunk = chunk[:newline + 1]
+    # max_bytes can be smaller than the next character, take it anyway
+    chunk = chunk or remaining[0]
+    return chunk, cursor + len(chunk)
 
 
-async def handle_extract_content(args: Dict[str, Any]) -> List[TextContent]:
+@with_session()
+async def handle_extract_content(args: Dict[str, Any], session: BrowserSession, page: Page) -> List[TextContent]:
     """Extract content from page"""
-    session_id = args["session_id"]
     content_type = args["content_type"]
     selector = args.get("selector")
-    
-    if session_id not in sessions:
-        return [TextContent(type="text", text=f"Error: Session '{session_id}' not found")]
-    
-    session = sessions[session_id]
-    session.update_last_used()
-    page = session.tabs.get(session.active_tab_id, session.page)
+    cursor = args.get("cursor", 0)
+    max_bytes = args.get("max_bytes", DEFAULT_EXTRACT_MAX_BYTES)
     
     try:
-        if content_type == "text":
-            if selector:
-                content = await page.text_content(selector)
-            else:
-                content = await page.evaluate("document.body.innerText")
-            return [TextContent(type="text", text=f"Extracted text:\n\n{content}")]
-        
-        elif content_type == "html":
-            if selector:
-                content = await page.inner_html(selector)
-            else:
-                content = await page.content()
-            # Truncate if too long
-            if len(content) > 5000:
-                content = content[:5000] + "\n\n... (truncated)"
-            return [TextContent(type="text", text=f"Extracted HTML:\n\n{content}")]
-        
-        elif content_type == "attribute":
-            if not selector:
-                return [TextContent(type="text", text="Error: selector required for attribute extraction")]
+        if content_type == "attribute":
             attribute = args.get("attribute")
-            if not attribute:
-                return [TextContent(type="text", text="Error: attribute name required")]
-            content = await page.get_attribute(selector, attribute)
+            content = await get_page_content(session, page, content_type, selector, attribute)
             return [TextContent(type="text", text=f"Attribute '{attribute}': {content}")]
         
-        else:
-            return [TextContent(type="text", text=f"Error: Unknown content_type '{content_type}'")]
+        content = await get_page_content(session, page, content_type, selector)
+        chunk, next_cursor = paginate_content(content, cursor, max_bytes)
+        
+        labels = {"text": "text", "html": "HTML", "markdown": "markdown", "table": "table rows (JSON)"}
+        result = f"Extracted {labels[content_type]}:\n\n{chunk}"
+        if next_cursor is not None or cursor:
+            end = next_cursor if next_cursor is not None else len(content)
+            result += f"\n\n[chars {cursor}-{end} of {len(content)}"
+            result += f", next_cursor: {next_cursor}]" if next_cursor is not None else ", end of content]"
+        return [TextContent(type="text", text=result)]
     
+    except ValueError as e:
+        return [TextContent(type="text", text=f"Error: {str(e)}")]
     except Exception as e:
         return [TextContent(type="text", text=f"Error extracting content: {str(e)}")]
 
 
 
-async def handle_execute_script(args: Dict[str, Any]) -> List[TextContent]:
+@with_session()
+async def handle_execute_script(args: Dict[str, Any], session: BrowserSession, page: Page) -> List[TextContent]:
     """Execute JavaScript"""
-    session_id = args["session_id"]
     script = args["script"]
     
-    if session_id not in sessions:
-        return [TextContent(type="text", text=f"Error: Session '{session_id}' not found")]
-    
-    session = sessions[session_id]
-    session.update_last_used()
-    page = session.tabs.get(session.active_tab_id, session.page)
-    
     try:
-        result = await page.evaluate(script)
+        with timed("evaluate_script"):
+            result = await page.evaluate(script)
         return [TextContent(type="text", text=f"Script result:\n\n{result}")]
     except Exception as e:
         return [TextContent(type="text", text=f"Error executing script: {str(e)}")]
+    finally:
+        session.invalidate_content()
+
+
+async def capture_screenshot(
+    page: Page,
+    image_format: str = "png",
+    quality: int = DEFAULT_SCREENSHOT_QUALITY,
+    selector: Optional[str] = None,
+    full_page: bool = False,
+    clip: Optional[Dict[str, float]] = None,
+    max_dimension: Optional[int] = None
+) -> bytes:
+    """Capture a screenshot into memory, encoded and downscaled by the browser"""
+    box = None
+    if selector:
+        element = await page.query_selector(selector)
+        if not element:
+            raise LookupError(f"Element '{selector}' not found")
+        await element.scroll_into_view_if_needed()
+        box = await element.bounding_box()
+        if not box:
+            raise LookupError(f"Element '{selector}' is not visible")
+    
+    viewport = await page.evaluate("""() => ({
+        x: window.scrollX, y: window.scrollY,
+        width: window.innerWidth, height: window.innerHeight,
+        fullWidth: document.documentElement.scrollWidth,
+        fullHeight: document.documentElement.scrollHeight,
+        dpr: window.devicePixelRatio
+    })""")
+    
+    if box:
+        region = {
+            "x": box["x"] + viewport["x"],
+            "y": box["y"] + viewport["y"],
+            "width": box["width"],
+            "height": box["height"]
+        }
+    elif clip:
+        region = {key: float(clip[key]) for key in ("x", "y", "width", "height")}
+    elif full_page:
+        region = {"x": 0, "y": 0, "width": viewport["fullWidth"], "height": viewport["fullHeight"]}
+    else:
+        region = {"x": viewport["x"], "y": viewport["y"], "width": viewport["width"], "height": viewport["height"]}
+    
+    # Clip coordinates are in page CSS pixels; output pixels are scaled by devicePixelRatio
+    scale = 1.0
+    longest = max(region["width"], region["height"]) * (viewport["dpr"] or 1)
+    if max_dimension and longest > max_dimension:
+        scale = max_dimension / longest
+    
+    params: Dict[str, Any] = {
+        "format": image_format,
+        "clip": {**region, "scale": scale},
+        "captureBeyondViewport": bool(full_page or clip or region["height"] > viewport["height"])
+    }
+    if image_format != "png":
+        params["quality"] = quality
+    
+    cdp = await page.context.new_cdp_session(page)
+    try:
+        with timed("screenshot_capture"):
+            result = await cdp.send("Page.captureScreenshot", params)
+    finally:
+        await cdp.detach()
+    return base64.b64decode(result["data"])
 
 
-async def handle_screenshot(args: Dict[str, Any]) -> List[TextContent]:
+@with_session()
+async def handle_screenshot(args: Dict[str, Any], session: BrowserSession, page: Page) -> List[Union[TextContent, ImageContent]]:
     """Take screenshot"""
-    session_id = args["session_id"]
     path = args.get("path")
-    selector = args.get("selector")
-    full_page = args.get("full_page", False)
+    inline = args.get("inline", False)
     
-    if session_id not in sessions:
-        return [TextContent(type="text", text=f"Error: Session '{session_id}' not found")]
+    requested_format = args.get("format")
+    if not requested_format and path:
+        requested_format = os.path.splitext(path)[1].lstrip(".").lower() or None
+    image_format = SCREENSHOT_FORMATS.get(requested_format or "png")
+    if not image_format:
+        return [TextContent(type="text", text=f"Error: Unsupported screenshot format '{requested_format}'")]
     
-    session = sessions[session_id]
-    session.update_last_used()
-    page = session.tabs.get(session.active_tab_id, session.page)
+    try:
+        data = await capture_screenshot(
+            page,
+            image_format=image_format,
+            quality=args.get("quality", DEFAULT_SCREENSHOT_QUALITY),
+            selector=args.get("selector"),
+            full_page=args.get("full_page", False),
+            clip=args.get("clip"),
+            max_dimension=args.get("max_dimension")
+        )
+    except LookupError as e:
+        return [TextContent(type="text", text=f"Error: {str(e)}")]
+    except Exception as e:
+        return [TextContent(type="text", text=f"Error taking screenshot: {str(e)}")]
+    
+    response: List[Union[TextContent, ImageContent]] = []
     
     try:
-        # Generate path if not provided
-        if not path:
-            screenshots_dir = os.getenv("BROWSER_SCREENSHOTS_DIR", "screenshots")
-            os.makedirs(screenshots_dir, exist_ok=True)
-            path = os.path.join(screenshots_dir, f"screenshot_{int(time.time())}.png")
-        
-        # Take screenshot
-        if selector:
-            element = await page.query_selector(selector)
-            if element:
-                await element.screenshot(path=path)
-            else:
-                return [TextContent(type="text", text=f"Error: Element '{selector}' not found")]
+        if path or not inline:
+            # Generate a collision-free path if not provided
+            if not path:
+                screenshots_dir = os.getenv("BROWSER_SCREENSHOTS_DIR", "screenshots")
+                extension = "jpg" if image_format == "jpeg" else image_format
+                path = os.path.join(screenshots_dir, f"screenshot_{time.time_ns()}_{uuid.uuid4().hex[:8]}.{extension}")
+            with timed("screenshot_write"):
+                await asyncio.to_thread(write_file_atomic, path, data)
+            response.append(TextContent(type="text", text=f"✅ Screenshot saved to: {path} ({len(data)} bytes)"))
         else:
-            await page.screenshot(path=path, full_page=full_page)
-        
-        return [TextContent(type="text", text=f"✅ Screenshot saved to: {path}")]
-    
+            response.append(TextContent(type="text", text=f"✅ Screenshot captured ({image_format}, {len(data)} bytes)"))
     except Exception as e:
-        return [TextContent(type="text", text=f"Error taking screenshot: {str(e)}")]
+        return [TextContent(type="text", text=f"Error saving screenshot: {str(e)}")]
+    
+    if inline:
+        response.append(ImageContent(
+            type="image",
+            data=base64.b64encode(data).decode("ascii"),
+            mimeType=f"image/{image_format}"
+        ))
+    
+    return response
 
 
-async def handle_manage_tabs(args: Dict[str, Any]) -> List[TextContent]:
+@with_session()
+async def handle_manage_tabs(args: Dict[str, Any], session: BrowserSession, page: Page) -> List[TextContent]:
     """Manage browser tabs"""
-    session_id = args["session_id"]
     action = args["action"]
     
-    if session_id not in sessions:
-        return [TextContent(type="text", text=f"Error: Session '{session_id}' not found")]
-    
-    session = sessions[session_id]
-    session.update_last_used()
-    
     try:
         if action == "new_tab":
-            tab_id = args.get("tab_id", f"tab_{len(session.tabs) + 1}")
+            tab_id = args.get("tab_id") or next_tab_id(session)
             if tab_id in session.tabs:
                 return [TextContent(type="text", text=f"Error: Tab '{tab_id}' already exists")]
             
             new_page = await session.context.new_page()
-            session.tabs[tab_id] = new_page
+            await register_tab(session, tab_id, new_page)
             session.active_tab_id = tab_id
             
-            return [TextContent(type="text", text=f"✅ Created new tab: {tab_id} (now active)")]
+            evicted_before = session.tabs_evicted
+            await enforce_tab_limit(session)
+            note = ""
+            if session.tabs_evicted > evicted_before:
+                note = f", closed {session.tabs_evicted - evicted_before} least recently used tab(s) to stay within {MAX_TABS_PER_SESSION}"
+            
+            return [TextContent(type="text", text=f"✅ Created new tab: {tab_id} (now active){note}")]
         
         elif action == "switch_tab":
             tab_id = args.get("tab_id")
@@ -675,6 +2457,7 @@ async def handle_manage_tabs(args: Dict[str, Any]) -> List[TextContent]:
                 return [TextContent(type="text", text=f"Error: Tab '{tab_id}' not found. Available: {available}")]
             
             session.active_tab_id = tab_id
+            session.tab_last_used[tab_id] = time.time()
             page = session.tabs[tab_id]
             await page.bring_to_front()
             
@@ -685,12 +2468,7 @@ async def handle_manage_tabs(args: Dict[str, Any]) -> List[TextContent]:
             if tab_id not in session.tabs:
                 return [TextContent(type="text", text=f"Error: Tab '{tab_id}' not found")]
             
-            await session.tabs[tab_id].close()
-            del session.tabs[tab_id]
-            
-            # Switch to another tab if current was closed
-            if session.active_tab_id == tab_id and session.tabs:
-                session.active_tab_id = next(iter(session.tabs.keys()))
+            await close_tab(session, tab_id)
             
             return [TextContent(type="text", text=f"✅ Closed tab: {tab_id}")]
         
@@ -698,9 +2476,10 @@ async def handle_manage_tabs(args: Dict[str, Any]) -> List[TextContent]:
             tabs_info = []
             for tab_id, page in session.tabs.items():
                 is_active = "✓" if tab_id == session.active_tab_id else " "
-                tabs_info.append(f"[{is_active}] {tab_id}: {page.url}")
+                heap = f" ({session.tab_heap_mb[tab_id]} MB heap)" if tab_id in session.tab_heap_mb else ""
+                tabs_info.append(f"[{is_active}] {tab_id}: {page.url}{heap}")
             
-            result = "Active tabs:\n\n" + "\n".join(tabs_info)
+            result = f"Active tabs ({len(session.tabs)}/{MAX_TABS_PER_SESSION}):\n\n" + "\n".join(tabs_info)
             return [TextContent(type="text", text=result)]
         
         else:
@@ -732,16 +2511,11 @@ async def handle_list_sessions(args: Dict[str, Any]) -> List[TextContent]:
     return [TextContent(type="text", text=result)]
 
 
-async def handle_get_session_info(args: Dict[str, Any]) -> List[TextContent]:
+@with_session(touch=False)
+async def handle_get_session_info(args: Dict[str, Any], session: BrowserSession, page: Page) -> List[TextContent]:
     """Get session information"""
     session_id = args["session_id"]
     
-    if session_id not in sessions:
-        return [TextContent(type="text", text=f"Error: Session '{session_id}' not found")]
-    
-    session = sessions[session_id]
-    page = session.tabs.get(session.active_tab_id, session.page)
-    
     age = int(time.time() - session.created_at)
     idle = int(time.time() - session.last_used)
     
@@ -757,26 +2531,27 @@ Timeout: {session.timeout} seconds
 
 Current URL: {page.url if page else 'N/A'}
 Active Tab: {session.active_tab_id}
-Total Tabs: {len(session.tabs)}
+Total Tabs: {len(session.tabs)}/{MAX_TABS_PER_SESSION} ({session.popup_count} popups tracked, {session.tabs_evicted} evicted, {session.tabs_recycled} recycled)
 Recording: {'Enabled' if session.recording_enabled else 'Disabled'}
+Content Cache: {session.cache_hits} hits, {session.cache_misses} misses
+Resource Blocking: {session.resource_profile} ({session.requests_blocked} requests blocked, ~{session.bytes_saved_estimate // 1024} KB saved)
 
 Tabs:
 """
     
     for tab_id, tab_page in session.tabs.items():
         is_active = "✓" if tab_id == session.active_tab_id else " "
-        info += f"  [{is_active}] {tab_id}: {tab_page.url}\n"
+        heap = f" ({session.tab_heap_mb[tab_id]} MB heap)" if tab_id in session.tab_heap_mb else ""
+        info += f"  [{is_active}] {tab_id}: {tab_page.url}{heap}\n"
     
     return [TextContent(type="text", text=info)]
 
 
-async def handle_close_session(args: Dict[str, Any]) -> List[TextContent]:
+@with_session(touch=False)
+async def handle_close_session(args: Dict[str, Any], session: BrowserSession, page: Page) -> List[TextContent]:
     """Close a session"""
     session_id = args["session_id"]
     
-    if session_id not in sessions:
-        return [TextContent(type="text", text=f"Error: Session '{session_id}' not found")]
-    
     try:
         await close_session_internal(session_id)
         return [TextContent(type="text", text=f"✅ Session '{session_id}' closed successfully")]
@@ -784,15 +2559,11 @@ async def handle_close_session(args: Dict[str, Any]) -> List[TextContent]:
         return [TextContent(type="text", text=f"Error closing session: {str(e)}")]
 
 
-async def handle_get_live_view_url(args: Dict[str, Any]) -> List[TextContent]:
+@with_session(touch=False)
+async def handle_get_live_view_url(args: Dict[str, Any], session: BrowserSession, page: Page) -> List[TextContent]:
     """Get Live View URL"""
     session_id = args["session_id"]
     
-    if session_id not in sessions:
-        return [TextContent(type="text", text=f"Error: Session '{session_id}' not found")]
-    
-    session = sessions[session_id]
-    
     # Note: This is a simplified URL. In production, you'd get the actual session ID from browser_client
     live_view_url = f"https://console.aws.amazon.com/bedrock/home?region={session.region}#/agentcore/browser/sessions"
     
@@ -812,18 +2583,346 @@ Note: You need appropriate AWS IAM permissions to access the Live View.
     return [TextContent(type="text", text=result)]
 
 
+@with_session()
+async def handle_save_storage_state(args: Dict[str, Any], session: BrowserSession, page: Page) -> List[TextContent]:
+    """Save storage state as a named profile"""
+    profile = args["profile"]
+    
+    try:
+        state = await session.context.storage_state()
+        path = storage_profile_path(profile)
+        # Cookies are credentials, keep the file private
+        await asyncio.to_thread(write_file_atomic, path, json.dumps(state).encode("utf-8"), 0o600)
+        storage_profiles[profile] = (os.path.getmtime(path), state)
+        
+        return [TextContent(
+            type="text",
+            text=f"✅ Saved storage profile '{profile}' "
+                 f"({len(state.get('cookies', []))} cookies, {len(state.get('origins', []))} origins) to: {path}"
+        )]
+    
+    except Exception as e:
+        return [TextContent(type="text", text=f"Error saving storage state: {str(e)}")]
+
+
+async def handle_get_metrics(args: Dict[str, Any]) -> List[TextContent]:
+    """Get latency metrics"""
+    kind = args.get("kind")
+    kinds = [kind] if kind else list(metrics)
+    
+    if any(k not in metrics for k in kinds):
+        return [TextContent(type="text", text=f"Error: Unknown metrics kind '{kind}'")]
+    
+    payload = {
+        k: {name: histogram.summary() for name, histogram in sorted(metrics[k].items())}
+        for k in kinds
+    }
+    
+    if args.get("reset", False):
+        for histograms in metrics.values():
+            histograms.clear()
+    
+    return [TextContent(
+        type="text",
+        text=f"Latency metrics (milliseconds, last {METRICS_WINDOW} samples each):\n\n{json.dumps(payload, indent=2)}"
+    )]
+
+
+async def run_action_step(session: BrowserSession, page: Page, step: Dict[str, Any]) -> Any:
+    """Run a single run_actions step on a page and return its result.
+    
+    Every step is bounded by its timeout_ms, since the batch holds the session lock.
+    """
+    action = step["action"]
+    timeout_ms = step.get("timeout_ms", DEFAULT_NAVIGATION_TIMEOUT_MS)
+    
+    if action == "navigate":
+        timings: Dict[str, float] = {}
+        await navigate_page(page, step, timings)
+        return {"url": page.url, "timings_ms": timings}
+    
+    elif action in ("click", "type", "press_key", "scroll"):
+        await perform_interaction(page, step, timeout_ms)
+        return None
+    
+    elif action == "wait":
+        if step.get("selector"):
+            await page.wait_for_selector(step["selector"], timeout=timeout_ms)
+        else:
+            await page.wait_for_timeout(min(step.get("milliseconds", 1000), timeout_ms))
+        return None
+    
+    elif action == "extract":
+        content = await get_page_content(
+            session, page, step.get("content_type", "text"), step.get("selector"), step.get("attribute")
+        )
+        chunk, next_cursor = paginate_content(
+            content, step.get("cursor", 0), step.get("max_bytes", DEFAULT_EXTRACT_MAX_BYTES)
+        )
+        return {"content": chunk, "next_cursor": next_cursor}
+    
+    raise ValueError(f"Unknown action '{action}'")
+
+
+@with_session()
+async def handle_run_actions(args: Dict[str, Any], session: BrowserSession, page: Page) -> List[TextContent]:
+    """Run a batch of actions in one call"""
+    session_id = args["session_id"]
+    steps = args["steps"]
+    stop_on_error = args.get("stop_on_error", True)
+    
+    step_results = []
+    failed = 0
+    batch_start = time.perf_counter()
+    
+    for index, step in enumerate(steps):
+        step_start = time.perf_counter()
+        entry: Dict[str, Any] = {"index": index, "action": step.get("action")}
+        try:
+            result = await run_action_step(session, page, step)
+            entry["status"] = "ok"
+            if result is not None:
+                entry["result"] = result
+        except Exception as e:
+            failed += 1
+            entry["status"] = "error"
+            entry["error"] = str(e)
+        finally:
+            if step.get("action") not in ("wait", "extract"):
+                session.invalidate_content()
+        entry["elapsed_ms"] = round((time.perf_counter() - step_start) * 1000, 1)
+        step_results.append(entry)
+        
+        if entry["status"] == "error" and stop_on_error:
+            break
+    
+    session.update_last_used()
+    
+    payload = {
+        "session_id": session_id,
+        "steps_total": len(steps),
+        "steps_run": len(step_results),
+        "steps_failed": failed,
+        "stopped_early": len(step_results) < len(steps),
+        "elapsed_ms": round((time.perf_counter() - batch_start) * 1000, 1),
+        "current_url": page.url,
+        "steps": step_results
+    }
+    
+    status = "✅" if failed == 0 else "⚠️"
+    return [TextContent(
+        type="text",
+        text=f"{status} Ran {len(step_results)}/{len(steps)} steps\n\n{json.dumps(payload, indent=2, default=str)}"
+    )]
+
+
+async def fetch_url(
+    session: BrowserSession,
+    url: str,
+    options: Dict[str, Any],
+    semaphore: asyncio.Semaphore
+) -> Dict[str, Any]:
+    """Navigate a temporary tab to url and extract its content.
+    
+    Failures are returned in the result rather than raised so one bad URL
+    doesn't abort the rest of the batch.
+    """
+    timings: Dict[str, float] = {}
+    result: Dict[str, Any] = {"status": "ok"}
+    async with semaphore:
+        start = time.perf_counter()
+        page = None
+        try:
+            with timed("fetch_open_tab"):
+                session.temporary_tabs += 1
+                try:
+                    page = await session.context.new_page()
+                except BaseException:
+                    session.temporary_tabs -= 1
+                    raise
+            await navigate_page(page, {**options, "url": url}, timings)
+            
+            extract_start = time.perf_counter()
+            with timed(f"extract_{options['content_type']}"):
+                content = await extract_page_content(page, options["content_type"], options.get("selector"))
+            timings["extract"] = round((time.perf_counter() - extract_start) * 1000, 1)
+            
+            chunk, next_cursor = paginate_content(content, 0, options["max_bytes"])
+            result.update({
+                "final_url": page.url,
+                "content": chunk,
+                "total_chars": len(content),
+                "truncated": next_cursor is not None
+            })
+        except Exception as e:
+            result.update({"status": "error", "error": str(e)})
+        finally:
+            if page is not None:
+                session.temporary_tabs -= 1
+                try:
+                    await page.close()
+                except Exception as e:
+                    logger.warning(f"Error closing fetch tab for {url}: {e}")
+            result["timings_ms"] = timings
+            result["elapsed_ms"] = round((time.perf_counter() - start) * 1000, 1)
+    return result
+
+
+@with_session()
+async def handle_parallel_fetch(args: Dict[str, Any], session: BrowserSession, page: Page) -> List[TextContent]:
+    """Fetch several URLs concurrently"""
+    # Duplicate URLs would collide in the keyed result, fetch each once
+    urls = list(dict.fromkeys(args["urls"]))
+    if not urls:
+        return [TextContent(type="text", text="Error: urls must not be empty")]
+    
+    # Temporary tabs count toward the session's tab cap, one is allowed even in a full session
+    concurrency = max(1, min(
+        args.get("max_concurrency", DEFAULT_FETCH_CONCURRENCY),
+        MAX_FETCH_CONCURRENCY,
+        MAX_TABS_PER_SESSION - len(session.tabs)
+    ))
+    options = {
+        "content_type": args.get("content_type", "text"),
+        "selector": args.get("selector"),
+        "wait_for": args.get("wait_for", "domcontentloaded"),
+        "timeout_ms": args.get("timeout_ms", DEFAULT_NAVIGATION_TIMEOUT_MS),
+        "max_bytes": args.get("max_bytes", DEFAULT_EXTRACT_MAX_BYTES)
+    }
+    
+    semaphore = asyncio.Semaphore(concurrency)
+    batch_start = time.perf_counter()
+    fetched = await asyncio.gather(*(fetch_url(session, url, options, semaphore) for url in urls))
+    session.update_last_used()
+    
+    failed = sum(1 for result in fetched if result["status"] == "error")
+    payload = {
+        "session_id": session.session_id,
+        "urls_total": len(urls),
+        "urls_failed": failed,
+        "max_concurrency": concurrency,
+        "elapsed_ms": round((time.perf_counter() - batch_start) * 1000, 1),
+        "results": dict(zip(urls, fetched))
+    }
+    
+    status = "✅" if failed == 0 else "⚠️"
+    return [TextContent(
+        type="text",
+        text=f"{status} Fetched {len(urls) - failed}/{len(urls)} URLs\n\n{json.dumps(payload, indent=2, ensure_ascii=False)}"
+    )]
+
+
+def format_snapshot_node(node: Dict[str, Any]) -> str:
+    """Format one snapshot element as '- role "name" [ref=eN] key=value ...'"""
+    line = f"- {node['role']}"
+    if node["name"]:
+        line += f" {json.dumps(node['name'], ensure_ascii=False)}"
+    line += f" [ref={node['ref']}]"
+    for key, value in node["props"].items():
+        line += f" {key}={json.dumps(value, ensure_ascii=False)}"
+    return line
+
+
+def diff_snapshots(previous: Dict[str, str], current: Dict[str, str]) -> List[str]:
+    """Line diff of two snapshots keyed by ref: '+' added, '-' removed, '~' changed"""
+    changes = []
+    for ref, line in current.items():
+        if ref not in previous:
+            changes.append(f"+ {line}")
+        elif previous[ref] != line:
+            changes.append(f"~ {line}")
+    for ref, line in previous.items():
+        if ref not in current:
+            changes.append(f"- {line}")
+    return changes
+
+
+@with_session()
+async def handle_snapshot(args: Dict[str, Any], session: BrowserSession, page: Page) -> List[TextContent]:
+    """Snapshot interactive elements of the active tab"""
+    max_nodes = args.get("max_nodes", DEFAULT_SNAPSHOT_MAX_NODES)
+    
+    try:
+        with timed("snapshot"):
+            result = await page.evaluate(SNAPSHOT_JS, [SNAPSHOT_REF_ATTR, args.get("selector"), max_nodes])
+    except Exception as e:
+        return [TextContent(type="text", text=f"Error taking snapshot: {str(e)}")]
+    
+    lines = {node["ref"]: format_snapshot_node(node) for node in result["nodes"]}
+    tree = "\n".join("  " * node["depth"] + lines[node["ref"]] for node in result["nodes"])
+    header = f"Page: {result['title']}\nURL: {result['url']}"
+    footer = f"\n[truncated at {max_nodes} elements]" if result["truncated"] else ""
+    
+    # Refs are only comparable within one document and one subtree
+    scope = (result["url"], args.get("selector"))
+    previous = session.snapshots.get(session.active_tab_id)
+    session.snapshots[session.active_tab_id] = {"scope": scope, "lines": lines}
+    
+    if args.get("diff") and previous and previous["scope"] == scope:
+        changes = diff_snapshots(previous["lines"], lines)
+        body = "\n".join(changes) if changes else "(no changes)"
+        return [TextContent(
+            type="text",
+            text=f"{header}\nChanges since previous snapshot ({len(changes)}):\n\n{body}{footer}"
+        )]
+    
+    note = "\n(no previous snapshot of this page, full snapshot returned)" if args.get("diff") else ""
+    return [TextContent(
+        type="text",
+        text=f"{header}\nElements: {len(lines)}{note}\n\n{tree}{footer}"
+    )]
+
+
+TOOL_HANDLERS = {
+    "create_browser_session": handle_create_session,
+    "navigate": handle_navigate,
+    "interact": handle_interact,
+    "extract_content": handle_extract_content,
+    "execute_script": handle_execute_script,
+    "screenshot": handle_screenshot,
+    "manage_tabs": handle_manage_tabs,
+    "list_sessions": handle_list_sessions,
+    "get_session_info": handle_get_session_info,
+    "close_session": handle_close_session,
+    "get_live_view_url": handle_get_live_view_url,
+    "save_storage_state": handle_save_storage_state,
+    "get_metrics": handle_get_metrics,
+    "run_actions": handle_run_actions,
+    "parallel_fetch": handle_parallel_fetch,
+    "snapshot": handle_snapshot,
+}
+
+
 async def main():
     """Main entry point for the MCP server"""
     from mcp.server.stdio import stdio_server
     
     logger.info("Starting AgentCore Browser MCP Server")
     
+    # Reattach to (or restore) sessions checkpointed by a previous server process,
+    # without holding up the MCP handshake
+    resume_task = asyncio.create_task(resume_sessions())
+    
+    # Optional local Prometheus endpoint
+    metrics_port = os.getenv("BROWSER_METRICS_PORT")
+    metrics_server = await serve_prometheus_metrics(int(metrics_port)) if metrics_port else None
+    
+    probe_task = asyncio.create_task(memory_probe_loop()) if MEMORY_PROBE_INTERVAL > 0 else None
+    
     async with stdio_server() as (read_stream, write_stream):
         await app.run(
             read_stream,
             write_stream,
             app.create_initialization_options()
         )
+    
+    # Let an unfinished resume stop the remote sessions it started
+    resume_task.cancel()
+    await asyncio.gather(resume_task, return_exceptions=True)
+    if probe_task:
+        probe_task.cancel()
+    if metrics_server:
+        metrics_server.close()
 
 
 # Run the server
@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+"""
+Load benchmark for AgentCore Browser MCP Server
+
+Drives N concurrent simulated agents through create/navigate/extract/close
+against a local static site, using the local Chromium backend so no AWS
+account is needed. Reports throughput and per-tool tail latency.
+
+Usage:
+    python benchmark.py --agents 8 --iterations 5
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import threading
+import time
+from functools import partial
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from tempfile import TemporaryDirectory
+
+# Configure the server before importing it, it reads these at import time
+os.environ.setdefault("BROWSER_BACKEND", "local")
+os.environ.setdefault("BROWSER_PERSIST_SESSIONS", "false")
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from agentcore_browser_mcp import call_tool, metrics, sessions
+
+
+def build_site(root: str, pages: int):
+    """Write a small static site of linked article pages"""
+    for index in range(pages):
+        paragraphs = "\n".join(
+            f"<p>Paragraph {p} of page {index}. " + "Lorem ipsum dolor sit amet. " * 20 + "</p>"
+            for p in range(20)
+        )
+        links = " ".join(f'<a href="/page_{(index + n) % pages}.html">Next {n}</a>' for n in range(1, 6))
+        html = f"""<!DOCTYPE html>
+<html>
+<head><title>Benchmark page {index}</title></head>
+<body>
+<nav>{links}</nav>
+<main><h1>Page {index}</h1>{paragraphs}</main>
+<form><input name="q" placeholder="Search"><button type="submit">Go</button></form>
+</body>
+</html>
+"""
+        Path(root, f"page_{index}.html").write_text(html)
+
+
+class QuietHandler(SimpleHTTPRequestHandler):
+    """Static file handler without per-request logging"""
+
+    def log_message(self, format, *args):
+        pass
+
+
+def serve_site(root: str) -> ThreadingHTTPServer:
+    """Serve root on a free localhost port in a background thread"""
+    server = ThreadingHTTPServer(("127.0.0.1", 0), partial(QuietHandler, directory=root))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+async def run_agent(agent: int, iterations: int, base_url: str, pages: int, content_type: str) -> int:
+    """Run create/navigate/extract/close cycles and return the number that failed"""
+    failures = 0
+    for iteration in range(iterations):
+        session_id = f"bench-{agent}-{iteration}"
+        steps = [
+            ("create_browser_session", {"session_id": session_id, "description": "benchmark agent"}),
+            ("navigate", {
+                "session_id": session_id,
+                "url": f"{base_url}/page_{(agent + iteration) % pages}.html",
+                "wait_for": "load"
+            }),
+            ("extract_content", {"session_id": session_id, "content_type": content_type}),
+            ("close_session", {"session_id": session_id}),
+        ]
+        for name, arguments in steps:
+            response = await call_tool(name, arguments)
+            if response[0].text.startswith("Error"):
+                failures += 1
+                print(f"  agent {agent} iteration {iteration}: {name} failed: {response[0].text[:200]}")
+                break
+
+        # Don't leak a browser when a step before close failed
+        if session_id in sessions:
+            await call_tool("close_session", {"session_id": session_id})
+    return failures
+
+
+async def run_benchmark(args) -> dict:
+    """Run all agents concurrently and summarize the collected metrics"""
+    with TemporaryDirectory() as root:
+        build_site(root, args.pages)
+        server = serve_site(root)
+        base_url = f"http://127.0.0.1:{server.server_address[1]}"
+
+        for kind in metrics.values():
+            kind.clear()
+
+        start = time.perf_counter()
+        failures = await asyncio.gather(*(
+            run_agent(agent, args.iterations, base_url, args.pages, args.content_type)
+            for agent in range(args.agents)
+        ))
+        elapsed = time.perf_counter() - start
+        server.shutdown()
+
+    cycles = args.agents * args.iterations
+    tool_calls = sum(histogram.count for histogram in metrics["tool"].values())
+    return {
+        "agents": args.agents,
+        "iterations": args.iterations,
+        "elapsed_s": round(elapsed, 2),
+        "cycles": cycles,
+        "cycles_failed": sum(failures),
+        "cycles_per_s": round(cycles / elapsed, 2),
+        "tool_calls_per_s": round(tool_calls / elapsed, 2),
+        "tool": {name: histogram.summary() for name, histogram in metrics["tool"].items()},
+        "phase": {name: histogram.summary() for name, histogram in metrics["phase"].items()}
+    }
+
+
+def print_report(report: dict):
+    """Print a readable summary"""
+    print(f"\n{'='*60}")
+    print(f"{report['agents']} agents x {report['iterations']} iterations in {report['elapsed_s']}s")
+    print(f"Throughput: {report['cycles_per_s']} cycles/s, {report['tool_calls_per_s']} tool calls/s")
+    print(f"Failed cycles: {report['cycles_failed']}/{report['cycles']}")
+    print(f"{'='*60}")
+    print(f"{'tool':<24}{'count':>7}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'errors':>8}")
+    for name, summary in report["tool"].items():
+        print(
+            f"{name:<24}{summary['count']:>7}{summary['p50']:>10}{summary['p95']:>10}"
+            f"{summary['p99']:>10}{summary['errors']:>8}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the browser MCP server with simulated agents")
+    parser.add_argument("--agents", type=int, default=4, help="Concurrent simulated agents (default: 4)")
+    parser.add_argument("--iterations", type=int, default=3, help="Cycles per agent (default: 3)")
+    parser.add_argument("--pages", type=int, default=20, help="Pages in the static site (default: 20)")
+    parser.add_argument(
+        "--content-type", default="text", choices=["text", "html", "markdown"],
+        help="Content extracted on each cycle (default: text)"
+    )
+    parser.add_argument("--json", help="Also write the full report to this file")
+    args = parser.parse_args()
+
+    report = asyncio.run(run_benchmark(args))
+    print_report(report)
+    if args.json:
+        Path(args.json).write_text(json.dumps(report, indent=2))
+        print(f"\nFull report written to {args.json}")
+
+    sys.exit(0 if report["cycles_failed"] == 0 else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -3,18 +3,21 @@
 Test script for AgentCore Browser MCP Server
 
 This script tests the MCP server with real AWS AgentCore Browser.
-Requires AWS credentials and proper IAM permissions.
+Requires AWS credentials and proper IAM permissions, unless run with
+BROWSER_BACKEND=local to use a local headless Chromium instead.
 """
 
 import asyncio
 import json
 import os
+import re
 import sys
 from pathlib import Path
 
 # Add parent directory to path for imports
 sys.path.insert(0, str(Path(__file__).parent))
 
+import agentcore_browser_mcp
 from agentcore_browser_mcp import (
     app,
     sessions,
@@ -28,7 +31,20 @@ from agentcore_browser_mcp import (
     handle_list_sessions,
     handle_get_session_info,
     handle_close_session,
-    handle_get_live_view_url
+    handle_get_live_view_url,
+    handle_run_actions,
+    handle_save_storage_state,
+    handle_get_metrics,
+    handle_parallel_fetch,
+    handle_snapshot,
+    call_tool,
+    cancel_checkpoint,
+    checkpoint_path,
+    checkpoint_session,
+    probe_session_memory,
+    resume_sessions,
+    storage_profile_path,
+    PERSIST_SESSIONS
 )
 
 
@@ -130,7 +146,12 @@ async def test_list_tools():
             "list_sessions",
             "get_session_info",
             "close_session",
-            "get_live_view_url"
+            "get_live_view_url",
+            "run_actions",
+            "save_storage_state",
+            "get_metrics",
+            "parallel_fetch",
+            "snapshot"
         ]
         
         tool_names = [tool.name for tool in tools]
@@ -182,6 +203,85 @@ async def test_create_session():
         results.add_fail("test_create_session", str(e))
 
 
+async def test_session_checkpoint():
+    """Test that a created session is checkpointed for resume"""
+    try:
+        if "test-session" not in sessions:
+            results.add_skip("test_session_checkpoint", "No test session available")
+            return
+        if not PERSIST_SESSIONS:
+            results.add_skip("test_session_checkpoint", "Checkpoints disabled, set BROWSER_PERSIST_SESSIONS=true")
+            return
+        
+        path = Path(checkpoint_path("test-session"))
+        if not path.exists():
+            results.add_fail("test_session_checkpoint", f"Checkpoint not written to {path}")
+            return
+        
+        checkpoint = json.loads(path.read_text())
+        if checkpoint["aws_session_id"] != sessions["test-session"].aws_session_id or "main" not in checkpoint["tabs"]:
+            results.add_fail("test_session_checkpoint", f"Unexpected checkpoint: {checkpoint}")
+            return
+        
+        results.add_pass("test_session_checkpoint")
+    
+    except Exception as e:
+        results.add_fail("test_session_checkpoint", str(e))
+
+
+async def test_resume_session():
+    """Test that a checkpointed session is usable again at its saved URL after a restart"""
+    try:
+        if not PERSIST_SESSIONS:
+            results.add_skip("test_resume_session", "Checkpoints disabled, set BROWSER_PERSIST_SESSIONS=true")
+            return
+        # Needs a second session, don't start another billed remote one
+        if os.getenv("BROWSER_BACKEND") != "local":
+            results.add_skip("test_resume_session", "Only run with BROWSER_BACKEND=local")
+            return
+        
+        response = await handle_create_session({
+            "session_id": "resume-session",
+            "description": "Resume test session"
+        })
+        if "resume-session" not in sessions:
+            results.add_fail("test_resume_session", f"Session not created: {response[0].text}")
+            return
+        await handle_navigate({"session_id": "resume-session", "url": "https://example.com", "wait_for": "load"})
+        
+        # Simulate a restart: the checkpoint survives, the process's browser and sessions don't
+        session = sessions["resume-session"]
+        await checkpoint_session(session)
+        await cancel_checkpoint(session)
+        del sessions["resume-session"]
+        await session.browser.close()
+        await asyncio.to_thread(session.browser_client.stop)
+        
+        await resume_sessions()
+        if "resume-session" not in sessions:
+            results.add_fail("test_resume_session", "Session not resumed from its checkpoint")
+            return
+        
+        response = await handle_extract_content({
+            "session_id": "resume-session",
+            "content_type": "text",
+            "selector": "h1"
+        })
+        url = sessions["resume-session"].tabs[sessions["resume-session"].active_tab_id].url
+        if "example.com" not in url or "Example Domain" not in response[0].text:
+            results.add_fail("test_resume_session", f"Resumed at {url}: {response[0].text[:200]}")
+            return
+        
+        results.add_pass("test_resume_session")
+    
+    except Exception as e:
+        results.add_fail("test_resume_session", str(e))
+    
+    finally:
+        if "resume-session" in sessions:
+            await handle_close_session({"session_id": "resume-session"})
+
+
 async def test_list_sessions():
     """Test listing sessions"""
     try:
@@ -253,6 +353,32 @@ async def test_navigate():
         results.add_fail("test_navigate", str(e))
 
 
+async def test_navigate_wait_conditions():
+    """Test navigation with selector and DOM-quiet waits"""
+    try:
+        if "test-session" not in sessions:
+            results.add_skip("test_navigate_wait_conditions", "No test session available")
+            return
+        
+        response = await handle_navigate({
+            "session_id": "test-session",
+            "url": "https://example.com",
+            "wait_for_selector": "h1",
+            "dom_quiet_ms": 200,
+            "timeout_ms": 15000
+        })
+        
+        text = response[0].text
+        if "✅" not in text or "selector" not in text or "dom_quiet" not in text:
+            results.add_fail("test_navigate_wait_conditions", f"Unexpected response: {text}")
+            return
+        
+        results.add_pass("test_navigate_wait_conditions")
+    
+    except Exception as e:
+        results.add_fail("test_navigate_wait_conditions", str(e))
+
+
 async def test_extract_content():
     """Test content extraction"""
     try:
@@ -282,6 +408,336 @@ async def test_extract_content():
         results.add_fail("test_extract_content", str(e))
 
 
+async def test_content_cache():
+    """Test that repeated reads of an unchanged page are served from the cache"""
+    try:
+        if "test-session" not in sessions:
+            results.add_skip("test_content_cache", "No test session available")
+            return
+        
+        session = sessions["test-session"]
+        args = {"session_id": "test-session", "content_type": "text", "selector": "p"}
+        
+        first = await handle_extract_content(args)
+        hits = session.cache_hits
+        second = await handle_extract_content(args)
+        
+        if first[0].text != second[0].text or session.cache_hits != hits + 1:
+            results.add_fail("test_content_cache", "Second read was not served from the cache")
+            return
+        
+        await handle_execute_script({
+            "session_id": "test-session",
+            "script": "document.querySelector('p').textContent = 'changed'"
+        })
+        third = await handle_extract_content(args)
+        
+        if "changed" not in third[0].text:
+            results.add_fail("test_content_cache", f"Stale content after DOM change: {third[0].text}")
+            return
+        
+        results.add_pass("test_content_cache")
+    
+    except Exception as e:
+        results.add_fail("test_content_cache", str(e))
+
+
+async def test_run_actions():
+    """Test running a batch of actions"""
+    try:
+        if "test-session" not in sessions:
+            results.add_skip("test_run_actions", "No test session available")
+            return
+        
+        print("  Running action batch...")
+        response = await handle_run_actions({
+            "session_id": "test-session",
+            "steps": [
+                {"action": "navigate", "url": "https://example.com", "wait_for": "load"},
+                {"action": "wait", "selector": "h1"},
+                {"action": "extract", "content_type": "text", "selector": "h1"},
+                {"action": "click", "selector": "#does-not-exist"},
+                {"action": "scroll", "scroll_amount": 100}
+            ]
+        })
+        
+        if len(response) == 0:
+            results.add_fail("test_run_actions", "Empty response")
+            return
+        
+        text = response[0].text
+        payload = json.loads(text[text.index("{"):])
+        if payload["steps"][2].get("result", {}).get("content") != "Example Domain":
+            results.add_fail("test_run_actions", f"Unexpected extract result: {payload['steps'][2]}")
+            return
+        
+        # stop_on_error defaults to true, so the scroll after the failed click must not run
+        if payload["steps_run"] != 4 or not payload["stopped_early"]:
+            results.add_fail("test_run_actions", f"Batch did not stop on error: {text}")
+            return
+        
+        results.add_pass("test_run_actions")
+    
+    except Exception as e:
+        results.add_fail("test_run_actions", str(e))
+
+
+async def test_run_actions_step_timeout():
+    """Test that a step's timeout_ms bounds interactions and ends the batch"""
+    try:
+        if "test-session" not in sessions:
+            results.add_skip("test_run_actions_step_timeout", "No test session available")
+            return
+        
+        response = await handle_run_actions({
+            "session_id": "test-session",
+            "stop_on_error": True,
+            "steps": [
+                {"action": "click", "selector": "#does-not-exist", "timeout_ms": 1000},
+                {"action": "wait", "milliseconds": 100}
+            ]
+        })
+        
+        text = response[0].text
+        payload = json.loads(text[text.index("{"):])
+        step = payload["steps"][0]
+        if step["status"] != "error" or step["elapsed_ms"] > 5000:
+            results.add_fail("test_run_actions_step_timeout", f"Click not bounded by timeout_ms: {step}")
+            return
+        
+        if payload["steps_run"] != 1 or not payload["stopped_early"]:
+            results.add_fail("test_run_actions_step_timeout", f"Batch did not stop on error: {text}")
+            return
+        
+        results.add_pass("test_run_actions_step_timeout")
+    
+    except Exception as e:
+        results.add_fail("test_run_actions_step_timeout", str(e))
+
+
+async def test_parallel_fetch():
+    """Test fetching several URLs concurrently"""
+    try:
+        if "test-session" not in sessions:
+            results.add_skip("test_parallel_fetch", "No test session available")
+            return
+        
+        print("  Fetching URLs in parallel...")
+        response = await handle_parallel_fetch({
+            "session_id": "test-session",
+            "urls": ["https://example.com", "https://www.iana.org/help/example-domains", "https://invalid.invalid"],
+            "content_type": "text",
+            "max_concurrency": 2,
+            "timeout_ms": 15000
+        })
+        
+        text = response[0].text
+        payload = json.loads(text[text.index("{"):])
+        fetched = payload["results"]
+        if fetched["https://example.com"]["status"] != "ok" or "Example Domain" not in fetched["https://example.com"]["content"]:
+            results.add_fail("test_parallel_fetch", f"Unexpected example.com result: {fetched['https://example.com']}")
+            return
+        
+        # A failing URL is reported on its own without affecting the others
+        if fetched["https://invalid.invalid"]["status"] != "error" or payload["urls_failed"] != 1:
+            results.add_fail("test_parallel_fetch", f"Failure not isolated: {text}")
+            return
+        
+        # Temporary tabs must not leak into the session
+        if any(page.is_closed() for page in sessions["test-session"].tabs.values()) or len(sessions["test-session"].context.pages) != len(sessions["test-session"].tabs):
+            results.add_fail("test_parallel_fetch", "Temporary tabs were left open")
+            return
+        
+        results.add_pass("test_parallel_fetch")
+    
+    except Exception as e:
+        results.add_fail("test_parallel_fetch", str(e))
+
+
+async def test_resource_blocking():
+    """Test that a blocking profile aborts images and fonts and honors block_domains"""
+    try:
+        # Needs a second session, don't start another billed remote one
+        if os.getenv("BROWSER_BACKEND") != "local":
+            results.add_skip("test_resource_blocking", "Only run with BROWSER_BACKEND=local")
+            return
+        
+        response = await handle_create_session({
+            "session_id": "blocking-session",
+            "description": "Resource blocking test session",
+            "resource_profile": "media",
+            "block_domains": ["blocked.example"]
+        })
+        if "blocking-session" not in sessions:
+            results.add_fail("test_resource_blocking", f"Session not created: {response[0].text}")
+            return
+        
+        session = sessions["blocking-session"]
+        page = session.tabs["main"]
+        failed = []
+        page.on("requestfailed", lambda request: failed.append((request.resource_type, request.failure)))
+        await page.set_content(
+            '<style>@font-face { font-family: test; src: url(https://example.com/test.woff2); }'
+            ' body { font-family: test; }</style>'
+            '<img src="https://example.com/test.png">'
+            '<script src="https://cdn.blocked.example/test.js"></script>'
+            '<p>Blocked resources</p>'
+        )
+        await page.evaluate("document.fonts.ready.then(() => true)")
+        
+        blocked_types = sorted(resource_type for resource_type, failure in failed if "BLOCKED_BY_CLIENT" in (failure or ""))
+        if blocked_types != ["font", "image", "script"] or session.requests_blocked != 3:
+            results.add_fail(
+                "test_resource_blocking",
+                f"Expected font, image and script blocked, got {blocked_types} ({session.requests_blocked} counted)"
+            )
+            return
+        
+        response = await handle_get_session_info({"session_id": "blocking-session"})
+        if "3 requests blocked" not in response[0].text:
+            results.add_fail("test_resource_blocking", f"Blocked count not reported: {response[0].text}")
+            return
+        
+        results.add_pass("test_resource_blocking")
+    
+    except Exception as e:
+        results.add_fail("test_resource_blocking", str(e))
+    
+    finally:
+        if "blocking-session" in sessions:
+            await handle_close_session({"session_id": "blocking-session"})
+
+
+async def test_snapshot():
+    """Test interactive element snapshots and diffs"""
+    try:
+        if "test-session" not in sessions:
+            results.add_skip("test_snapshot", "No test session available")
+            return
+        
+        await handle_navigate({"session_id": "test-session", "url": "https://example.com", "wait_for": "load"})
+        response = await handle_snapshot({"session_id": "test-session"})
+        
+        text = response[0].text
+        match = re.search(r'- link "[^"]*" \[ref=(e\d+)\]', text)
+        if not match or '- heading "Example Domain"' not in text:
+            results.add_fail("test_snapshot", f"Unexpected snapshot: {text}")
+            return
+        
+        # The ref must resolve to exactly one element
+        page = sessions["test-session"].tabs[sessions["test-session"].active_tab_id]
+        if await page.locator(f'[data-mcp-ref="{match.group(1)}"]').count() != 1:
+            results.add_fail("test_snapshot", f"Ref {match.group(1)} does not resolve")
+            return
+        
+        response = await handle_snapshot({"session_id": "test-session", "diff": True})
+        if "(no changes)" not in response[0].text:
+            results.add_fail("test_snapshot", f"Expected empty diff: {response[0].text}")
+            return
+        
+        results.add_pass("test_snapshot")
+    
+    except Exception as e:
+        results.add_fail("test_snapshot", str(e))
+
+
+async def test_interact_expectations():
+    """Test interact post-conditions awaited in the same call"""
+    try:
+        if "test-session" not in sessions:
+            results.add_skip("test_interact_expectations", "No test session available")
+            return
+        
+        await handle_navigate({"session_id": "test-session", "url": "https://example.com", "wait_for": "load"})
+        response = await handle_interact({
+            "session_id": "test-session",
+            "action": "click",
+            "selector": "a",
+            "expect_navigation": True,
+            "expect_selector": "body",
+            "timeout_ms": 15000
+        })
+        
+        text = response[0].text
+        if "Navigated to:" not in text or "Timings (since action start):" not in text:
+            results.add_fail("test_interact_expectations", f"Unexpected response: {text}")
+            return
+        
+        # A post-condition that never happens is reported as an error
+        response = await handle_interact({
+            "session_id": "test-session",
+            "action": "scroll",
+            "scroll_amount": 10,
+            "expect_selector": "#does-not-exist",
+            "timeout_ms": 500
+        })
+        if not response[0].text.startswith("Error"):
+            results.add_fail("test_interact_expectations", f"Expected failure: {response[0].text}")
+            return
+        
+        # A malformed ref is rejected before it reaches a selector
+        response = await handle_interact({
+            "session_id": "test-session",
+            "action": "click",
+            "ref": 'e1"]',
+            "timeout_ms": 500
+        })
+        if "take a new snapshot" not in response[0].text:
+            results.add_fail("test_interact_expectations", f"Malformed ref not rejected: {response[0].text}")
+            return
+        
+        await handle_navigate({"session_id": "test-session", "url": "https://example.com", "wait_for": "load"})
+        results.add_pass("test_interact_expectations")
+    
+    except Exception as e:
+        results.add_fail("test_interact_expectations", str(e))
+
+
+async def test_extract_content_chunks():
+    """Test paginated content extraction"""
+    try:
+        if "test-session" not in sessions:
+            results.add_skip("test_extract_content_chunks", "No test session available")
+            return
+        
+        response = await handle_extract_content({
+            "session_id": "test-session",
+            "content_type": "html",
+            "max_bytes": 200
+        })
+        
+        text = response[0].text
+        if "next_cursor: " not in text:
+            results.add_fail("test_extract_content_chunks", f"Expected a next_cursor, got: {text}")
+            return
+        
+        next_cursor = int(text.rsplit("next_cursor: ", 1)[1].rstrip("]"))
+        response = await handle_extract_content({
+            "session_id": "test-session",
+            "content_type": "html",
+            "cursor": next_cursor,
+            "max_bytes": 200
+        })
+        
+        if f"[chars {next_cursor}-" not in response[0].text:
+            results.add_fail("test_extract_content_chunks", f"Unexpected second chunk: {response[0].text}")
+            return
+        
+        response = await handle_extract_content({
+            "session_id": "test-session",
+            "content_type": "markdown"
+        })
+        
+        if "# Example Domain" not in response[0].text:
+            results.add_fail("test_extract_content_chunks", f"Unexpected markdown: {response[0].text}")
+            return
+        
+        results.add_pass("test_extract_content_chunks")
+    
+    except Exception as e:
+        results.add_fail("test_extract_content_chunks", str(e))
+
+
 async def test_execute_script():
     """Test JavaScript execution"""
     try:
@@ -349,6 +805,35 @@ async def test_screenshot():
         results.add_fail("test_screenshot", str(e))
 
 
+async def test_screenshot_inline():
+    """Test in-memory screenshot returned inline"""
+    try:
+        if "test-session" not in sessions:
+            results.add_skip("test_screenshot_inline", "No test session available")
+            return
+        
+        response = await handle_screenshot({
+            "session_id": "test-session",
+            "format": "jpeg",
+            "quality": 60,
+            "max_dimension": 400,
+            "inline": True
+        })
+        
+        if len(response) != 2 or response[1].type != "image" or response[1].mimeType != "image/jpeg":
+            results.add_fail("test_screenshot_inline", f"Expected inline JPEG, got: {response}")
+            return
+        
+        if "saved to" in response[0].text:
+            results.add_fail("test_screenshot_inline", "Inline screenshot was written to disk")
+            return
+        
+        results.add_pass("test_screenshot_inline")
+    
+    except Exception as e:
+        results.add_fail("test_screenshot_inline", str(e))
+
+
 async def test_manage_tabs():
     """Test tab management"""
     try:
@@ -383,12 +868,158 @@ async def test_manage_tabs():
             results.add_fail("test_manage_tabs", "New tab not in list")
             return
         
+        # Default ids keep counting up, also after tabs were closed
+        default_ids = []
+        for _ in range(2):
+            response = await handle_manage_tabs({"session_id": "test-session", "action": "new_tab"})
+            match = re.search(r"Created new tab: (\S+)", response[0].text)
+            if not match:
+                results.add_fail("test_manage_tabs", f"Default tab not created: {response[0].text}")
+                return
+            default_ids.append(match.group(1))
+            await handle_manage_tabs({"session_id": "test-session", "action": "close_tab", "tab_id": match.group(1)})
+        if default_ids[0] == default_ids[1]:
+            results.add_fail("test_manage_tabs", f"Default tab id reused: {default_ids}")
+            return
+        await handle_manage_tabs({"session_id": "test-session", "action": "switch_tab", "tab_id": "tab2"})
+        
         results.add_pass("test_manage_tabs")
     
     except Exception as e:
         results.add_fail("test_manage_tabs", str(e))
 
 
+async def test_tab_limit_and_recycling():
+    """Test LRU eviction at BROWSER_MAX_TABS and recycling of tabs over the heap budget"""
+    max_tabs = agentcore_browser_mcp.MAX_TABS_PER_SESSION
+    heap_budget = agentcore_browser_mcp.TAB_HEAP_BUDGET_MB
+    try:
+        # Needs a second session, don't start another billed remote one
+        if os.getenv("BROWSER_BACKEND") != "local":
+            results.add_skip("test_tab_limit_and_recycling", "Only run with BROWSER_BACKEND=local")
+            return
+        
+        agentcore_browser_mcp.MAX_TABS_PER_SESSION = 3
+        response = await handle_create_session({
+            "session_id": "tabs-session",
+            "description": "Tab limit test session"
+        })
+        if "tabs-session" not in sessions:
+            results.add_fail("test_tab_limit_and_recycling", f"Session not created: {response[0].text}")
+            return
+        session = sessions["tabs-session"]
+        
+        # Use order main, t1, t2, then touch main so t1 is the least recently used
+        for tab_id in ("t1", "t2"):
+            await handle_manage_tabs({"session_id": "tabs-session", "action": "new_tab", "tab_id": tab_id})
+            await asyncio.sleep(0.01)
+        await handle_manage_tabs({"session_id": "tabs-session", "action": "switch_tab", "tab_id": "main"})
+        await asyncio.sleep(0.01)
+        await handle_manage_tabs({"session_id": "tabs-session", "action": "switch_tab", "tab_id": "t2"})
+        
+        response = await handle_manage_tabs({"session_id": "tabs-session", "action": "new_tab", "tab_id": "t3"})
+        if sorted(session.tabs) != ["main", "t2", "t3"] or session.active_tab_id != "t3" or session.tabs_evicted != 1:
+            results.add_fail(
+                "test_tab_limit_and_recycling",
+                f"Expected t1 evicted and t3 active, got {sorted(session.tabs)} (active {session.active_tab_id}): {response[0].text}"
+            )
+            return
+        
+        # Every tab is over a zero budget, only the inactive ones may be recycled
+        agentcore_browser_mcp.TAB_HEAP_BUDGET_MB = 0
+        pages = dict(session.tabs)
+        await probe_session_memory(session)
+        recycled = sorted(tab_id for tab_id, page in pages.items() if session.tabs.get(tab_id) is not page)
+        if recycled != ["main", "t2"] or session.tabs_recycled != 2 or session.active_tab_id != "t3":
+            results.add_fail(
+                "test_tab_limit_and_recycling",
+                f"Expected main and t2 recycled, got {recycled} ({session.tabs_recycled} counted)"
+            )
+            return
+        
+        results.add_pass("test_tab_limit_and_recycling")
+    
+    except Exception as e:
+        results.add_fail("test_tab_limit_and_recycling", str(e))
+    
+    finally:
+        agentcore_browser_mcp.MAX_TABS_PER_SESSION = max_tabs
+        agentcore_browser_mcp.TAB_HEAP_BUDGET_MB = heap_budget
+        if "tabs-session" in sessions:
+            await handle_close_session({"session_id": "tabs-session"})
+
+
+async def test_popup_tracking():
+    """Test that pages opened by a tab are tracked and forgotten when they close"""
+    try:
+        if "test-session" not in sessions:
+            results.add_skip("test_popup_tracking", "No test session available")
+            return
+        
+        session = sessions["test-session"]
+        before = session.popup_count
+        await handle_execute_script({
+            "session_id": "test-session",
+            "script": "window.__popup = window.open('https://example.com'); true"
+        })
+        
+        # Popup registration happens in a background task
+        for _ in range(50):
+            if session.popup_count > before:
+                break
+            await asyncio.sleep(0.1)
+        
+        tab_id = f"popup_{session.popup_count}"
+        if tab_id not in session.tabs:
+            results.add_fail("test_popup_tracking", "Popup was not registered as a tab")
+            return
+        
+        await handle_execute_script({"session_id": "test-session", "script": "window.__popup.close(); true"})
+        for _ in range(50):
+            if tab_id not in session.tabs:
+                break
+            await asyncio.sleep(0.1)
+        
+        if tab_id in session.tabs:
+            results.add_fail("test_popup_tracking", "Closed popup is still tracked")
+            return
+        
+        results.add_pass("test_popup_tracking")
+    
+    except Exception as e:
+        results.add_fail("test_popup_tracking", str(e))
+
+
+async def test_save_storage_state():
+    """Test saving a storage-state profile"""
+    try:
+        if "test-session" not in sessions:
+            results.add_skip("test_save_storage_state", "No test session available")
+            return
+        
+        response = await handle_save_storage_state({
+            "session_id": "test-session",
+            "profile": "test-profile"
+        })
+        
+        text = response[0].text
+        path = Path(storage_profile_path("test-profile"))
+        if "✅" not in text or not path.exists():
+            results.add_fail("test_save_storage_state", f"Unexpected response: {text}")
+            return
+        
+        state = json.loads(path.read_text())
+        path.unlink()
+        if "cookies" not in state or "origins" not in state:
+            results.add_fail("test_save_storage_state", f"Unexpected storage state: {state}")
+            return
+        
+        results.add_pass("test_save_storage_state")
+    
+    except Exception as e:
+        results.add_fail("test_save_storage_state", str(e))
+
+
 async def test_get_live_view_url():
     """Test getting Live View URL"""
     try:
@@ -415,6 +1046,63 @@ async def test_get_live_view_url():
         results.add_fail("test_get_live_view_url", str(e))
 
 
+async def test_get_metrics():
+    """Test latency metrics collected through call_tool"""
+    try:
+        if "test-session" not in sessions:
+            results.add_skip("test_get_metrics", "No test session available")
+            return
+        
+        await call_tool("extract_content", {"session_id": "test-session", "content_type": "text"})
+        response = await handle_get_metrics({})
+        
+        text = response[0].text
+        payload = json.loads(text[text.index("{"):])
+        if "extract_content" not in payload["tool"] or "test-session" not in payload["session"]:
+            results.add_fail("test_get_metrics", f"Missing tool/session metrics: {text}")
+            return
+        
+        if "control_plane_start" not in payload["phase"] or "cdp_connect" not in payload["phase"]:
+            results.add_fail("test_get_metrics", f"Missing phase metrics: {text}")
+            return
+        
+        results.add_pass("test_get_metrics")
+    
+    except Exception as e:
+        results.add_fail("test_get_metrics", str(e))
+
+
+async def test_argument_validation():
+    """Test that call_tool rejects arguments that don't match the tool schema"""
+    try:
+        response = await call_tool("navigate", {"session_id": "test-session"})
+        if "arguments.url is required" not in response[0].text:
+            results.add_fail("test_argument_validation", f"Missing field not reported: {response[0].text}")
+            return
+        
+        response = await call_tool("interact", {"session_id": "test-session", "action": "hover"})
+        if "arguments.action must be one of" not in response[0].text:
+            results.add_fail("test_argument_validation", f"Bad enum not reported: {response[0].text}")
+            return
+        
+        response = await call_tool("extract_content", {
+            "session_id": "test-session", "content_type": "text", "max_bytes": 0
+        })
+        if "arguments.max_bytes must be at least 1" not in response[0].text:
+            results.add_fail("test_argument_validation", f"Bad minimum not reported: {response[0].text}")
+            return
+        
+        response = await call_tool("navigate", {"session_id": "missing-session", "url": "https://example.com"})
+        if "not found" not in response[0].text:
+            results.add_fail("test_argument_validation", f"Unknown session not reported: {response[0].text}")
+            return
+        
+        results.add_pass("test_argument_validation")
+    
+    except Exception as e:
+        results.add_fail("test_argument_validation", str(e))
+
+
 async def test_close_session():
     """Test session cleanup"""
     try:
@@ -441,6 +1129,10 @@ async def test_close_session():
             results.add_fail("test_close_session", "Session still in sessions dict")
             return
         
+        if Path(checkpoint_path("test-session")).exists():
+            results.add_fail("test_close_session", "Checkpoint not removed")
+            return
+        
         results.add_pass("test_close_session")
     
     except Exception as e:
@@ -456,7 +1148,9 @@ async def run_all_tests():
     
     # Check prerequisites
     print("Checking prerequisites...")
-    if not check_aws_credentials():
+    if os.getenv("BROWSER_BACKEND") == "local":
+        print("✓ Using local Chromium backend, AWS credentials not needed")
+    elif not check_aws_credentials():
         print("\n❌ AWS credentials not configured. Cannot run tests.")
         print("   Please run: aws configure")
         return False
@@ -469,15 +1163,32 @@ async def run_all_tests():
     print()
     
     await test_list_tools()
+    await test_argument_validation()
     await test_create_session()
+    await test_session_checkpoint()
+    await test_resume_session()
     await test_list_sessions()
     await test_get_session_info()
     await test_navigate()
+    await test_navigate_wait_conditions()
     await test_extract_content()
+    await test_extract_content_chunks()
+    await test_content_cache()
+    await test_run_actions()
+    await test_run_actions_step_timeout()
+    await test_parallel_fetch()
+    await test_resource_blocking()
+    await test_snapshot()
+    await test_interact_expectations()
     await test_execute_script()
     await test_screenshot()
+    await test_screenshot_inline()
     await test_manage_tabs()
+    await test_tab_limit_and_recycling()
+    await test_popup_tracking()
+    await test_save_storage_state()
     await test_get_live_view_url()
+    await test_get_metrics()
     await test_close_session()
     
     # Print summary
@@ -88,7 +88,7 @@ def pack_document(input_dir, output_file, validate=False):
 
 
 def validate_document(doc_path):
-    """Validate document by converting to HTML with soffice."""
+    """Validate document by converting to HTML with pooled soffice, or a one-shot soffice outside the pptx tree."""
     # Determine the correct filter based on file extension
     match doc_path.suffix.lower():
         case ".docx":
@@ -100,29 +100,13 @@ def validate_document(doc_path):
 
     with tempfile.TemporaryDirectory() as temp_dir:
         try:
-            result = subprocess.run(
-                [
-                    "soffice",
-                    "--headless",
-                    "--convert-to",
-                    filter_name,
-                    "--outdir",
-                    temp_dir,
-                    str(doc_path),
-                ],
-                capture_output=True,
-                timeout=10,
-                text=True,
-            )
-            if not (Path(temp_dir) / f"{doc_path.stem}.html").exists():
-                error_msg = result.stderr.strip() or "Document validation failed"
-                print(f"Validation error: {error_msg}", file=sys.stderr)
-                return False
+            convert = load_pooled_converter() or convert_with_soffice
+            convert(doc_path, temp_dir, filter_name, timeout=10)
             return True
         except FileNotFoundError:
             print("Warning: soffice not found. Skipping validation.", file=sys.stderr)
             return True
-        except subprocess.TimeoutExpired:
+        except (subprocess.TimeoutExpired, TimeoutError):
             print("Validation error: Timeout during conversion", file=sys.stderr)
             return False
         except Exception as e:
@@ -130,6 +114,38 @@ def validate_document(doc_path):
             return False
 
 
+def load_pooled_converter():
+    """The pooled LibreOffice converter from the pptx scripts, or None outside that tree."""
+    scripts_dir = str(Path(__file__).resolve().parents[2] / "scripts")
+    if scripts_dir not in sys.path:
+        sys.path.insert(0, scripts_dir)
+    try:
+        from office_pool import convert_document
+    except ImportError:
+        return None
+    return convert_document
+
+
+def convert_with_soffice(doc_path, output_dir, convert_to, timeout):
+    """Convert a document with a one-shot soffice process."""
+    result = subprocess.run(
+        [
+            "soffice",
+            "--headless",
+            "--convert-to",
+            convert_to,
+            "--outdir",
+            str(output_dir),
+            str(doc_path),
+        ],
+        capture_output=True,
+        timeout=timeout,
+        text=True,
+    )
+    if not (Path(output_dir) / f"{doc_path.stem}.html").exists():
+        raise RuntimeError(result.stderr.strip() or "Document validation failed")
+
+
 def condense_xml(xml_file):
     """Strip unnecessary whitespace and remove comments."""
     with open(xml_file, "r", encoding="utf-8") as f:
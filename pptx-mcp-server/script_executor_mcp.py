@@ -5,6 +5,7 @@ Executes Python and JavaScript scripts for PPTX manipulation
 """
 
 import asyncio
+import base64
 import json
 import subprocess
 import sys
@@ -12,7 +13,7 @@ from pathlib import Path
 from typing import Any
 
 from mcp.server import Server
-from mcp.types import Tool, TextContent
+from mcp.types import Tool, TextContent, ImageContent
 
 
 # Script definitions
@@ -125,10 +126,45 @@ SCRIPTS = {
                 "columns": {
                     "type": "integer",
                     "description": "Number of columns (3-6, default: 5)"
+                },
+                "slides": {
+                    "type": "string",
+                    "description": "Only render these slides, 0-based (optional, e.g. '3,7-9')"
+                },
+                "inline": {
+                    "type": "boolean",
+                    "description": "Return grids as inline images instead of writing files (optional, default: false)"
                 }
             },
             "required": ["input_file"]
         }
+    },
+    "slide_diff": {
+        "path": "scripts/slide_diff.py",
+        "interpreter": "python",
+        "description": "Find slides that changed visually between two versions of a presentation",
+        "parameters": {
+            "type": "object",
+            "properties": {
+                "before_file": {
+                    "type": "string",
+                    "description": "Original .pptx file path"
+                },
+                "after_file": {
+                    "type": "string",
+                    "description": "Edited .pptx file path"
+                },
+                "output_prefix": {
+                    "type": "string",
+                    "description": "Write a grid of the changed slides with differences highlighted (optional)"
+                },
+                "threshold": {
+                    "type": "integer",
+                    "description": "Channel difference (0-255) ignored as noise (optional, default: 24)"
+                }
+            },
+            "required": ["before_file", "after_file"]
+        }
     }
 }
 
@@ -151,8 +187,40 @@ async def list_tools() -> list[Tool]:
     return tools
 
 
+async def render_thumbnails_inline(arguments: dict) -> list[TextContent | ImageContent]:
+    """Render thumbnail grids in-process and return them as inline images."""
+    scripts_dir = str(Path(__file__).parent / "scripts")
+    if scripts_dir not in sys.path:
+        sys.path.insert(0, scripts_dir)
+    import thumbnail
+
+    slides = None
+    if "slides" in arguments:
+        slides = thumbnail.parse_slide_selection(arguments["slides"])
+
+    def progress(message):
+        # stdout carries the MCP protocol here
+        print(message, file=sys.stderr)
+
+    grids = await asyncio.to_thread(
+        thumbnail.render_grids,
+        arguments["input_file"],
+        arguments.get("columns", thumbnail.DEFAULT_COLS),
+        slides,
+        progress=progress
+    )
+    content = [TextContent(type="text", text=f"Rendered {len(grids)} thumbnail grid(s)")]
+    for grid in grids:
+        content.append(ImageContent(
+            type="image",
+            data=base64.b64encode(grid).decode("ascii"),
+            mimeType="image/jpeg"
+        ))
+    return content
+
+
 @app.call_tool()
-async def call_tool(name: str, arguments: Any) -> list[TextContent]:
+async def call_tool(name: str, arguments: Any) -> list[TextContent | ImageContent]:
     """Execute a PPTX manipulation script."""
     if name not in SCRIPTS:
         return [TextContent(
@@ -212,11 +280,28 @@ async def call_tool(name: str, arguments: Any) -> list[TextContent]:
             ]
         
         elif name == "thumbnail":
+            if arguments.get("inline"):
+                return await render_thumbnails_inline(arguments)
+
             cmd = [interpreter, str(script_path), arguments["input_file"]]
             if "output_prefix" in arguments:
                 cmd.append(arguments["output_prefix"])
             if "columns" in arguments:
                 cmd.extend(["--cols", str(arguments["columns"])])
+            if "slides" in arguments:
+                cmd.extend(["--slides", arguments["slides"]])
+        
+        elif name == "slide_diff":
+            cmd = [
+                interpreter,
+                str(script_path),
+                arguments["before_file"],
+                arguments["after_file"]
+            ]
+            if "output_prefix" in arguments:
+                cmd.extend(["--grid", arguments["output_prefix"]])
+            if "threshold" in arguments:
+                cmd.extend(["--threshold", str(arguments["threshold"])])
         
         else:
             return [TextContent(
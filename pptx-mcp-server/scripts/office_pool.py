@@ -0,0 +1,444 @@
+#!/usr/bin/env python3
+"""
+Convert documents with a pool of long-running headless LibreOffice instances.
+
+Starting soffice dominates conversion time, and concurrent `soffice --convert-to`
+runs that share a user profile corrupt each other. This module keeps up to
+POOL_SIZE LibreOffice instances listening on localhost sockets, each with its own
+profile, and submits conversions to them over UNO. A slot is held under an
+exclusive file lock for the length of one conversion, so parallel jobs, including
+jobs from separate processes, never share an instance or a profile.
+
+Instances are started on demand and keep running after the calling process exits,
+so later conversions are warm. Each slot records its instance's pid, start time
+and profile, and an instance is only reused or killed when the pid still matches
+them, so a reused pid never takes down an unrelated process. When LibreOffice's
+Python bindings (the `uno` module) are not importable, conversions fall back to a
+one-shot `soffice --convert-to` that still uses the slot's private profile.
+Without POSIX file locks (Windows) there is no pool and every conversion is a
+one-shot run in a temporary profile.
+
+Usage:
+    python office_pool.py input.pptx output_dir [--to pdf]
+    python office_pool.py --status
+    python office_pool.py --shutdown
+
+Environment:
+    PPTX_OFFICE_POOL_DIR   State and profile directory (default: ~/.cache/pptx-mcp-server/office-pool)
+    PPTX_OFFICE_POOL_SIZE  Number of instances (default: 2)
+    PPTX_OFFICE_POOL_PORT  Port of the first instance, others follow (default: 2202)
+"""
+
+import argparse
+import json
+import os
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+try:
+    import uno
+    from com.sun.star.beans import PropertyValue
+except ImportError:
+    uno = None
+
+# Constants
+POOL_DIR = Path(
+    os.environ.get(
+        "PPTX_OFFICE_POOL_DIR", Path.home() / ".cache" / "pptx-mcp-server" / "office-pool"
+    )
+)
+POOL_SIZE = max(1, int(os.environ.get("PPTX_OFFICE_POOL_SIZE", "2")))
+BASE_PORT = int(os.environ.get("PPTX_OFFICE_POOL_PORT", "2202"))
+STARTUP_TIMEOUT = 60  # Seconds to wait for a new instance to accept connections
+HANDSHAKE_TIMEOUT = 5  # Seconds allowed for a UNO handshake with a running instance
+DEFAULT_TIMEOUT = 120  # Seconds allowed for one conversion, waiting for a slot included
+SLOT_POLL_INTERVAL = 0.1  # Seconds between attempts to take a slot while all are busy
+
+# Export filters used when the target names only an extension
+PDF_FILTERS = {
+    ".pptx": "impress_pdf_Export",
+    ".ppt": "impress_pdf_Export",
+    ".odp": "impress_pdf_Export",
+    ".docx": "writer_pdf_Export",
+    ".doc": "writer_pdf_Export",
+    ".odt": "writer_pdf_Export",
+    ".xlsx": "calc_pdf_Export",
+    ".xls": "calc_pdf_Export",
+    ".ods": "calc_pdf_Export",
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Convert documents with pooled headless LibreOffice instances."
+    )
+    parser.add_argument("input", nargs="?", help="Document to convert")
+    parser.add_argument("output_dir", nargs="?", default=".", help="Output directory (default: .)")
+    parser.add_argument(
+        "--to",
+        default="pdf",
+        help="Target as for soffice --convert-to, e.g. pdf or html:impress_html_Export (default: pdf)",
+    )
+    parser.add_argument("--status", action="store_true", help="Show pool instances")
+    parser.add_argument("--shutdown", action="store_true", help="Stop all pool instances")
+    args = parser.parse_args()
+
+    if args.status:
+        for slot in pool_status():
+            state = "running" if slot["alive"] else "stopped"
+            print(f"Slot {slot['slot']}: {state} (pid {slot.get('pid')}, port {slot['port']})")
+        return
+
+    if args.shutdown:
+        stopped = shutdown_pool()
+        print(f"Stopped {stopped} instance(s)")
+        return
+
+    if not args.input:
+        parser.error("input is required unless --status or --shutdown is given")
+
+    try:
+        start = time.perf_counter()
+        output_path = convert_document(args.input, args.output_dir, args.to)
+        print(f"Converted to {output_path} in {time.perf_counter() - start:.2f}s")
+    except Exception as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+
+
+def convert_document(input_path, output_dir, convert_to="pdf", timeout=DEFAULT_TIMEOUT):
+    """Convert a document and return the path of the converted file.
+
+    convert_to takes the same form as soffice --convert-to: an extension,
+    optionally followed by ':' and an export filter name.
+    """
+    input_path = Path(input_path)
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+
+    extension, _, filter_name = convert_to.partition(":")
+    if not filter_name and extension == "pdf":
+        filter_name = PDF_FILTERS.get(input_path.suffix.lower(), "")
+    output_path = output_dir / f"{input_path.stem}.{extension}"
+
+    if fcntl is None:
+        # Slots can't be locked, don't share a profile with anyone
+        with tempfile.TemporaryDirectory() as profile:
+            convert_with_cli(Path(profile), input_path, output_dir, convert_to, timeout)
+    else:
+        deadline = time.monotonic() + timeout
+        with acquire_slot(deadline) as index:
+            remaining = max(deadline - time.monotonic(), 1)
+            if uno is None or not filter_name:
+                convert_with_cli(
+                    slot_dir(index) / "cli-profile", input_path, output_dir, convert_to, remaining
+                )
+            else:
+                port = ensure_instance(index)
+                convert_with_timeout(index, port, input_path, output_path, filter_name, remaining)
+
+    if not output_path.exists():
+        raise RuntimeError(f"Conversion of {input_path.name} to {extension} produced no output")
+    return output_path
+
+
+def slot_dir(index):
+    """State directory of one pool slot."""
+    path = POOL_DIR / f"slot-{index}"
+    path.mkdir(parents=True, exist_ok=True)
+    return path
+
+
+@contextmanager
+def acquire_slot(deadline=None):
+    """Hold one pool slot exclusively, taking the first that becomes idle.
+
+    deadline is a time.monotonic() value after which waiting for a busy pool
+    raises TimeoutError, by default it waits indefinitely.
+    """
+    while True:
+        for index in range(POOL_SIZE):
+            lock_file = open(slot_dir(index) / "lock", "w")
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                lock_file.close()
+                continue
+            try:
+                yield index
+            finally:
+                lock_file.close()
+            return
+
+        if deadline is not None and time.monotonic() >= deadline:
+            raise TimeoutError(f"All {POOL_SIZE} conversion slots stayed busy")
+        time.sleep(SLOT_POLL_INTERVAL)
+
+
+def profile_argument(index):
+    """soffice argument selecting the private profile of a slot's instance."""
+    return f"-env:UserInstallation={(slot_dir(index) / 'profile').resolve().as_uri()}"
+
+
+def read_instance(index):
+    """Recorded pid, start time and port of a slot's instance, or None."""
+    try:
+        return json.loads((slot_dir(index) / "instance.json").read_text())
+    except (FileNotFoundError, ValueError):
+        return None
+
+
+def port_open(port):
+    """Whether something accepts connections on a localhost port."""
+    try:
+        with socket.create_connection(("127.0.0.1", port), timeout=0.5):
+            return True
+    except OSError:
+        return False
+
+
+def process_identity(pid):
+    """Start time and command line of a process, or None if there is none."""
+    proc = Path("/proc") / str(pid)
+    if Path("/proc/self/stat").exists():
+        try:
+            stat = (proc / "stat").read_text()
+            command = (proc / "cmdline").read_bytes().replace(b"\0", b" ").decode(errors="replace")
+        except OSError:
+            return None
+        # Start time in clock ticks since boot, the 22nd field, counted after the
+        # parenthesized command name which may itself contain spaces
+        return stat.rsplit(")", 1)[1].split()[19], command
+
+    try:
+        result = subprocess.run(
+            ["ps", "-ww", "-o", "lstart=", "-o", "args=", "-p", str(pid)],
+            capture_output=True,
+            text=True,
+            timeout=5,
+            env={**os.environ, "LC_ALL": "C"},
+        )
+    except (OSError, subprocess.TimeoutExpired):
+        return None
+    fields = result.stdout.strip().split(None, 5)
+    if result.returncode != 0 or len(fields) < 6:
+        return None
+    # lstart is five fields, e.g. "Mon Oct 19 10:00:00 2026"
+    return " ".join(fields[:5]), fields[5]
+
+
+def owns_instance(index, info):
+    """Whether the recorded pid is still the instance this pool started for the slot.
+
+    After the instance died or the machine rebooted, the pid may belong to an
+    unrelated process. Ours runs with the slot's profile argument and has the
+    recorded start time (soffice execs its oosplash launcher under the same pid).
+    """
+    identity = process_identity(info["pid"])
+    if identity is None:
+        return False
+    started, command = identity
+    if "started" in info and started != info["started"]:
+        return False
+    return profile_argument(index) in command
+
+
+def connect_context(port):
+    """UNO component context of the instance listening on a localhost port."""
+    local_context = uno.getComponentContext()
+    resolver = local_context.ServiceManager.createInstanceWithContext(
+        "com.sun.star.bridge.UnoUrlResolver", local_context
+    )
+    return resolver.resolve(
+        f"uno:socket,host=127.0.0.1,port={port};urp;StarOffice.ComponentContext"
+    )
+
+
+def uno_ready(port, timeout=HANDSHAKE_TIMEOUT):
+    """Whether LibreOffice, not just any program, answers a UNO handshake on a port."""
+    if not port_open(port):
+        return False
+    answered = []
+
+    def run():
+        try:
+            connect_context(port)
+            answered.append(True)
+        except Exception:
+            pass
+
+    # A foreign service may never answer the handshake at all
+    worker = threading.Thread(target=run, daemon=True)
+    worker.start()
+    worker.join(timeout)
+    return bool(answered)
+
+
+def ensure_instance(index):
+    """Return the port of the slot's running instance, starting one if needed."""
+    info = read_instance(index)
+    if info and owns_instance(index, info) and uno_ready(info["port"]):
+        return info["port"]
+    stop_instance(index)
+
+    port = BASE_PORT + index
+    if port_open(port):
+        raise RuntimeError(
+            f"Port {port} is in use by another program, set PPTX_OFFICE_POOL_PORT to a free range"
+        )
+
+    process = subprocess.Popen(
+        [
+            "soffice",
+            "--headless",
+            "--invisible",
+            "--nologo",
+            "--norestore",
+            "--nodefault",
+            "--nolockcheck",
+            profile_argument(index),
+            f"--accept=socket,host=127.0.0.1,port={port};urp;StarOffice.ComponentContext",
+        ],
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+        # Keep the instance running after this process exits
+        start_new_session=True,
+    )
+
+    deadline = time.monotonic() + STARTUP_TIMEOUT
+    while not uno_ready(port):
+        if process.poll() is not None:
+            raise RuntimeError(f"LibreOffice exited during startup (code {process.returncode})")
+        if time.monotonic() > deadline:
+            os.killpg(process.pid, signal.SIGKILL)
+            raise RuntimeError("Timed out waiting for LibreOffice to start")
+        time.sleep(0.1)
+
+    identity = process_identity(process.pid)
+    (slot_dir(index) / "instance.json").write_text(
+        json.dumps({"pid": process.pid, "started": identity and identity[0], "port": port})
+    )
+    return port
+
+
+def stop_instance(index):
+    """Kill a slot's instance, if it is still ours, and forget it."""
+    info = read_instance(index)
+    (slot_dir(index) / "instance.json").unlink(missing_ok=True)
+    if info and owns_instance(index, info):
+        # soffice is a launcher, kill its whole session to reach soffice.bin
+        try:
+            os.killpg(info["pid"], signal.SIGKILL)
+        except ProcessLookupError:
+            pass
+        return True
+    return False
+
+
+def properties(**values):
+    """UNO PropertyValue tuple from keyword arguments."""
+    result = []
+    for name, value in values.items():
+        prop = PropertyValue()
+        prop.Name = name
+        prop.Value = value
+        result.append(prop)
+    return tuple(result)
+
+
+def convert_with_uno(port, input_path, output_path, filter_name):
+    """Load a document into a running instance and export it."""
+    context = connect_context(port)
+    desktop = context.ServiceManager.createInstanceWithContext("com.sun.star.frame.Desktop", context)
+
+    document = desktop.loadComponentFromURL(
+        input_path.resolve().as_uri(), "_blank", 0, properties(Hidden=True, ReadOnly=True)
+    )
+    if document is None:
+        raise RuntimeError(f"LibreOffice could not open {input_path.name}")
+    try:
+        document.storeToURL(
+            output_path.resolve().as_uri(), properties(FilterName=filter_name, Overwrite=True)
+        )
+    finally:
+        document.close(True)
+
+
+def convert_with_timeout(index, port, input_path, output_path, filter_name, timeout):
+    """Run a UNO conversion, killing the instance if it hangs."""
+    errors = []
+
+    def run():
+        try:
+            convert_with_uno(port, input_path, output_path, filter_name)
+        except Exception as e:
+            errors.append(e)
+
+    worker = threading.Thread(target=run, daemon=True)
+    worker.start()
+    worker.join(timeout)
+    if worker.is_alive():
+        # A hung instance would block every later job on this slot
+        stop_instance(index)
+        raise TimeoutError(f"Conversion of {input_path.name} timed out after {timeout}s")
+    if errors:
+        raise RuntimeError(f"Conversion of {input_path.name} failed: {errors[0]}")
+
+
+def convert_with_cli(profile, input_path, output_dir, convert_to, timeout):
+    """One-shot soffice conversion using a private profile directory."""
+    result = subprocess.run(
+        [
+            "soffice",
+            "--headless",
+            f"-env:UserInstallation={profile.resolve().as_uri()}",
+            "--convert-to",
+            convert_to,
+            "--outdir",
+            str(output_dir),
+            str(input_path),
+        ],
+        capture_output=True,
+        timeout=timeout,
+        text=True,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip() or f"soffice exited with code {result.returncode}")
+
+
+def pool_status():
+    """Describe each slot's instance."""
+    slots = []
+    for index in range(POOL_SIZE):
+        info = read_instance(index) or {}
+        alive = bool(info) and owns_instance(index, info) and port_open(info["port"])
+        slots.append(
+            {
+                "slot": index,
+                "port": info.get("port", BASE_PORT + index),
+                "pid": info.get("pid"),
+                "alive": alive,
+            }
+        )
+    return slots
+
+
+def shutdown_pool():
+    """Stop every instance and return how many were running."""
+    return sum(1 for index in range(POOL_SIZE) if stop_instance(index))
+
+
+if __name__ == "__main__":
+    main()
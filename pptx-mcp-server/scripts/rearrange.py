@@ -7,16 +7,46 @@ Usage:
 
 This will create output.pptx using slides from template.pptx in the specified order.
 Slides can be repeated (e.g., 34 appears twice).
+
+The final slide list is planned in one pass and written at once, so time grows
+linearly with the sequence length. Repeated slides are duplicated by cloning
+the slide part, sharing its layout and media with the original.
 """
 
 import argparse
+import re
 import shutil
 import sys
+from collections import Counter
 from copy import deepcopy
 from pathlib import Path
 
-import six
 from pptx import Presentation
+from pptx.opc.constants import RELATIONSHIP_TYPE as RT
+from pptx.opc.package import XmlPart
+from pptx.opc.packuri import PackURI
+from pptx.oxml.ns import qn
+from pptx.oxml.xmlchemy import OxmlElement
+
+# The slide list and relationships are edited below python-pptx's public API
+# (Presentation.part._element.sldIdLst and _Relationships._add_relationship)
+# to keep duplication linear, checked against python-pptx 1.0.2.
+
+# Relationships whose targets duplicates share instead of copying: the layout
+# and notes master, slides linked to and media, none of which change when a
+# duplicate is edited. Parts owned by the slide (notes, charts, embedded
+# objects, ...) are cloned so each duplicate can be edited on its own.
+SHARED_RELTYPES = {
+    RT.SLIDE_LAYOUT,
+    RT.NOTES_MASTER,
+    RT.SLIDE,
+    RT.IMAGE,
+    RT.MEDIA,
+    RT.VIDEO,
+    RT.AUDIO,
+}
+
+RELATIONSHIP_NAMESPACE = "{http://schemas.openxmlformats.org/officeDocument/2006/relationships}"
 
 
 def main():
@@ -72,78 +102,84 @@ Note: Slide indices are 0-based (first slide is 0, second is 1, etc.)
         sys.exit(1)
 
 
-def duplicate_slide(pres, index):
-    """Duplicate a slide in the presentation."""
-    source = pres.slides[index]
-
-    # Use source's layout to preserve formatting
-    new_slide = pres.slides.add_slide(source.slide_layout)
-
-    # Collect all image and media relationships from the source slide
-    image_rels = {}
-    for rel_id, rel in six.iteritems(source.part.rels):
-        if "image" in rel.reltype or "media" in rel.reltype:
-            image_rels[rel_id] = rel
-
-    # CRITICAL: Clear placeholder shapes to avoid duplicates
-    for shape in new_slide.shapes:
-        sp = shape.element
-        sp.getparent().remove(sp)
-
-    # Copy all shapes from source
-    for shape in source.shapes:
-        el = shape.element
-        new_el = deepcopy(el)
-        new_slide.shapes._spTree.insert_element_before(new_el, "p:extLst")
-
-        # Handle picture shapes - need to update the blip reference
-        # Look for all blip elements (they can be in pic or other contexts)
-        # Using the element's own xpath method without namespaces argument
-        blips = new_el.xpath(".//a:blip[@r:embed]")
-        for blip in blips:
-            old_rId = blip.get(
-                "{http://schemas.openxmlformats.org/officeDocument/2006/relationships}embed"
-            )
-            if old_rId in image_rels:
-                # Create a new relationship in the destination slide for this image
-                old_rel = image_rels[old_rId]
-                # get_or_add returns the rId directly, or adds and returns new rId
-                new_rId = new_slide.part.rels.get_or_add(
-                    old_rel.reltype, old_rel._target
-                )
-                # Update the blip's embed reference to use the new relationship ID
-                blip.set(
-                    "{http://schemas.openxmlformats.org/officeDocument/2006/relationships}embed",
-                    new_rId,
-                )
-
-    # Copy any additional image/media relationships that might be referenced elsewhere
-    for rel_id, rel in image_rels.items():
-        try:
-            new_slide.part.rels.get_or_add(rel.reltype, rel._target)
-        except Exception:
-            pass  # Relationship might already exist
-
-    return new_slide
+class PartNames:
+    """Hands out unused partnames, scanning the package only once."""
 
+    def __init__(self, package):
+        self.used = {str(part.partname) for part in package.iter_parts()}
+        self.next_number = {}
 
-def delete_slide(pres, index):
-    """Delete a slide from the presentation."""
-    rId = pres.slides._sldIdLst[index].rId
-    pres.part.drop_rel(rId)
-    del pres.slides._sldIdLst[index]
+    def next(self, partname):
+        """Return an unused partname numbered like partname, e.g. chart4.xml for chart1.xml."""
+        prefix, _, ext = re.match(r"(.*?)(\d*)(\.\w+)$", str(partname)).groups()
+        number = self.next_number.get((prefix, ext), 1)
+        while f"{prefix}{number}{ext}" in self.used:
+            number += 1
+        self.next_number[(prefix, ext)] = number + 1
+        name = f"{prefix}{number}{ext}"
+        self.used.add(name)
+        return PackURI(name)
 
 
-def reorder_slides(pres, slide_index, target_index):
-    """Move a slide from one position to another."""
-    slides = pres.slides._sldIdLst
+def clone_part(part, partnames, clones):
+    """Copy a part and the parts it owns, relating shared parts as they are.
 
-    # Remove slide element from current position
-    slide_element = slides[slide_index]
-    slides.remove(slide_element)
-
-    # Insert at target position
-    slides.insert(target_index, slide_element)
+    clones maps source parts to their copies so a part reached twice, like the
+    notes slide's link back to its slide, is only copied once.
+    """
+    partname = partnames.next(part.partname)
+    if isinstance(part, XmlPart):
+        copy = type(part)(partname, part.content_type, part.package, deepcopy(part._element))
+    else:
+        copy = type(part)(partname, part.content_type, part.package, part.blob)
+    clones[part] = copy
+
+    # Relate in rId order so the copy gets the same rIds as the source
+    new_rIds = {}
+    for rId, rel in sorted(part.rels.items(), key=lambda item: (len(item[0]), item[0])):
+        if rel.is_external:
+            new_rIds[rId] = copy.relate_to(rel.target_ref, rel.reltype, is_external=True)
+            continue
+        target = rel.target_part
+        if target in clones:
+            target = clones[target]
+        elif rel.reltype not in SHARED_RELTYPES:
+            target = clone_part(target, partnames, clones)
+        new_rIds[rId] = copy.relate_to(target, rel.reltype)
+
+    # Point the XML at the new rIds where they differ (gaps in the source's rIds)
+    if isinstance(copy, XmlPart) and any(old != new for old, new in new_rIds.items()):
+        for element in copy._element.iter():
+            for name, value in element.attrib.items():
+                if name.startswith(RELATIONSHIP_NAMESPACE) and value in new_rIds:
+                    element.set(name, new_rIds[value])
+
+    return copy
+
+
+def duplicate_slide(pres, source, partnames=None, slide_id=None):
+    """Duplicate a slide by cloning its part, appending the copy to the deck.
+
+    source is the slide part to copy. The copy shares the layout and media of
+    the source and gets its own notes, charts and embedded objects. slide_id
+    is the id for the copy's slide list entry and must be unused. Pass the
+    same PartNames and increasing slide ids to a series of calls so neither
+    the package nor the slide list is scanned per copy.
+    """
+    sld_id_lst = pres.part._element.get_or_add_sldIdLst()
+    if partnames is None:
+        partnames = PartNames(pres.part.package)
+    if slide_id is None:
+        slide_id = max((sld_id.id for sld_id in sld_id_lst), default=255) + 1
+    copy = clone_part(source, partnames, {})
+
+    # A new slide can't match an existing relationship, skip relate_to's search
+    rId = pres.part.rels._add_relationship(RT.SLIDE, copy)
+    sld_id = OxmlElement("p:sldId")
+    sld_id.set("id", str(slide_id))
+    sld_id.set(qn("r:id"), rId)
+    sld_id_lst.append(sld_id)
+    return copy.slide
 
 
 def rearrange_presentation(template_path, output_path, slide_sequence):
@@ -169,57 +205,56 @@ def rearrange_presentation(template_path, output_path, slide_sequence):
         if idx < 0 or idx >= total_slides:
             raise ValueError(f"Slide index {idx} out of range (0-{total_slides - 1})")
 
-    # Track original slides and their duplicates
-    slide_map = []  # List of actual slide indices for final presentation
-    duplicated = {}  # Track duplicates: original_idx -> [duplicate_indices]
+    sld_id_lst = prs.part._element.get_or_add_sldIdLst()
+    originals = list(sld_id_lst)
 
-    # Step 1: DUPLICATE repeated slides
+    # Step 1: DUPLICATE repeated slides, the first use of a slide takes the original
     print(f"Processing {len(slide_sequence)} slides from template...")
-    for i, template_idx in enumerate(slide_sequence):
-        if template_idx in duplicated and duplicated[template_idx]:
-            # Already duplicated this slide, use the duplicate
-            slide_map.append(duplicated[template_idx].pop(0))
-            print(f"  [{i}] Using duplicate of slide {template_idx}")
-        elif slide_sequence.count(template_idx) > 1 and template_idx not in duplicated:
-            # First occurrence of a repeated slide - create duplicates
-            slide_map.append(template_idx)
-            duplicates = []
-            count = slide_sequence.count(template_idx) - 1
+    entries = {}  # Slide list entries per template slide, original first
+    partnames = PartNames(prs.part.package)
+    next_id = max((sld_id.id for sld_id in originals), default=255) + 1
+    for template_idx, count in Counter(slide_sequence).items():
+        entries[template_idx] = [originals[template_idx]]
+        if count > 1:
             print(
-                f"  [{i}] Using original slide {template_idx}, creating {count} duplicate(s)"
+                f"  Slide {template_idx} is used {count} times, creating {count - 1} duplicate(s)"
             )
-            for _ in range(count):
-                duplicate_slide(prs, template_idx)
-                duplicates.append(len(prs.slides) - 1)
-            duplicated[template_idx] = duplicates
-        else:
-            # Unique slide or first occurrence already handled, use original
-            slide_map.append(template_idx)
-            print(f"  [{i}] Using original slide {template_idx}")
-
-    # Step 2: DELETE unwanted slides (work backwards)
-    slides_to_keep = set(slide_map)
-    print(f"\nDeleting {len(prs.slides) - len(slides_to_keep)} unused slides...")
-    for i in range(len(prs.slides) - 1, -1, -1):
-        if i not in slides_to_keep:
-            delete_slide(prs, i)
-            # Update slide_map indices after deletion
-            slide_map = [idx - 1 if idx > i else idx for idx in slide_map]
-
-    # Step 3: REORDER to final sequence
-    print(f"Reordering {len(slide_map)} slides to final sequence...")
-    for target_pos in range(len(slide_map)):
-        # Find which slide should be at target_pos
-        current_pos = slide_map[target_pos]
-        if current_pos != target_pos:
-            reorder_slides(prs, current_pos, target_pos)
-            # Update slide_map: the move shifts other slides
-            for i in range(len(slide_map)):
-                if slide_map[i] > current_pos and slide_map[i] <= target_pos:
-                    slide_map[i] -= 1
-                elif slide_map[i] < current_pos and slide_map[i] >= target_pos:
-                    slide_map[i] += 1
-            slide_map[target_pos] = target_pos
+            source = prs.part.related_part(originals[template_idx].rId)
+            for _ in range(count - 1):
+                duplicate_slide(prs, source, partnames, next_id)
+                entries[template_idx].append(sld_id_lst[-1])
+                next_id += 1
+
+    # Step 2: PLAN the final order in one pass
+    final_order = []
+    next_entry = {template_idx: 0 for template_idx in entries}
+    for template_idx in slide_sequence:
+        final_order.append(entries[template_idx][next_entry[template_idx]])
+        next_entry[template_idx] += 1
+
+    # Step 3: DELETE unused slides and write the final order at once
+    used = {sld_id.rId for sld_id in final_order}
+    unused = [sld_id for sld_id in originals if sld_id.rId not in used]
+    print(f"\nDeleting {len(unused)} unused slides...")
+    print(f"Writing {len(final_order)} slides in final sequence...")
+    sld_id_lst[:] = final_order
+    unused_rIds = {sld_id.rId for sld_id in unused}
+
+    # Custom shows list slides by rId too, drop the deleted slides from them
+    for sld in prs.part._element.xpath("./p:custShowLst/p:custShow/p:sldLst/p:sld"):
+        if sld.get(qn("r:id")) in unused_rIds:
+            sld.getparent().remove(sld)
+
+    # Collect the rIds still referenced anywhere in the presentation XML once,
+    # instead of drop_rel's scan per relationship
+    referenced = {
+        value
+        for element in prs.part._element.iter()
+        for name, value in element.attrib.items()
+        if name.startswith(RELATIONSHIP_NAMESPACE)
+    }
+    for rId in unused_rIds - referenced:
+        prs.part.rels.pop(rId)
 
     # Save the presentation
     prs.save(output_path)
@@ -0,0 +1,266 @@
+#!/usr/bin/env python3
+"""
+Find the slides that changed between two versions of a presentation.
+
+Slides are aligned between the versions by the content hash used by the
+thumbnail render cache, so inserted, deleted and moved slides are reported as
+such. Aligned slides with identical hashes are skipped without rendering. The
+others are rendered at thumbnail width, from the cache where possible, and
+compared pixel by pixel.
+Each changed slide is reported with the share of changed pixels and the
+bounding box of the change in inches, comparable with inventory.py positions.
+
+Work and output grow with the number of changed slides, not the deck size.
+
+Usage:
+    python slide_diff.py before.pptx after.pptx [--grid PREFIX] [--cols N] [--threshold N]
+
+Examples:
+    python slide_diff.py deck.pptx deck-edited.pptx
+    # Lists changed, moved, added and removed slides
+
+    python slide_diff.py deck.pptx deck-edited.pptx --grid changes
+    # Also writes changes.jpg showing the changed slides with differences highlighted
+"""
+
+import argparse
+import sys
+from difflib import SequenceMatcher
+from pathlib import Path
+
+import numpy as np
+from PIL import Image, ImageDraw
+from pptx import Presentation
+
+from thumbnail import (
+    DEFAULT_COLS,
+    MAX_COLS,
+    THUMBNAIL_WIDTH,
+    create_grids,
+    render_slides,
+    slide_fingerprints,
+)
+
+# Constants
+DEFAULT_THRESHOLD = 24  # Channel difference (0-255) up to which pixels count as unchanged
+HIGHLIGHT_COLOR = (255, 0, 0)  # Tint and outline of changes in highlighted grids
+MAX_HIGHLIGHT_ALPHA = 160  # Opacity of the most changed pixels
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Find slides that changed between two PowerPoint files."
+    )
+    parser.add_argument("before", help="Original PowerPoint file (.pptx)")
+    parser.add_argument("after", help="Edited PowerPoint file (.pptx)")
+    parser.add_argument(
+        "--grid",
+        metavar="PREFIX",
+        help="Write the changed slides with highlighted differences to PREFIX.jpg (or PREFIX-N.jpg)",
+    )
+    parser.add_argument(
+        "--cols",
+        type=int,
+        default=DEFAULT_COLS,
+        help=f"Number of columns in the grid (default: {DEFAULT_COLS}, max: {MAX_COLS})",
+    )
+    parser.add_argument(
+        "--threshold",
+        type=int,
+        default=DEFAULT_THRESHOLD,
+        help=f"Channel difference (0-255) ignored as noise (default: {DEFAULT_THRESHOLD})",
+    )
+
+    args = parser.parse_args()
+
+    # Validate inputs
+    for path in (args.before, args.after):
+        input_path = Path(path)
+        if not input_path.exists() or input_path.suffix.lower() != ".pptx":
+            print(f"Error: Invalid PowerPoint file: {path}")
+            sys.exit(1)
+
+    try:
+        changes, compared, highlights = diff_presentations(
+            args.before, args.after, args.threshold
+        )
+        print_report(changes, compared)
+
+        if args.grid and highlights:
+            grid_files = create_grids(
+                list(highlights.values()),
+                min(args.cols, MAX_COLS),
+                THUMBNAIL_WIDTH,
+                Path(f"{args.grid}.jpg"),
+                slide_numbers=list(highlights),
+            )
+            print(f"Created {len(grid_files)} grid(s):")
+            for grid_file in grid_files:
+                print(f"  - {grid_file}")
+
+    except Exception as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+
+
+def diff_presentations(before_path, after_path, threshold=DEFAULT_THRESHOLD):
+    """Compare two versions of a presentation slide by slide.
+
+    Slides are aligned by their content hashes, so inserting, deleting or
+    moving slides doesn't make every later slide look changed. Only aligned
+    slides whose hashes differ are rendered and compared.
+
+    Returns a tuple of (changes, compared, highlights). changes is a list of
+    dicts with the 0-based 'slide' index and a 'status' of 'changed', 'moved',
+    'added' or 'removed'. 'slide' is the index in the edited file, except for
+    removed slides; changed and moved slides also have 'before_slide', and
+    changed slides have 'changed_pixels' (fraction) and 'bbox' ('left', 'top',
+    'width', 'height' in inches). compared is the number of slides present in
+    both files. highlights maps changed slide indices to rendered images with
+    the differences highlighted.
+    """
+    before = Presentation(str(before_path))
+    after = Presentation(str(after_path))
+
+    # Identical rendering inputs can't render differently, only render the rest
+    before_keys = slide_fingerprints(before, range(len(before.slides)), THUMBNAIL_WIDTH)
+    after_keys = slide_fingerprints(after, range(len(after.slides)), THUMBNAIL_WIDTH)
+    matcher = SequenceMatcher(
+        None,
+        [before_keys[idx] for idx in range(len(before.slides))],
+        [after_keys[idx] for idx in range(len(after.slides))],
+        autojunk=False,
+    )
+
+    opcodes = [opcode for opcode in matcher.get_opcodes() if opcode[0] != "equal"]
+    compared = sum(i2 - i1 for tag, i1, i2, _, _ in matcher.get_opcodes() if tag == "equal")
+
+    # An unmatched slide with the hash of an unmatched slide on the other side was
+    # moved, find those first so they aren't paired with unrelated slides
+    unmatched_by_key = {}
+    for _, i1, i2, _, _ in opcodes:
+        for idx in range(i1, i2):
+            unmatched_by_key.setdefault(before_keys[idx], []).append(idx)
+    moves = {}
+    for _, _, _, j1, j2 in opcodes:
+        for idx in range(j1, j2):
+            candidates = unmatched_by_key.get(after_keys[idx])
+            if candidates:
+                moves[idx] = candidates.pop(0)
+    moved_from = set(moves.values())
+
+    # The rest of a replaced run is compared pairwise, the longer side's rest is
+    # added or removed
+    pairs = []
+    removed = []
+    added = []
+    for tag, i1, i2, j1, j2 in opcodes:
+        old = [idx for idx in range(i1, i2) if idx not in moved_from]
+        new = [idx for idx in range(j1, j2) if idx not in moves]
+        paired = min(len(old), len(new)) if tag == "replace" else 0
+        pairs.extend(zip(old[:paired], new[:paired]))
+        removed.extend(old[paired:])
+        added.extend(new[paired:])
+    compared += len(pairs) + len(moves)
+
+    changes = []
+    highlights = {}
+    if pairs:
+        before_images = render_selection(before_path, before, [i for i, _ in pairs])
+        after_images = render_selection(after_path, after, [j for _, j in pairs])
+        inches_per_pixel = (after.slide_width or 9144000) / 914400.0 / THUMBNAIL_WIDTH
+
+        for before_idx, idx in pairs:
+            old, new = before_images[before_idx], after_images[idx]
+            if old.size != new.size:
+                old = old.resize(new.size, Image.Resampling.LANCZOS)
+
+            # Largest channel difference per pixel
+            difference = np.abs(
+                np.asarray(new, dtype=np.int16) - np.asarray(old, dtype=np.int16)
+            ).max(axis=2)
+            mask = difference > threshold
+            if not mask.any():
+                continue  # The XML changed but not how the slide looks
+
+            rows = np.flatnonzero(mask.any(axis=1))
+            cols = np.flatnonzero(mask.any(axis=0))
+            box = (int(cols[0]), int(rows[0]), int(cols[-1]), int(rows[-1]))
+            changes.append(
+                {
+                    "slide": idx,
+                    "before_slide": before_idx,
+                    "status": "changed",
+                    "changed_pixels": round(float(mask.mean()), 4),
+                    "bbox": {
+                        "left": round(box[0] * inches_per_pixel, 2),
+                        "top": round(box[1] * inches_per_pixel, 2),
+                        "width": round((box[2] - box[0] + 1) * inches_per_pixel, 2),
+                        "height": round((box[3] - box[1] + 1) * inches_per_pixel, 2),
+                    },
+                }
+            )
+            highlights[idx] = highlight_changes(new, difference, mask, box)
+
+    for idx in sorted(moves):
+        changes.append({"slide": idx, "before_slide": moves[idx], "status": "moved"})
+    for idx in added:
+        changes.append({"slide": idx, "status": "added"})
+    for idx in removed:
+        changes.append({"slide": idx, "status": "removed"})
+
+    return changes, compared, highlights
+
+
+def render_selection(pptx_path, prs, slides):
+    """Render the given slides of a deck and map each slide index to its image."""
+    selected = sorted(set(slides))
+    images = render_slides(pptx_path, selected, prs=prs)
+    if len(images) != len(selected):
+        raise RuntimeError(
+            f"Rendered {len(images)} images for {len(selected)} slides of {pptx_path}"
+        )
+    return dict(zip(selected, images))
+
+
+def highlight_changes(image, difference, mask, box):
+    """Tint changed pixels by how much they changed and outline the changed area."""
+    alpha = np.where(
+        mask, np.minimum(difference.astype(np.int32) * 2, MAX_HIGHLIGHT_ALPHA), 0
+    ).astype(np.uint8)
+    overlay = Image.new("RGBA", image.size, HIGHLIGHT_COLOR + (0,))
+    overlay.putalpha(Image.fromarray(alpha))
+
+    highlighted = Image.alpha_composite(image.convert("RGBA"), overlay).convert("RGB")
+    ImageDraw.Draw(highlighted).rectangle(box, outline=HIGHLIGHT_COLOR, width=2)
+    return highlighted
+
+
+def print_report(changes, compared):
+    """Print one line per changed, added or removed slide."""
+    counts = {status: 0 for status in ("changed", "moved", "added", "removed")}
+    for change in changes:
+        counts[change["status"]] += 1
+    print(
+        f"Compared {compared} slides: {counts['changed']} changed, "
+        f"{counts['moved']} moved, {counts['added']} added, {counts['removed']} removed"
+    )
+
+    for change in changes:
+        if change["status"] == "moved":
+            print(f"  Slide {change['slide']}: moved from slide {change['before_slide']}")
+            continue
+        if change["status"] != "changed":
+            print(f"  Slide {change['slide']}: {change['status']}")
+            continue
+        bbox = change["bbox"]
+        was = "" if change["before_slide"] == change["slide"] else f" (was {change['before_slide']})"
+        print(
+            f"  Slide {change['slide']}{was}: {change['changed_pixels']:.1%} of pixels changed "
+            f"in left={bbox['left']} top={bbox['top']} "
+            f"width={bbox['width']} height={bbox['height']} (inches)"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -18,8 +18,28 @@ Grid limits by column count:
 - 5 cols: max 30 slides per grid (5×6) [default]
 - 6 cols: max 42 slides per grid (6×7)
 
+Only the PDF pages of the requested slides are rasterized with --slides, and
+the intermediate PDF is cached by deck content hash, so previews after small
+edits or of a few slides stay cheap.
+
+Rendered slides are cached by the hash of everything that affects them (slide
+XML, layout, master, theme and media), so after an edit only the slides that
+actually changed are rasterized again.
+
+Page ranges are rasterized by concurrent pdftoppm processes and grids are
+assembled and encoded concurrently, using up to PPTX_THUMBNAIL_WORKERS
+(default: CPU count) workers. Output names don't depend on completion order.
+
+Slides are rasterized straight at thumbnail width and read from pdftoppm's
+output stream into memory, so no full-size or lossy intermediates are written.
+Time and memory per slide are reported at the end.
+
+The module can also be imported to render without touching the file system:
+render_slides() returns PIL images, compose_grids() returns encoded grids and
+render_grids() does both for a deck.
+
 Usage:
-    python thumbnail.py input.pptx [output_prefix] [--cols N] [--outline-placeholders]
+    python thumbnail.py input.pptx [output_prefix] [--cols N] [--outline-placeholders] [--slides LIST]
 
 Examples:
     python thumbnail.py presentation.pptx
@@ -38,21 +58,39 @@ Examples:
 
     python thumbnail.py template.pptx analysis --outline-placeholders
     # Creates thumbnail grids with red outlines around text placeholders
+
+    python thumbnail.py deck.pptx changed --slides 3,7-9
+    # Renders only slides 3, 7, 8 and 9 (0-based, as labeled in the grids)
+
+API:
+    from thumbnail import render_grids
+    grids = render_grids("deck.pptx", cols=4, slides=[3, 7])
+    # List of JPEG-encoded grids as bytes
 """
 
 import argparse
+import hashlib
+import io
+import os
+import re
+import shutil
 import subprocess
 import sys
 import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
-from inventory import extract_text_inventory
+from inventory import collect_shapes_with_absolute_positions
+from lxml import etree
+from office_pool import convert_document
 from PIL import Image, ImageDraw, ImageFont
 from pptx import Presentation
+from pptx.opc.constants import RELATIONSHIP_TYPE as RT
+from pptx.oxml.ns import qn
 
 # Constants
-THUMBNAIL_WIDTH = 300  # Fixed thumbnail width in pixels
-CONVERSION_DPI = 100  # DPI for PDF to image conversion
+THUMBNAIL_WIDTH = 300  # Fixed thumbnail width in pixels, slides are rasterized at it
 MAX_COLS = 6  # Maximum number of columns
 DEFAULT_COLS = 5  # Default number of columns
 JPEG_QUALITY = 95  # JPEG compression quality
@@ -62,6 +100,23 @@ GRID_PADDING = 20  # Padding between thumbnails
 BORDER_WIDTH = 2  # Border width around thumbnails
 FONT_SIZE_RATIO = 0.12  # Font size as fraction of thumbnail width
 LABEL_PADDING_RATIO = 0.4  # Label padding as fraction of font size
+MAX_WORKERS = max(1, int(os.environ.get("PPTX_THUMBNAIL_WORKERS", os.cpu_count() or 1)))
+
+# Caches of intermediate PDFs keyed by deck content hash and of rendered
+# slides keyed by slide content hash
+CACHE_DIR = Path(
+    os.environ.get(
+        "PPTX_THUMBNAIL_CACHE_DIR", Path.home() / ".cache" / "pptx-mcp-server" / "thumbnails"
+    )
+)
+PDF_CACHE_ENTRIES = 16  # Most recently used PDFs kept
+SLIDE_CACHE_MAX_BYTES = int(os.environ.get("PPTX_THUMBNAIL_CACHE_MB", "256")) * 1024 * 1024
+
+# Relationships that don't change how a slide renders
+UNRENDERED_RELTYPES = {RT.NOTES_SLIDE, RT.SLIDE, RT.COMMENTS}
+
+# Header of one binary PPM image in pdftoppm's stdout stream
+PPM_HEADER = re.compile(rb"P6\s+(\d+)\s+(\d+)\s+(\d+)\s")
 
 
 def main():
@@ -86,6 +141,10 @@ def main():
         action="store_true",
         help="Outline text placeholders with a colored border",
     )
+    parser.add_argument(
+        "--slides",
+        help="Only render these slides, 0-based as labeled in the grids (e.g. 3,7-9)",
+    )
 
     args = parser.parse_args()
 
@@ -100,31 +159,50 @@ def main():
         print(f"Error: Invalid PowerPoint file: {args.input}")
         sys.exit(1)
 
+    # Parse slide selection
+    slides = None
+    if args.slides:
+        try:
+            slides = parse_slide_selection(args.slides)
+        except ValueError as e:
+            print(f"Error: {e}")
+            sys.exit(1)
+
     # Construct output path (always JPG)
     output_path = Path(f"{args.output_prefix}.jpg")
 
     print(f"Processing: {args.input}")
+    start = time.perf_counter()
 
     try:
         with tempfile.TemporaryDirectory() as temp_dir:
+            # Parse once for placeholder regions and hidden slide detection
+            prs = Presentation(str(input_path))
+
             # Get placeholder regions if outlining is enabled
             placeholder_regions = None
             slide_dimensions = None
             if args.outline_placeholders:
                 print("Extracting placeholder regions...")
                 placeholder_regions, slide_dimensions = get_placeholder_regions(
-                    input_path
+                    input_path, prs
                 )
                 if placeholder_regions:
                     print(f"Found placeholders on {len(placeholder_regions)} slides")
 
-            # Convert slides to images
-            slide_images = convert_to_images(input_path, Path(temp_dir), CONVERSION_DPI)
+            # Convert slides to thumbnail-sized images in memory
+            slide_images = convert_to_images(
+                input_path, Path(temp_dir), THUMBNAIL_WIDTH, slides, prs
+            )
             if not slide_images:
                 print("Error: No slides found")
                 sys.exit(1)
 
-            print(f"Found {len(slide_images)} slides")
+            if slides is None:
+                print(f"Found {len(slide_images)} slides")
+            else:
+                print(f"Rendered {len(slide_images)} selected slides")
+            render_seconds = time.perf_counter() - start
 
             # Create grids (max cols×(cols+1) images per grid)
             grid_files = create_grids(
@@ -134,6 +212,7 @@ def main():
                 output_path,
                 placeholder_regions,
                 slide_dimensions,
+                slides,
             )
 
             # Print saved files
@@ -141,52 +220,297 @@ def main():
             for grid_file in grid_files:
                 print(f"  - {grid_file}")
 
+            print_performance(
+                slide_images, render_seconds, time.perf_counter() - start
+            )
+
     except Exception as e:
         print(f"Error: {e}")
         sys.exit(1)
 
 
+def peak_memory_mb(children=False):
+    """Peak resident memory of this process or its children in MB, None where unsupported."""
+    try:
+        import resource  # POSIX only
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_CHILDREN if children else resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and in kilobytes elsewhere
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def print_performance(slide_images, render_seconds, total_seconds):
+    """Report time and memory per slide."""
+    count = len(slide_images)
+    image_bytes = sum(img.width * img.height * len(img.getbands()) for img in slide_images)
+    print(
+        f"Time: {total_seconds:.2f}s total, {render_seconds / count * 1000:.1f} ms/slide "
+        f"rendering, {(total_seconds - render_seconds) / count * 1000:.1f} ms/slide grids"
+    )
+    memory = f"Memory: {image_bytes / count / 1024:.0f} KB/slide image data"
+    peak_self, peak_children = peak_memory_mb(), peak_memory_mb(children=True)
+    if peak_self is not None:
+        memory += f", peak {peak_self:.0f} MB (pdftoppm/soffice peak {peak_children:.0f} MB)"
+    print(memory)
+
+
+def parse_slide_selection(spec):
+    """Parse a selection like '3,7-9' into a sorted list of 0-based slide indices."""
+    indices = set()
+    for part in spec.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        first, _, last = part.partition("-")
+        try:
+            first = int(first)
+            last = int(last) if last else first
+        except ValueError:
+            raise ValueError(f"Invalid slide selection: {part}")
+        if first < 0 or last < first:
+            raise ValueError(f"Invalid slide range: {part}")
+        indices.update(range(first, last + 1))
+    if not indices:
+        raise ValueError("Empty slide selection")
+    return sorted(indices)
+
+
+def page_ranges(pages, max_length=None):
+    """Group sorted page numbers into (first, last) runs of consecutive pages.
+
+    Runs are split to at most max_length pages so they can be rendered in parallel.
+    """
+    ranges = []
+    for page in pages:
+        if (
+            ranges
+            and page == ranges[-1][1] + 1
+            and (max_length is None or page - ranges[-1][0] < max_length)
+        ):
+            ranges[-1][1] = page
+        else:
+            ranges.append([page, page])
+    return [tuple(r) for r in ranges]
+
+
+def file_digest(path):
+    """SHA-256 hex digest of a file's contents."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def presentation_digest(prs):
+    """Hash of the deck-wide rendering inputs: slide size, default text style and embedded fonts."""
+    digest = hashlib.sha256()
+    presentation = prs.part._element
+    for tag in ("p:sldSz", "p:defaultTextStyle", "p:embeddedFontLst"):
+        for element in presentation.findall(qn(tag)):
+            digest.update(etree.tostring(element))
+    for rel in sorted(prs.part.rels.values(), key=lambda r: r.rId):
+        if rel.reltype == RT.FONT and not rel.is_external:
+            digest.update(rel.rId.encode())
+            digest.update(hashlib.sha256(rel.target_part.blob).digest())
+    return digest.digest()
+
+
+def slide_fingerprints(prs, indices, width):
+    """Map slide indices to a hash of everything that affects their rendering.
+
+    Each slide's hash covers its own XML and, through its relationships, its
+    layout, master, theme, media and charts, plus the deck-wide inputs and the
+    render size. Parts are hashed by content, not by name, so identical slides
+    share a hash wherever they are in the deck. Only slides showing a slide
+    number also hash their position.
+    """
+    part_digests = {}
+
+    def part_digest(part, follow_layout=False):
+        # Masters list every layout, only the slide's own layout matters
+        key = (part.partname, follow_layout)
+        if key not in part_digests:
+            part_digests[key] = None  # Relationship cycles hash as a marker
+            digest = hashlib.sha256(part.blob)
+            for rel in sorted(part.rels.values(), key=lambda r: r.rId):
+                if rel.reltype in UNRENDERED_RELTYPES:
+                    continue
+                if rel.reltype == RT.SLIDE_LAYOUT and not follow_layout:
+                    continue
+                digest.update(f"{rel.rId} {rel.reltype} ".encode())
+                if rel.is_external:
+                    digest.update(rel.target_ref.encode())
+                else:
+                    digest.update(part_digest(rel.target_part) or b"cycle")
+            part_digests[key] = digest.digest()
+        return part_digests[key]
+
+    deck_digest = presentation_digest(prs)
+    first_number = prs.part._element.get("firstSlideNum", "1")
+    slides = list(prs.slides)
+    fingerprints = {}
+    for idx in indices:
+        slide_part = slides[idx].part
+        digest = hashlib.sha256(f"@{width}".encode())
+        digest.update(deck_digest)
+        digest.update(part_digest(slide_part, follow_layout=True))
+        if b'type="slidenum"' in slide_part.blob:
+            digest.update(f"#{idx}+{first_number}".encode())
+        fingerprints[idx] = digest.hexdigest()
+    return fingerprints
+
+
+def store_in_cache(cached, write):
+    """Create a cache entry with write(path), publishing it atomically for concurrent runs."""
+    cached.parent.mkdir(parents=True, exist_ok=True)
+    fd, partial = tempfile.mkstemp(suffix=".tmp", dir=cached.parent)
+    os.close(fd)
+    try:
+        write(partial)
+        os.replace(partial, cached)
+    except BaseException:
+        Path(partial).unlink(missing_ok=True)
+        raise
+
+
+def prune_cache(directory, max_entries=None, max_bytes=None):
+    """Delete the least recently used files in a cache directory beyond a count or size."""
+    entries = []
+    for path in directory.iterdir():
+        if path.suffix == ".tmp":
+            continue
+        try:
+            stat = path.stat()
+        except FileNotFoundError:
+            continue  # Pruned by a concurrent run
+        entries.append((stat.st_mtime, stat.st_size, path))
+    entries.sort(reverse=True)
+
+    total_bytes = 0
+    for index, (_, size, path) in enumerate(entries):
+        total_bytes += size
+        if (max_entries is not None and index >= max_entries) or (
+            max_bytes is not None and total_bytes > max_bytes
+        ):
+            path.unlink(missing_ok=True)
+
+
+def get_cached_pdf(pptx_path, temp_dir, progress=print):
+    """Return a PDF of the deck, converting only if this exact deck isn't cached."""
+    cached = CACHE_DIR / "pdf" / f"{file_digest(pptx_path)}.pdf"
+    if cached.exists():
+        progress("Using cached PDF")
+        os.utime(cached)  # Mark as recently used
+        return cached
+
+    # Convert to PDF on a warm pooled LibreOffice instance
+    progress("Converting to PDF...")
+    try:
+        pdf_path = convert_document(pptx_path, temp_dir, "pdf")
+    except Exception as e:
+        raise RuntimeError(f"PDF conversion failed: {e}")
+
+    store_in_cache(cached, lambda path: shutil.copyfile(pdf_path, path))
+    prune_cache(cached.parent, max_entries=PDF_CACHE_ENTRIES)
+    return cached
+
+
+def read_ppm_stream(data):
+    """Split concatenated binary PPM images, as pdftoppm writes to stdout."""
+    images = []
+    pos = 0
+    while pos < len(data):
+        match = PPM_HEADER.match(data, pos)
+        if not match:
+            raise RuntimeError("Unexpected pdftoppm output")
+        size = (int(match[1]), int(match[2]))
+        pos = match.end() + size[0] * size[1] * 3
+        images.append(Image.frombytes("RGB", size, data[match.end() : pos]))
+    return images
+
+
+def rasterize_range(pdf_path, first, last, width):
+    """Render one range of PDF pages at the given width and map page numbers to images."""
+    result = subprocess.run(
+        [
+            "pdftoppm",
+            "-f",
+            str(first),
+            "-l",
+            str(last),
+            "-scale-to-x",
+            str(width),
+            "-scale-to-y",
+            "-1",
+            str(pdf_path),
+        ],
+        capture_output=True,
+    )
+    if result.returncode != 0:
+        raise RuntimeError("Image conversion failed")
+    return dict(zip(range(first, last + 1), read_ppm_stream(result.stdout)))
+
+
+def rasterize_pages(pdf_path, pages, width):
+    """Render PDF pages in memory with one pdftoppm process per page range.
+
+    Ranges are sized to spread the pages evenly over MAX_WORKERS processes.
+    """
+    chunk_size = -(-len(pages) // MAX_WORKERS)
+    ranges = page_ranges(pages, chunk_size)
+    page_images = {}
+    with ThreadPoolExecutor(max_workers=min(MAX_WORKERS, len(ranges))) as executor:
+        for range_images in executor.map(
+            lambda r: rasterize_range(pdf_path, r[0], r[1], width), ranges
+        ):
+            page_images.update(range_images)
+    return page_images
+
+
 def create_hidden_slide_placeholder(size):
     """Create placeholder image for hidden slides."""
     img = Image.new("RGB", size, color="#F0F0F0")
     draw = ImageDraw.Draw(img)
-    line_width = max(5, min(size) // 100)
+    line_width = max(2, min(size) // 100)
     draw.line([(0, 0), size], fill="#CCCCCC", width=line_width)
     draw.line([(size[0], 0), (0, size[1])], fill="#CCCCCC", width=line_width)
     return img
 
 
-def get_placeholder_regions(pptx_path):
+def get_placeholder_regions(pptx_path, prs=None):
     """Extract ALL text regions from the presentation.
 
+    Only shape geometry is read, text isn't measured. prs is an optional
+    already parsed Presentation of the file.
+
     Returns a tuple of (placeholder_regions, slide_dimensions).
     text_regions is a dict mapping slide indices to lists of text regions.
     Each region is a dict with 'left', 'top', 'width', 'height' in inches.
     slide_dimensions is a tuple of (width_inches, height_inches).
     """
-    prs = Presentation(str(pptx_path))
-    inventory = extract_text_inventory(pptx_path, prs)
+    if prs is None:
+        prs = Presentation(str(pptx_path))
     placeholder_regions = {}
 
     # Get actual slide dimensions in inches (EMU to inches conversion)
     slide_width_inches = (prs.slide_width or 9144000) / 914400.0
     slide_height_inches = (prs.slide_height or 5143500) / 914400.0
 
-    for slide_key, shapes in inventory.items():
-        # Extract slide index from "slide-N" format
-        slide_idx = int(slide_key.split("-")[1])
+    for slide_idx, slide in enumerate(prs.slides):
         regions = []
-
-        for shape_key, shape_data in shapes.items():
-            # The inventory only contains shapes with text, so all shapes should be highlighted
-            regions.append(
-                {
-                    "left": shape_data.left,
-                    "top": shape_data.top,
-                    "width": shape_data.width,
-                    "height": shape_data.height,
-                }
-            )
+        for shape in slide.shapes:
+            # Same shapes as the inventory: text shapes, flattened out of groups
+            for swp in collect_shapes_with_absolute_positions(shape):
+                regions.append(
+                    {
+                        "left": swp.absolute_left / 914400.0,
+                        "top": swp.absolute_top / 914400.0,
+                        "width": (swp.shape.width or 0) / 914400.0,
+                        "height": (swp.shape.height or 0) / 914400.0,
+                    }
+                )
 
         if regions:
             placeholder_regions[slide_idx] = regions
@@ -194,11 +518,69 @@ def get_placeholder_regions(pptx_path):
     return placeholder_regions, (slide_width_inches, slide_height_inches)
 
 
-def convert_to_images(pptx_path, temp_dir, dpi):
-    """Convert PowerPoint to images via PDF, handling hidden slides."""
-    # Detect hidden slides
-    print("Analyzing presentation...")
+def render_slides(pptx_path, slides=None, width=THUMBNAIL_WIDTH, prs=None, progress=print):
+    """Render slides to PIL images of the given width, in slide order.
+
+    slides is an optional list of 0-based slide indices. Hidden slides are
+    returned as crossed-out placeholders. prs is an optional already parsed
+    Presentation of the file. progress is called with each status message.
+    """
+    with tempfile.TemporaryDirectory() as temp_dir:
+        return convert_to_images(
+            Path(pptx_path), Path(temp_dir), width, slides, prs, progress
+        )
+
+
+def render_grids(
+    pptx_path, cols=DEFAULT_COLS, slides=None, outline_placeholders=False, progress=print
+):
+    """Render slides and compose them into thumbnail grids, returned as JPEG bytes.
+
+    Selected slides appear in slide order whatever order slides lists them in.
+    """
+    cols = min(cols, MAX_COLS)
     prs = Presentation(str(pptx_path))
+    if slides is not None:
+        slides = select_slides(slides, len(prs.slides))
+    placeholder_regions = None
+    slide_dimensions = None
+    if outline_placeholders:
+        placeholder_regions, slide_dimensions = get_placeholder_regions(pptx_path, prs)
+    images = render_slides(pptx_path, slides, prs=prs, progress=progress)
+    return compose_grids(
+        images, cols, THUMBNAIL_WIDTH, placeholder_regions, slide_dimensions, slides
+    )
+
+
+def encode_image(image, format="JPEG"):
+    """Encode a PIL image to bytes."""
+    buffer = io.BytesIO()
+    image.save(buffer, format, quality=JPEG_QUALITY)
+    return buffer.getvalue()
+
+
+def select_slides(slides, total_slides):
+    """Validate 0-based slide indices and return them sorted without duplicates."""
+    invalid = sorted({idx for idx in slides if not 0 <= idx < total_slides})
+    if invalid:
+        raise ValueError(
+            f"Slides {invalid} out of range (presentation has {total_slides} slides)"
+        )
+    return sorted(set(slides))
+
+
+def convert_to_images(pptx_path, temp_dir, width, slides=None, prs=None, progress=print):
+    """Convert PowerPoint to in-memory images of the given width via PDF, handling hidden slides.
+
+    slides is an optional list of 0-based slide indices; only their PDF pages
+    are rasterized. Slides with a cached render aren't rasterized at all.
+    Images are returned in slide order. prs is an optional already parsed
+    Presentation of the file. progress is called with each status message.
+    """
+    # Detect hidden slides
+    progress("Analyzing presentation...")
+    if prs is None:
+        prs = Presentation(str(pptx_path))
     total_slides = len(prs.slides)
 
     # Find hidden slides (1-based indexing for display)
@@ -208,100 +590,139 @@ def convert_to_images(pptx_path, temp_dir, dpi):
         if slide.element.get("show") == "0"
     }
 
-    print(f"Total slides: {total_slides}")
+    progress(f"Total slides: {total_slides}")
     if hidden_slides:
-        print(f"Hidden slides: {sorted(hidden_slides)}")
-
-    pdf_path = temp_dir / f"{pptx_path.stem}.pdf"
-
-    # Convert to PDF
-    print("Converting to PDF...")
-    result = subprocess.run(
-        [
-            "soffice",
-            "--headless",
-            "--convert-to",
-            "pdf",
-            "--outdir",
-            str(temp_dir),
-            str(pptx_path),
-        ],
-        capture_output=True,
-        text=True,
-    )
-    if result.returncode != 0 or not pdf_path.exists():
-        raise RuntimeError("PDF conversion failed")
+        progress(f"Hidden slides: {sorted(hidden_slides)}")
 
-    # Convert PDF to images
-    print(f"Converting to images at {dpi} DPI...")
-    result = subprocess.run(
-        ["pdftoppm", "-jpeg", "-r", str(dpi), str(pdf_path), str(temp_dir / "slide")],
-        capture_output=True,
-        text=True,
-    )
-    if result.returncode != 0:
-        raise RuntimeError("Image conversion failed")
-
-    visible_images = sorted(temp_dir.glob("slide-*.jpg"))
+    if slides is None:
+        selected = list(range(total_slides))
+    else:
+        selected = select_slides(slides, total_slides)
+
+    # Hidden slides are left out of the PDF, so map visible slides to their pages
+    pdf_pages = {}
+    for idx in range(total_slides):
+        if idx + 1 not in hidden_slides:
+            pdf_pages[idx] = len(pdf_pages) + 1
+    visible = [idx for idx in selected if idx in pdf_pages]
+
+    # Reuse renders of unchanged slides
+    slide_cache = CACHE_DIR / "slides"
+    cached_paths = {
+        idx: slide_cache / f"{fingerprint}.png"
+        for idx, fingerprint in slide_fingerprints(prs, visible, width).items()
+    }
+    slide_images = {}
+    for idx, cached in cached_paths.items():
+        try:
+            os.utime(cached)  # Mark as recently used
+            with Image.open(cached) as img:
+                slide_images[idx] = img.convert("RGB")
+        except (FileNotFoundError, OSError):
+            continue
+    if slide_images:
+        progress(f"Reusing {len(slide_images)} cached slide render(s)")
+
+    # Convert only the PDF pages of changed slides
+    dirty = [idx for idx in visible if idx not in slide_images]
+    if dirty:
+        pdf_path = get_cached_pdf(pptx_path, temp_dir, progress)
+        progress(f"Converting {len(dirty)} page(s) to images at {width}px wide...")
+        page_images = rasterize_pages(
+            pdf_path, [pdf_pages[idx] for idx in dirty], width
+        )
+        for idx in dirty:
+            if pdf_pages[idx] in page_images:
+                img = slide_images[idx] = page_images[pdf_pages[idx]]
+                # PNG keeps cached renders lossless
+                store_in_cache(cached_paths[idx], lambda path: img.save(path, "PNG"))
+        prune_cache(slide_cache, max_bytes=SLIDE_CACHE_MAX_BYTES)
+
+    # Get placeholder dimensions from a rendered slide, or the slide's aspect ratio
+    if slide_images:
+        placeholder_size = next(iter(slide_images.values())).size
+    else:
+        placeholder_size = (
+            width,
+            round(width * (prs.slide_height or 5143500) / (prs.slide_width or 9144000)),
+        )
 
     # Create full list with placeholders for hidden slides
     all_images = []
-    visible_idx = 0
-
-    # Get placeholder dimensions from first visible slide
-    if visible_images:
-        with Image.open(visible_images[0]) as img:
-            placeholder_size = img.size
-    else:
-        placeholder_size = (1920, 1080)
-
-    for slide_num in range(1, total_slides + 1):
-        if slide_num in hidden_slides:
+    for idx in selected:
+        if idx + 1 in hidden_slides:
             # Create placeholder image for hidden slide
-            placeholder_path = temp_dir / f"hidden-{slide_num:03d}.jpg"
-            placeholder_img = create_hidden_slide_placeholder(placeholder_size)
-            placeholder_img.save(placeholder_path, "JPEG")
-            all_images.append(placeholder_path)
-        else:
+            all_images.append(create_hidden_slide_placeholder(placeholder_size))
+        elif idx in slide_images:
             # Use the actual visible slide image
-            if visible_idx < len(visible_images):
-                all_images.append(visible_images[visible_idx])
-                visible_idx += 1
+            all_images.append(slide_images[idx])
+        else:
+            # Dropping it would shift the labels of the slides after it
+            raise RuntimeError(f"Slide {idx} was not rendered")
 
     return all_images
 
 
-def create_grids(
-    image_paths,
-    cols,
-    width,
-    output_path,
+def compose_grids(
+    images,
+    cols=DEFAULT_COLS,
+    width=THUMBNAIL_WIDTH,
     placeholder_regions=None,
     slide_dimensions=None,
+    slide_numbers=None,
 ):
-    """Create multiple thumbnail grids from slide images, max cols×(cols+1) images per grid."""
+    """Build thumbnail grids in memory, max cols×(cols+1) images per grid.
+
+    images are PIL images or paths to image files. slide_numbers labels each
+    image with its slide index when the images are a selection rather than the
+    whole deck. Returns each grid as JPEG bytes.
+    """
     # Maximum images per grid is cols × (cols + 1) for better proportions
     max_images_per_grid = cols * (cols + 1)
-    grid_files = []
 
-    print(
-        f"Creating grids with {cols} columns (max {max_images_per_grid} images per grid)"
-    )
+    def build_grid(start_idx):
+        end_idx = min(start_idx + max_images_per_grid, len(images))
+        chunk_images = images[start_idx:end_idx]
+        chunk_numbers = slide_numbers[start_idx:end_idx] if slide_numbers else None
 
-    # Split images into chunks
-    for chunk_idx, start_idx in enumerate(
-        range(0, len(image_paths), max_images_per_grid)
-    ):
-        end_idx = min(start_idx + max_images_per_grid, len(image_paths))
-        chunk_images = image_paths[start_idx:end_idx]
-
-        # Create grid for this chunk
+        # Create and encode grid for this chunk
         grid = create_grid(
-            chunk_images, cols, width, start_idx, placeholder_regions, slide_dimensions
+            chunk_images,
+            cols,
+            width,
+            start_idx,
+            placeholder_regions,
+            slide_dimensions,
+            chunk_numbers,
         )
+        return encode_image(grid)
+
+    # Split images into chunks and build grids concurrently, Pillow releases
+    # the GIL while decoding, resizing and encoding
+    starts = list(range(0, len(images), max_images_per_grid))
+    with ThreadPoolExecutor(max_workers=max(1, min(MAX_WORKERS, len(starts)))) as executor:
+        return list(executor.map(build_grid, starts))
 
+
+def create_grids(
+    images,
+    cols,
+    width,
+    output_path,
+    placeholder_regions=None,
+    slide_dimensions=None,
+    slide_numbers=None,
+):
+    """Create multiple thumbnail grid files from slide images, max cols×(cols+1) images per grid."""
+    print(f"Creating grids with {cols} columns (max {cols * (cols + 1)} images per grid)")
+    grids = compose_grids(
+        images, cols, width, placeholder_regions, slide_dimensions, slide_numbers
+    )
+
+    grid_files = []
+    for chunk_idx, grid in enumerate(grids):
         # Generate output filename
-        if len(image_paths) <= max_images_per_grid:
+        if len(grids) == 1:
             # Single grid - use base filename without suffix
             grid_filename = output_path
         else:
@@ -312,31 +733,40 @@ def create_grids(
 
         # Save grid
         grid_filename.parent.mkdir(parents=True, exist_ok=True)
-        grid.save(str(grid_filename), quality=JPEG_QUALITY)
+        grid_filename.write_bytes(grid)
         grid_files.append(str(grid_filename))
 
     return grid_files
 
 
+def load_image(image):
+    """Return a PIL image, opening it if given a path."""
+    if isinstance(image, Image.Image):
+        return image
+    with Image.open(image) as img:
+        return img.convert("RGB")
+
+
 def create_grid(
-    image_paths,
+    images,
     cols,
     width,
     start_slide_num=0,
     placeholder_regions=None,
     slide_dimensions=None,
+    slide_numbers=None,
 ):
     """Create thumbnail grid from slide images with optional placeholder outlining."""
     font_size = int(width * FONT_SIZE_RATIO)
     label_padding = int(font_size * LABEL_PADDING_RATIO)
 
     # Get dimensions
-    with Image.open(image_paths[0]) as img:
-        aspect = img.height / img.width
+    first = load_image(images[0])
+    aspect = first.height / first.width
     height = int(width * aspect)
 
     # Calculate grid size
-    rows = (len(image_paths) + cols - 1) // cols
+    rows = (len(images) + cols - 1) // cols
     grid_w = cols * width + (cols + 1) * GRID_PADDING
     grid_h = rows * (height + font_size + label_padding * 2) + (rows + 1) * GRID_PADDING
 
@@ -353,7 +783,7 @@ def create_grid(
         font = ImageFont.load_default()
 
     # Place thumbnails
-    for i, img_path in enumerate(image_paths):
+    for i, image in enumerate(images):
         row, col = i // cols, i % cols
         x = col * width + (col + 1) * GRID_PADDING
         y_base = (
@@ -361,7 +791,8 @@ def create_grid(
         )
 
         # Add label with actual slide number
-        label = f"{start_slide_num + i}"
+        slide_num = slide_numbers[i] if slide_numbers else start_slide_num + i
+        label = f"{slide_num}"
         bbox = draw.textbbox((0, 0), label, font=font)
         text_w = bbox[2] - bbox[0]
         draw.text(
@@ -374,75 +805,77 @@ def create_grid(
         # Add thumbnail below label with proportional spacing
         y_thumbnail = y_base + label_padding + font_size + label_padding
 
-        with Image.open(img_path) as img:
-            # Get original dimensions before thumbnail
-            orig_w, orig_h = img.size
-
-            # Apply placeholder outlines if enabled
-            if placeholder_regions and (start_slide_num + i) in placeholder_regions:
-                # Convert to RGBA for transparency support
-                if img.mode != "RGBA":
-                    img = img.convert("RGBA")
-
-                # Get the regions for this slide
-                regions = placeholder_regions[start_slide_num + i]
-
-                # Calculate scale factors using actual slide dimensions
-                if slide_dimensions:
-                    slide_width_inches, slide_height_inches = slide_dimensions
-                else:
-                    # Fallback: estimate from image size at CONVERSION_DPI
-                    slide_width_inches = orig_w / CONVERSION_DPI
-                    slide_height_inches = orig_h / CONVERSION_DPI
-
-                x_scale = orig_w / slide_width_inches
-                y_scale = orig_h / slide_height_inches
-
-                # Create a highlight overlay
-                overlay = Image.new("RGBA", img.size, (255, 255, 255, 0))
-                overlay_draw = ImageDraw.Draw(overlay)
-
-                # Highlight each placeholder region
-                for region in regions:
-                    # Convert from inches to pixels in the original image
-                    px_left = int(region["left"] * x_scale)
-                    px_top = int(region["top"] * y_scale)
-                    px_width = int(region["width"] * x_scale)
-                    px_height = int(region["height"] * y_scale)
-
-                    # Draw highlight outline with red color and thick stroke
-                    # Using a bright red outline instead of fill
-                    stroke_width = max(
-                        5, min(orig_w, orig_h) // 150
-                    )  # Thicker proportional stroke width
-                    overlay_draw.rectangle(
-                        [(px_left, px_top), (px_left + px_width, px_top + px_height)],
-                        outline=(255, 0, 0, 255),  # Bright red, fully opaque
-                        width=stroke_width,
-                    )
-
-                # Composite the overlay onto the image using alpha blending
-                img = Image.alpha_composite(img, overlay)
-                # Convert back to RGB for JPEG saving
-                img = img.convert("RGB")
-
-            img.thumbnail((width, height), Image.Resampling.LANCZOS)
-            w, h = img.size
-            tx = x + (width - w) // 2
-            ty = y_thumbnail + (height - h) // 2
-            grid.paste(img, (tx, ty))
-
-            # Add border
-            if BORDER_WIDTH > 0:
-                draw.rectangle(
-                    [
-                        (tx - BORDER_WIDTH, ty - BORDER_WIDTH),
-                        (tx + w + BORDER_WIDTH - 1, ty + h + BORDER_WIDTH - 1),
-                    ],
-                    outline="gray",
-                    width=BORDER_WIDTH,
+        img = load_image(image)
+        # Get original dimensions before thumbnail
+        orig_w, orig_h = img.size
+
+        # Apply placeholder outlines if enabled
+        if placeholder_regions and slide_num in placeholder_regions:
+            # Convert to RGBA for transparency support
+            if img.mode != "RGBA":
+                img = img.convert("RGBA")
+
+            # Get the regions for this slide
+            regions = placeholder_regions[slide_num]
+
+            # Calculate scale factors using actual slide dimensions
+            if slide_dimensions:
+                slide_width_inches, slide_height_inches = slide_dimensions
+            else:
+                # Fallback: assume a 10 inch wide slide
+                slide_width_inches = 10
+                slide_height_inches = 10 * orig_h / orig_w
+
+            x_scale = orig_w / slide_width_inches
+            y_scale = orig_h / slide_height_inches
+
+            # Create a highlight overlay
+            overlay = Image.new("RGBA", img.size, (255, 255, 255, 0))
+            overlay_draw = ImageDraw.Draw(overlay)
+
+            # Highlight each placeholder region
+            for region in regions:
+                # Convert from inches to pixels in the original image
+                px_left = int(region["left"] * x_scale)
+                px_top = int(region["top"] * y_scale)
+                px_width = int(region["width"] * x_scale)
+                px_height = int(region["height"] * y_scale)
+
+                # Draw highlight outline with red color and thick stroke
+                # Using a bright red outline instead of fill
+                stroke_width = max(
+                    2, min(orig_w, orig_h) // 150
+                )  # Thicker proportional stroke width
+                overlay_draw.rectangle(
+                    [(px_left, px_top), (px_left + px_width, px_top + px_height)],
+                    outline=(255, 0, 0, 255),  # Bright red, fully opaque
+                    width=stroke_width,
                 )
 
+            # Composite the overlay onto the image using alpha blending
+            img = Image.alpha_composite(img, overlay)
+            # Convert back to RGB for JPEG saving
+            img = img.convert("RGB")
+
+        # Shrink a copy, images may be shared with the caller
+        img = img.copy()
+        img.thumbnail((width, height), Image.Resampling.LANCZOS)
+        w, h = img.size
+        tx = x + (width - w) // 2
+        ty = y_thumbnail + (height - h) // 2
+        grid.paste(img, (tx, ty))
+
+        # Add border
+        if BORDER_WIDTH > 0:
+            draw.rectangle(
+                [
+                    (tx - BORDER_WIDTH, ty - BORDER_WIDTH),
+                    (tx + w + BORDER_WIDTH - 1, ty + h + BORDER_WIDTH - 1),
+                ],
+                outline="gray",
+                width=BORDER_WIDTH,
+            )
+
     return grid
 
 
@@ -5,12 +5,19 @@ Tests the MCP server by connecting to it and calling its tools
 """
 
 import asyncio
+import contextlib
+import io
 import json
+import random
 import sys
+import tempfile
+import time
 from pathlib import Path
 
-# Add the current directory to the path so we can import the MCP server
+# Add the current directory to the path so we can import the MCP server,
+# and the scripts directory for the in-process script tests
 sys.path.insert(0, str(Path(__file__).parent))
+sys.path.insert(0, str(Path(__file__).parent / "scripts"))
 
 from mcp import ClientSession, StdioServerParameters
 from mcp.client.stdio import stdio_client
@@ -164,6 +171,198 @@ async def test_server_lifecycle():
     print("  ✅ Server stopped cleanly")
 
 
+def build_titled_deck(path, titles):
+    """Save a deck with one title-only slide per title."""
+    from pptx import Presentation
+
+    prs = Presentation()
+    for title in titles:
+        slide = prs.slides.add_slide(prs.slide_layouts[5])
+        slide.shapes.title.text = title
+    prs.save(path)
+
+
+async def test_slide_diff_alignment():
+    """Test that slide_diff aligns slides by content hash before comparing pixels"""
+    print("\n" + "="*60)
+    print("TEST 6: Slide Diff Alignment")
+    print("="*60)
+
+    from PIL import Image, ImageDraw
+    import slide_diff
+
+    def fake_render(path, slides, prs):
+        # B2 adds a 30x30 px box, C2 is within the noise threshold
+        images = []
+        for idx in slides:
+            title = prs.slides[idx].shapes.title.text
+            image = Image.new("RGB", (300, 225), "white")
+            if title == "B2":
+                ImageDraw.Draw(image).rectangle((30, 45, 59, 74), fill="black")
+            elif title == "C2":
+                image = Image.new("RGB", (300, 225), (245, 245, 245))
+            images.append(image)
+        return images
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        before = Path(temp_dir) / "before.pptx"
+        after = Path(temp_dir) / "after.pptx"
+        # M moves to the end, B and C are edited, R is removed and X inserted
+        build_titled_deck(before, ["A1", "A2", "A3", "M", "B", "C", "D1", "D2", "R", "E1", "E2"])
+        build_titled_deck(after, ["A1", "A2", "A3", "B2", "C2", "D1", "D2", "E1", "E2", "M", "X"])
+
+        render_slides = slide_diff.render_slides
+        slide_diff.render_slides = fake_render
+        try:
+            changes, compared, highlights = slide_diff.diff_presentations(before, after)
+        finally:
+            slide_diff.render_slides = render_slides
+
+    expected = [
+        {
+            "slide": 3,
+            "before_slide": 4,
+            "status": "changed",
+            "changed_pixels": round(900 / (300 * 225), 4),
+            # 10 inch wide slide at 300 px
+            "bbox": {"left": 1.0, "top": 1.5, "width": 1.0, "height": 1.0},
+        },
+        {"slide": 9, "before_slide": 3, "status": "moved"},
+        {"slide": 10, "status": "added"},
+        {"slide": 8, "status": "removed"},
+    ]
+    assert changes == expected, f"Unexpected changes: {changes}"
+    assert compared == 10, f"Expected 10 slides compared, got {compared}"
+    assert list(highlights) == [3], f"Unexpected highlights: {list(highlights)}"
+    print("  ✅ Edited, moved, inserted and removed slides are told apart")
+    print("  ✅ Changes below the threshold are dropped")
+
+
+async def test_rearrange_duplicates():
+    """Test that rearranged duplicates own their notes and charts and share media"""
+    print("\n" + "="*60)
+    print("TEST 7: Rearrange Duplicates")
+    print("="*60)
+
+    from PIL import Image
+    from pptx import Presentation
+    from pptx.chart.data import CategoryChartData
+    from pptx.enum.chart import XL_CHART_TYPE
+    from pptx.opc.constants import RELATIONSHIP_TYPE as RT
+    from pptx.oxml import parse_xml
+    from pptx.oxml.ns import nsdecls, qn
+    from pptx.util import Inches
+    from rearrange import rearrange_presentation
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        template = Path(temp_dir) / "template.pptx"
+        output = Path(temp_dir) / "output.pptx"
+        image = Path(temp_dir) / "image.png"
+        Image.new("RGB", (40, 30), "red").save(image)
+
+        chart_data = CategoryChartData()
+        chart_data.categories = ["a", "b"]
+        chart_data.add_series("Series", (1, 2))
+
+        prs = Presentation()
+        for idx in range(5):
+            slide = prs.slides.add_slide(prs.slide_layouts[5])
+            slide.shapes.title.text = f"Slide {idx}"
+            if idx in (0, 3):
+                slide.shapes.add_picture(str(image), Inches(1), Inches(2))
+            if idx in (2, 3):
+                slide.shapes.add_chart(
+                    XL_CHART_TYPE.COLUMN_CLUSTERED, Inches(4), Inches(2), Inches(4), Inches(3), chart_data
+                )
+            if idx == 3:
+                slide.notes_slide.notes_text_frame.text = "Notes 3"
+
+        # A custom show of every slide, placed after notesSz as the schema orders it
+        show = "".join(f'<p:sld r:id="{sld_id.rId}"/>' for sld_id in prs.slides._sldIdLst)
+        prs.part._element.find(qn("p:notesSz")).addnext(parse_xml(
+            f'<p:custShowLst {nsdecls("p", "r")}><p:custShow name="All" id="0">'
+            f"<p:sldLst>{show}</p:sldLst></p:custShow></p:custShowLst>"
+        ))
+        prs.save(template)
+
+        rearrange_presentation(template, output, [3, 3, 2, 0])
+        result = Presentation(output)
+
+    slides = list(result.slides)
+    titles = [slide.shapes.title.text for slide in slides]
+    assert titles == ["Slide 3", "Slide 3", "Slide 2", "Slide 0"], f"Unexpected order: {titles}"
+    slide_ids = [slide.slide_id for slide in slides]
+    assert len(set(slide_ids)) == 4, f"Duplicate slide ids: {slide_ids}"
+    print("  ✅ Slides are in sequence order with unique ids")
+
+    def related(slide, reltype):
+        return [rel.target_part for rel in slide.part.rels.values() if rel.reltype == reltype]
+
+    first, second = slides[0], slides[1]
+    assert first.notes_slide.part is not second.notes_slide.part, "Duplicates share a notes slide"
+    assert second.notes_slide.notes_text_frame.text == "Notes 3", "Duplicate lost its notes"
+    for slide in (first, second):
+        assert related(slide.notes_slide, RT.SLIDE) == [slide.part], "Notes don't link back to their slide"
+    assert related(first, RT.CHART)[0] is not related(second, RT.CHART)[0], "Duplicates share a chart"
+    assert related(first, RT.IMAGE) == related(second, RT.IMAGE) == related(slides[3], RT.IMAGE), (
+        "Image part not shared"
+    )
+    print("  ✅ Duplicates own their notes and charts and share the image")
+
+    slide_rels = {rel.rId for rel in result.part.rels.values() if rel.reltype == RT.SLIDE}
+    assert slide_rels == {sld_id.rId for sld_id in result.slides._sldIdLst}, (
+        f"Relationships of deleted slides kept: {sorted(slide_rels)}"
+    )
+    shown = [
+        result.part.related_part(sld.get(qn("r:id")))
+        for sld in result.part._element.xpath("./p:custShowLst/p:custShow/p:sldLst/p:sld")
+    ]
+    assert shown == [slides[3].part, slides[2].part, slides[0].part], "Custom show not pruned to kept slides"
+    print("  ✅ Deleted slides are gone from the custom show and relationships")
+
+
+async def test_rearrange_long_sequence():
+    """Test the planned order for a long sequence with many repeats"""
+    print("\n" + "="*60)
+    print("TEST 8: Rearrange Long Sequence")
+    print("="*60)
+
+    from pptx import Presentation
+    from rearrange import rearrange_presentation
+
+    # Up to 1000 slides drawn from a 500-slide deck, many of them repeats
+    rng = random.Random(42)
+    sequence = [rng.randrange(500) for _ in range(1000)]
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        template = Path(temp_dir) / "template.pptx"
+        output = Path(temp_dir) / "output.pptx"
+        build_titled_deck(template, [f"Slide {idx}" for idx in range(500)])
+
+        def best_time(length):
+            timings = []
+            for _ in range(2):
+                start = time.perf_counter()
+                with contextlib.redirect_stdout(io.StringIO()):
+                    rearrange_presentation(template, output, sequence[:length])
+                timings.append(time.perf_counter() - start)
+            return min(timings)
+
+        half_time = best_time(500)
+        full_time = best_time(1000)
+        result = Presentation(output)
+
+    titles = [slide.shapes.title.text for slide in result.slides]
+    assert titles == [f"Slide {idx}" for idx in sequence], "Final order doesn't follow the sequence"
+    assert len({slide.slide_id for slide in result.slides}) == 1000, "Duplicate slide ids"
+    print("  ✅ 1000 slides in sequence order")
+    # Doubling the sequence about doubles the time when planning is linear, a
+    # per-slide scan of the slide list makes it about three times
+    ratio = full_time / half_time
+    assert ratio < 2.6, f"1000 slides took {ratio:.1f}x as long as 500 ({full_time:.2f}s)"
+    print(f"  ✅ Time grows linearly ({half_time:.2f}s for 500, {full_time:.2f}s for 1000)")
+
+
 async def main():
     """Run all tests"""
     print("\n" + "="*60)
@@ -187,6 +386,15 @@ async def main():
         # Test 5: Server lifecycle
         await test_server_lifecycle()
         
+        # Test 6: Slide diff alignment
+        await test_slide_diff_alignment()
+        
+        # Test 7: Rearrange duplicates
+        await test_rearrange_duplicates()
+        
+        # Test 8: Rearrange long sequence
+        await test_rearrange_long_sequence()
+        
         print("\n" + "="*60)
         print("✅ ALL TESTS COMPLETED")
         print("="*60)
@@ -196,6 +404,9 @@ async def main():
         print("  ✅ Tool schemas are valid")
         print("  ✅ Tools are callable")
         print("  ✅ Server lifecycle works correctly")
+        print("  ✅ Slide diff aligns slides by content")
+        print("  ✅ Rearranged duplicates keep their own parts")
+        print("  ✅ Long rearrangements keep their order")
         print("\n🎉 The MCP server is working properly!")
         
     except Exception as e: